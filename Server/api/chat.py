@@ -1,10 +1,68 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import inspect
+import json
+import os
+from typing import Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from chat.nlp import NLP
+from chat.nlp import NLP, get_runtime, release_runtime
+from chat.cache import get_cache
+from chat.session import make_session_store
+from graph.driver import get_async_pool, close_async_pool
+from graph.engine import BACKEND, QUERY_ENGINE, make_async_query_engine
+from graph import metrics
+from graph.profile import get_profiler
 
 origins = ["http://localhost:3000", "https://dock-graph.vercel.app"]
 
-app = FastAPI()
+# DOCKGRAPH_WATCH=true keeps the graph in step with the connector files from
+# inside the API process, so its caches are invalidated as soon as they change
+WATCH = os.getenv("DOCKGRAPH_WATCH", "false").lower() == "true"
+
+# /admin endpoints require this in the X-Admin-Token header, and are not
+# served at all while it is unset
+ADMIN_TOKEN = os.getenv("DOCKGRAPH_ADMIN_TOKEN", "")
+
+
+# one driver / connection pool for the whole process, shared by every request
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = None
+    if QUERY_ENGINE == "neo4j":
+        pool = get_async_pool()
+        await pool.verify_connectivity()
+    app.state.pool = pool
+    if BACKEND == "local" and not WATCH:
+        # the embedded graph only holds what this process loads into it
+        # (the watcher does its own initial load)
+        from graph.load_graph import load_graph
+        await asyncio.to_thread(load_graph, incremental=True)
+    app.state.engine = await make_async_query_engine(pool)
+    # agent, models and formatter chain are built once and shared by all requests
+    app.state.runtime = get_runtime(app.state.engine)
+    app.state.sessions = make_session_store(app.state.runtime.summarizer)
+    app.state.ingest = None
+    if WATCH:
+        from graph.watch import IngestDaemon
+        app.state.ingest = IngestDaemon()
+        app.state.ingest.start()
+    yield
+    if app.state.ingest is not None:
+        await asyncio.to_thread(app.state.ingest.stop)
+    release_runtime(app.state.engine)
+    closed = app.state.engine.close()
+    if inspect.isawaitable(closed):
+        await closed
+    await close_async_pool()
+    if BACKEND == "local":
+        from graph.local import close_local_graph
+        close_local_graph()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,14 +75,19 @@ app.add_middleware(
 
 
 @app.post("/chat")
-def handle_chat(prompt: str):
-    caller = NLP()
-    response = caller.llm_agent(prompt)
+async def handle_chat(prompt: str, request: Request, conversation_id: Optional[str] = None):
+    sessions = request.app.state.sessions
+    session = await asyncio.to_thread(sessions.load, conversation_id)
+    caller = NLP(runtime=request.app.state.runtime)
+    response = await caller.allm_agent(prompt, session.messages)
+    # trimming may call the summarizer model
+    await asyncio.to_thread(sessions.save, session)
     
     # Convert Pydantic model to dict for JSON serialization
     if response:
         return {
-            "result": response.model_dump()
+            "result": response.model_dump(),
+            "conversation_id": session.id,
         }
     
     return {
@@ -32,6 +95,79 @@ def handle_chat(prompt: str):
             "type": "error",
             "message": "Failed to process request",
             "data": None
-        }
+        },
+        "conversation_id": session.id,
     }
-    
+
+
+def _sse(event: dict) -> str:
+    name = event.pop("event")
+    return f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+# Same answer as /chat, streamed as server-sent events: tool_start / tool_end
+# (with partial graph results), token (model output), then a final result
+@app.post("/chat/stream")
+async def handle_chat_stream(prompt: str, request: Request, conversation_id: Optional[str] = None):
+    sessions = request.app.state.sessions
+    session = await asyncio.to_thread(sessions.load, conversation_id)
+    caller = NLP(runtime=request.app.state.runtime)
+
+    async def events():
+        yield _sse({"event": "session", "conversation_id": session.id})
+        try:
+            async for event in caller.astream_agent(prompt, session.messages):
+                yield _sse(event)
+        except Exception as e:
+            yield _sse({"event": "error", "message": str(e)})
+        await asyncio.to_thread(sessions.save, session)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/health")
+async def health(request: Request):
+    pool = request.app.state.pool
+    if pool is None:
+        return {"status": "ok", "engine": QUERY_ENGINE}
+
+    alive = await pool.is_alive()
+    return {"status": "ok" if alive else "degraded", "engine": QUERY_ENGINE, "neo4j": alive}
+
+
+@app.get("/pool")
+async def pool_metrics(request: Request):
+    pool = request.app.state.pool
+    return pool.metrics() if pool else {}
+
+
+@app.get("/cache")
+async def cache_stats():
+    return get_cache().stats()
+
+
+# Prometheus scrape target: per-stage chat latency, query engine, cache and
+# load histograms, token and tool-call counters (see graph/metrics.py)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Recent Cypher PROFILE captures and slow queries, when the query engine runs
+# with DOCKGRAPH_PROFILE=true (see graph/profile.py)
+@app.get("/admin/profiles")
+async def query_profiles(request: Request, limit: int = 20):
+    _require_admin(request)
+    return get_profiler().report(limit)
+
+
+def _require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    given = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(given.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="admin token required")
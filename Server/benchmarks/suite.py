@@ -0,0 +1,272 @@
+"""
+End-to-end benchmark on a generated estate: load_graph throughput, the
+latency of each QueryEngine traversal, and /chat latency with the LLM
+replaced by a stub, so only DockGraph's own work is measured. Runs on the
+embedded backend unless --backend neo4j. Writes JSON, for comparing
+releases.
+
+    python -m benchmarks.suite --services 10000 --fan-out 3 --depth 5 --output bench.json
+
+With --backend neo4j the target must be given explicitly (--neo4j-uri) and
+hold an empty graph; the estate is deleted from it afterwards.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+from unittest import mock
+from benchmarks.estate import write_estate
+
+
+def latencies(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pct(50) * 1000, 3),
+        "p95_ms": round(pct(95) * 1000, 3),
+        "p99_ms": round(pct(99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _timed(fn: Callable, args_list: List) -> List[float]:
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_load(batch_size: int, workers: int) -> Dict:
+    from graph.engine import make_storage
+    from graph.load_graph import load_graph
+
+    # connect to (and import) the backend outside the timings
+    make_storage().close()
+
+    start = time.perf_counter()
+    full = load_graph(batch_size=batch_size, workers=workers)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_graph(batch_size=batch_size, workers=workers, incremental=True)
+    noop_seconds = time.perf_counter() - start
+
+    parse_seconds = sum(t["parse_seconds"] for t in full["connectors"].values())
+    return {
+        "nodes": full["nodes_upserted"],
+        "edges": full["edges_upserted"],
+        "dangling_edges": len(full["dangling_edges"]),
+        "seconds": round(full_seconds, 4),
+        "parse_seconds": round(parse_seconds, 4),
+        "write_seconds": round(full["node_seconds"] + full["edge_seconds"], 4),
+        "nodes_per_sec": round(full["nodes_upserted"] / full_seconds),
+        "edges_per_sec": round(full["edges_upserted"] / full_seconds),
+        "noop_reload_seconds": round(noop_seconds, 4),
+    }
+
+
+def bench_queries(services: int, depth: int, queries: int, seed: int) -> Dict:
+    from graph.engine import make_query_engine
+    from benchmarks.estate import layers
+
+    rng = random.Random(seed)
+    engine = make_query_engine()
+    try:
+        # the first query pays for anything built lazily (snapshots, schema)
+        start = time.perf_counter()
+        engine.check_node_existence("service:svc-0")
+        first = time.perf_counter() - start
+
+        nodes = [(f"service:svc-{rng.randrange(services)}",) for _ in range(queries)]
+        entry, last = layers(services, depth)[0], layers(services, depth)[-1]
+        pairs = [(f"service:svc-{rng.choice(entry)}", f"service:svc-{rng.choice(last)}") for _ in range(queries)]
+
+        results = {
+            "downstream": latencies(_timed(engine.downstream, nodes)),
+            "upstream": latencies(_timed(engine.upstream, nodes)),
+            "path": latencies(_timed(engine.path, pairs)),
+            "blast_radius": latencies(_timed(engine.blast_radius, nodes)),
+        }
+        results["first_query_ms"] = round(first * 1000, 3)
+        return results
+    finally:
+        engine.close()
+
+
+def _stub_model(delay: float):
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class StubChatModel(BaseChatModel):
+        """Calls blast_radius on the node named in the question, then answers."""
+
+        @property
+        def _llm_type(self) -> str:
+            return "stub"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            if delay:
+                time.sleep(delay)
+            last = messages[-1]
+            if isinstance(last, HumanMessage):
+                node_id = re.search(r"\w+:[\w./\-]+", last.content).group(0)
+                message = AIMessage(content="", tool_calls=[
+                    {"name": "blast_radius", "args": {"node_id": node_id}, "id": f"call-{len(messages)}"},
+                ])
+            else:
+                message = AIMessage(content="done")
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return StubChatModel()
+
+
+def bench_chat(services: int, chats: int, model_delay: float, seed: int) -> Dict:
+    from fastapi.testclient import TestClient
+    from langchain.agents import create_agent
+    from api.chat import app
+    from chat.nlp import SYSTEM_PROMPT
+
+    rng = random.Random(seed)
+    routed_prompts = ["what depends on svc-{i}", "who owns svc-{i}", "what breaks if svc-{i} goes down"]
+
+    with TestClient(app) as client:
+        runtime = app.state.runtime
+        runtime.agent = create_agent(model=_stub_model(model_delay), tools=runtime.tools, system_prompt=SYSTEM_PROMPT)
+        runtime.cache.invalidate()
+
+        def ask(prompt):
+            response = client.post("/chat", params={"prompt": prompt})
+            response.raise_for_status()
+            if response.json()["result"].get("type") == "error":
+                raise RuntimeError(f"/chat failed for {prompt!r}")
+
+        # answered by the intent router, without the model
+        routed = [(rng.choice(routed_prompts).format(i=rng.randrange(services)),) for _ in range(chats)]
+        # unrecognized shape: the agent (stub model) and its tool call
+        agent = [(f"give me an overview of service:svc-{rng.randrange(services)}",) for _ in range(chats)]
+
+        return {
+            "model_delay_ms": model_delay * 1000,
+            "routed": latencies(_timed(ask, routed)),
+            "agent": latencies(_timed(ask, agent)),
+        }
+
+
+def _neo4j_is_empty() -> bool:
+    from graph.driver import get_pool
+    with get_pool().session() as session:
+        return session.run("MATCH (n) RETURN count(n) = 0 AS empty").single()["empty"]
+
+
+def _clear_neo4j():
+    from graph.driver import close_pool, get_pool
+    with get_pool().session() as session:
+        session.run("MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS").consume()
+    close_pool()
+
+
+def run(services: int = 1000, fan_out: int = 3, depth: int = 4, queries: int = 200, chats: int = 50,
+        backend: str = "local", batch_size: int = 1000, workers: int = None, model_delay: float = 0.0,
+        seed: int = 0, neo4j_uri: str = None) -> Dict:
+    if backend == "neo4j" and not neo4j_uri:
+        # never fall back on NEO4J_URI from the environment or .env: that is
+        # usually the real graph
+        raise ValueError("--backend neo4j needs an explicit --neo4j-uri for a scratch database")
+
+    with tempfile.TemporaryDirectory() as directory:
+        estate = write_estate(directory, services, fan_out, depth, seed)
+
+        # read by the graph modules when they are first imported
+        env = {
+            "DOCKGRAPH_BACKEND": backend,
+            "DOCKGRAPH_QUERY_ENGINE": backend,
+            "DOCKGRAPH_LOCAL_DB": "",
+            "DOCKGRAPH_COMPOSE_PATH": estate["compose"],
+            "DOCKGRAPH_TEAMS_PATH": estate["teams"],
+            "DOCKGRAPH_SYNC_STATE": os.path.join(directory, "state.json"),
+            "DOCKGRAPH_YAML_CACHE": "",
+            "DOCKGRAPH_WATCH": "false",
+            # the stub replaces the model
+            "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "unused"),
+        }
+        if neo4j_uri:
+            env["NEO4J_URI"] = neo4j_uri
+
+        with mock.patch.dict(os.environ, env):
+            return _run(estate, services, depth, queries, chats, backend, batch_size, workers, model_delay, seed)
+
+
+def _run(estate: Dict, services: int, depth: int, queries: int, chats: int, backend: str,
+         batch_size: int, workers: int, model_delay: float, seed: int) -> Dict:
+    from graph import engine
+    if engine.BACKEND != backend:
+        raise RuntimeError("graph modules were already imported with another backend; run the suite in its own process")
+
+    if backend == "neo4j" and not _neo4j_is_empty():
+        raise RuntimeError(f"{os.environ['NEO4J_URI']} already holds a graph; the benchmark needs an empty database")
+
+    try:
+        # keep stdout for the JSON: load_graph and the chat handler print progress
+        with contextlib.redirect_stdout(sys.stderr):
+            return {
+                "estate": {k: v for k, v in estate.items() if k not in ("compose", "teams")},
+                "environment": {
+                    "backend": backend,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                },
+                "load": bench_load(batch_size, workers),
+                "queries": bench_queries(services, depth, queries, seed),
+                "chat": bench_chat(services, chats, model_delay, seed) if chats else None,
+            }
+    finally:
+        if backend == "neo4j":
+            # the database was empty before: everything in it is the estate
+            _clear_neo4j()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", type=int, default=1000)
+    parser.add_argument("--fan-out", type=int, default=3)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200, help="samples per traversal")
+    parser.add_argument("--chats", type=int, default=50, help="/chat requests per kind (0 to skip)")
+    parser.add_argument("--backend", choices=["local", "neo4j"], default="local")
+    parser.add_argument("--neo4j-uri", help="scratch database for --backend neo4j; must be empty, and is emptied afterwards")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--model-delay", type=float, default=0.0, help="seconds the stub model takes per call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(
+        args.services, args.fan_out, args.depth, args.queries, args.chats,
+        args.backend, args.batch_size, args.workers, args.model_delay, args.seed, args.neo4j_uri,
+    )
+    encoded = json.dumps(results, indent=2)
+    print(encoded)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
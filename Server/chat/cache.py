@@ -1,75 +1,167 @@
-import pprint
-from langchain.tools import tool
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from graph.events import on_reload
+from graph.metrics import histogram
+
+DEFAULT_MAX_SIZE = int(os.getenv("DOCKGRAPH_CACHE_SIZE", 1024))
+DEFAULT_TTL = float(os.getenv("DOCKGRAPH_CACHE_TTL", 300))  # seconds
+
+MISS = object()
+
+LOOKUP_SECONDS = histogram(
+    "dockgraph_cache_lookup_seconds",
+    "Time to look up a tool result in the query cache, by outcome (hit, miss).",
+    ["tool", "result"],
+)
+
 
 class Cache():
-    def __init__(self):
-        self.cached = {}
-        # for every intent : {
-        #    entity_type : query_result 
-        # }
-    
-    def get_cached_query(self, intent: str):
-        # check cached if the intent is already present in the cached object
-        if self.cached.get(intent.get("intent", ""), ""):
-            intent = self.cached.get(intent.get("intent"));
-            entity = f"{intent.get("entity_type")}:{intent.get("entity_name")}"
-            if intent.get(entity):
-                print("used cached value..")
-                pp = pprint.PrettyPrinter(indent=4)
-                pp.pprint(intent.get(entity));
-                # ex : intent -> get owner, entity : payment-service => store [entity name]
-                return intent.get(entity);
-        else:
-            print("no cache")
-            return None
-
-    def add_to_cache(self, intent: str, query_result: list[str]):
-        action = intent.get("intent");
-        entity = f"{intent.get("entity_type")}:{intent.get("entity_name")}"
-        self.cached[action] = {}
-        self.cached[action][entity] = query_result
-        print("cached")
-        pp = pprint.PrettyPrinter(indent=4)
-        pp.pprint(query_result);
-
-
-def get_cache_tools(cache: Cache):
-    
-    @tool
-    def get_cached_query(intent: dict):
-        """
-        check cache before calling database
-        valid intents : get_owner, get_owned, blast_radius, upstream, downstream, list_nodes
-        Retrieve a cached query result for a given intent and entity.
-        
-        Args:
-            intent (dict): Dictionary containing 'intent', 'entity_type', and 'entity_name' keys
-                          Example: {'intent': 'get_owner', 'entity_type': 'service', 'entity_name': 'payment-service'}
-        
-        Returns:
-            Query result if found in cache, None otherwise
-        """
-        print("fRom Cacheeeeee")
-        return cache.get_cached_query(intent)
-    
-    @tool
-    def add_to_cache(intent: dict, query_result: list):
-        """
-        after Every query add the query result to cache
-        valid intents : get_owner, get_owned, blast_radius, upstream, downstream, list_nodes
-        Add a query result to the cache for a given intent and entity.
-        
-        Args:
-            intent (dict): Dictionary containing 'intent', 'entity_type', and 'entity_name' keys
-                          Example: {'intent': 'get_owner', 'entity_type': 'service', 'entity_name': 'payment-service'}
-            query_result (list): The query result to cache
-        
-        Returns:
-            None. The result is stored in the internal cache and printed to console
-        """
-        return cache.add_to_cache(intent, query_result)
-    
-    return [
-        get_cached_query,
-        add_to_cache,
-    ]
+    """
+    Size-bounded LRU of query results with a per-entry TTL, keyed on
+    (tool name, normalized arguments). Safe to share between threads.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.cached: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(tool_name: str, args: Dict) -> Tuple[str, str]:
+        # unset optional arguments and stray whitespace must not split entries
+        normalized = {
+            k: v.strip() if isinstance(v, str) else v
+            for k, v in (args or {}).items()
+            if v is not None and v != ""
+        }
+        return tool_name, json.dumps(normalized, sort_keys=True, default=str)
+
+    def get(self, tool_name: str, args: Dict) -> Any:
+        """Cached result, or MISS (results may legitimately be None)."""
+        start = time.perf_counter()
+        value = self._lookup(tool_name, args)
+        outcome = "miss" if value is MISS else "hit"
+        LOOKUP_SECONDS.observe(time.perf_counter() - start, tool=tool_name, result=outcome)
+        return value
+
+    def _lookup(self, tool_name: str, args: Dict) -> Any:
+        key = self.make_key(tool_name, args)
+
+        with self._lock:
+            entry = self.cached.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+
+            expires_at, value = entry
+            if self.clock() >= expires_at:
+                del self.cached[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+
+            self.cached.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, tool_name: str, args: Dict, value: Any):
+        key = self.make_key(tool_name, args)
+
+        with self._lock:
+            self.cached[key] = (self.clock() + self.ttl, value)
+            self.cached.move_to_end(key)
+
+            while len(self.cached) > self.max_size:
+                self.cached.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self.cached.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self.cached),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """The process-wide cache, emptied whenever the graph is reloaded."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache = Cache()
+            on_reload(lambda nodes, edges: cache.invalidate())
+            _cache = cache
+        return _cache
+
+
+def cached_tools(tools: List, cache: Cache) -> List:
+    """
+    Memoize the graph tools in place: a call with the same (tool, arguments)
+    is answered from the cache without touching the graph, and the agent
+    never has to know the cache exists.
+    """
+    for t in tools:
+        if t.func is not None:
+            t.func = _memoize(t.name, t.func, cache)
+        if t.coroutine is not None:
+            t.coroutine = _amemoize(t.name, t.coroutine, t.func, cache)
+    return tools
+
+
+def _call_args(signature_of, args, kwargs) -> Dict:
+    bound = inspect.signature(signature_of).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _memoize(name: str, func, cache: Cache):
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        call_args = _call_args(func, args, kwargs)
+        value = cache.get(name, call_args)
+        if value is MISS:
+            value = func(*args, **kwargs)
+            cache.put(name, call_args, value)
+        return value
+
+    return run
+
+
+def _amemoize(name: str, coroutine, signature_of, cache: Cache):
+    async def run(*args, **kwargs):
+        call_args = _call_args(signature_of or coroutine, args, kwargs)
+        value = cache.get(name, call_args)
+        if value is MISS:
+            value = await coroutine(*args, **kwargs)
+            cache.put(name, call_args, value)
+        return value
+
+    return run
@@ -0,0 +1,178 @@
+import json
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from .output_schema import LLMOutput
+
+
+def strip_prefix(node_id: str) -> str:
+    # "service:payment-service" -> "payment-service"
+    return node_id.split(":", 1)[1] if ":" in node_id else node_id
+
+
+def _names(nodes: Optional[List[Dict]]) -> List[str]:
+    return [strip_prefix(n["id"]) for n in nodes or [] if n]
+
+
+def _list_or_text(names: List[str], message: str, empty_message: str) -> LLMOutput:
+    if not names:
+        return LLMOutput(type="text", message=empty_message, data=None)
+    return LLMOutput(type="list", message=message, data=names)
+
+
+def format_tool_result(tool_name: str, args: Dict, result) -> Optional[LLMOutput]:
+    """
+    Build the LLMOutput for a graph tool's structured result without asking a
+    model to re-read it. Returns None for tools it has no mapping for.
+    """
+    node = strip_prefix(args.get("node_id", "") or "")
+    filters = args.get("filters")
+    kind = f"{filters} " if filters else ""
+
+    if tool_name == "get_owner":
+        if not result:
+            return LLMOutput(type="text", message=f"No owning team found for {node}", data=None)
+        return LLMOutput(type="list", message=f"Owner of {node}", data=[strip_prefix(result["id"])])
+
+    if tool_name == "get_owned_by_team":
+        return _list_or_text(
+            _names(result),
+            f"{filters or 'node'}s owned by {node}".capitalize(),
+            f"{node} does not own any {filters or 'node'}s",
+        )
+
+    if tool_name == "downstream":
+        return _list_or_text(
+            _names(result),
+            f"Downstream {kind}dependencies of {node}",
+            f"{node} has no downstream {kind}dependencies",
+        )
+
+    if tool_name == "upstream":
+        return _list_or_text(
+            _names(result),
+            f"Upstream {kind}dependents of {node}",
+            f"No {kind}nodes depend on {node}",
+        )
+
+    if tool_name == "path":
+        start = strip_prefix(args.get("from_id", ""))
+        end = strip_prefix(args.get("to_id", ""))
+        if not result:
+            return LLMOutput(type="text", message=f"No path from {start} to {end}", data=None)
+        return LLMOutput(
+            type="path",
+            message=f"Path from {start} to {end}",
+            data=[strip_prefix(n) for n in result],
+        )
+
+    if tool_name == "blast_radius":
+        message = f"Blast radius of {node}"
+        if result.get("truncated"):
+            message += " (truncated)"
+        return LLMOutput(
+            type="blast_radius",
+            message=message,
+            data={
+                "upstream": _names(result.get("upstream")),
+                "downstream": _names(result.get("downstream")),
+                "teams": _names(result.get("teams")),
+            },
+        )
+
+    if tool_name == "get_node":
+        if not result:
+            return LLMOutput(type="error", message=f"{node} was not found in the graph", data=None)
+        return LLMOutput(
+            type="node_detail",
+            message=f"Details of {node}",
+            data={**result["properties"], "type": result["type"]},
+        )
+
+    if tool_name == "get_nodes":
+        label = args.get("type") or "node"
+        return LLMOutput(
+            type="table",
+            message=f"All {label}s",
+            data=[{**n["properties"], "type": n["type"] or label} for n in result or []],
+        )
+
+    if tool_name == "check_node_existence":
+        exists = "exists" if result else "does not exist"
+        return LLMOutput(type="text", message=f"{node} {exists} in the graph", data=None)
+
+    return None
+
+
+def describe(output: LLMOutput) -> str:
+    """Plain-text rendering of an output, kept in the chat history."""
+    if isinstance(output.data, list) and all(isinstance(d, str) for d in output.data):
+        return f"{output.message}: {', '.join(output.data)}"
+    if output.data:
+        return f"{output.message}: {output.data}"
+    return output.message
+
+
+_UNDECODABLE = object()
+
+
+def decode_tool_output(output):
+    """
+    The data a tool returned, from its ToolMessage. LangChain serializes most
+    results as JSON, but keeps lists of strings (path) and empty lists
+    (downstream, upstream) as list content.
+    """
+    if not isinstance(output, ToolMessage):
+        return output
+    if output.status == "error":
+        return _UNDECODABLE
+    if isinstance(output.content, (list, dict)):
+        return output.content
+    try:
+        return json.loads(output.content)
+    except (TypeError, ValueError):
+        return _UNDECODABLE
+
+
+def format_tool_output(tool_name: str, args: Dict, output) -> Optional[LLMOutput]:
+    """format_tool_result for a raw tool output; None if it cannot be mapped."""
+    result = decode_tool_output(output)
+    if result is _UNDECODABLE:
+        return None
+    try:
+        return format_tool_result(tool_name, args or {}, result)
+    except (AttributeError, KeyError, TypeError):
+        # result not shaped like the tool's usual output
+        return None
+
+
+def last_tool_call(messages: List) -> Optional[Tuple[str, Dict, ToolMessage]]:
+    """
+    (tool name, arguments, ToolMessage) of the last tool call the agent made
+    for the current question, or None if it answered without tools.
+    """
+    turn = []
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            break
+        turn.append(msg)
+    turn.reverse()
+
+    args_by_call = {
+        call["id"]: call["args"]
+        for msg in turn if isinstance(msg, AIMessage)
+        for call in msg.tool_calls
+    }
+
+    for msg in reversed(turn):
+        if isinstance(msg, ToolMessage):
+            return msg.name, args_by_call.get(msg.tool_call_id, {}), msg
+
+    return None
+
+
+def format_from_messages(messages: List) -> Optional[LLMOutput]:
+    """LLMOutput built from the agent's last tool result, if it has one we can map."""
+    last = last_tool_call(messages)
+    if last is None:
+        return None
+    return format_tool_output(*last)
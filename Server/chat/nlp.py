@@ -1,29 +1,28 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.language_models import BaseChatModel
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_groq import ChatGroq
 from langchain.tools import tool
 from langchain.agents import create_agent
 from graph.query import QueryEngine, create_tools
-from .cache import Cache, get_cache_tools
+from graph.engine import make_query_engine
+from graph.events import on_reload, remove_listener
+from graph.metrics import counter, histogram
+from .cache import cached_tools, get_cache
+from .router import IntentRouter
+from .session import Session
+from .formatter import describe, format_from_messages, format_tool_output, format_tool_result
 import pprint
 import json
+import inspect
+import os
+import threading
+import time
 from .output_schema import LLMOutput
 from langchain_core.messages import AIMessage, HumanMessage
 
 
-class NLP():
-    def __init__(self):
-        self.qe = QueryEngine()
-        self.cache = Cache()
-        self.history = [];
-        MAX_TURNS = 6
-        self.history = self.history[-MAX_TURNS*2:]
-        
-    def llm_agent(self, query : str):
-        # takes input from user
-        # create a chain which makes use of tools present in tool kit
-        self.history.append(HumanMessage(content=query))
-        system_prompt = """
+SYSTEM_PROMPT = """
 You are a backend engineer executing graph queries based on user requests.
 
 CRITICAL: Always pass node_id as a SIMPLE STRING, not an object or dict.
@@ -51,36 +50,9 @@ Tool-specific guidance:
 - upstream(node_id, filters): Pass any node to find what depends on it
 - path(from_id, to_id): Pass two node IDs to find the shortest path
 - blast_radius(node_id, filters): Pass any node for complete impact analysis
-        """
-
+"""
 
-        tools = create_tools(self.qe)
-        cache_tools = get_cache_tools(self.cache)
-        model = ChatGroq(model="openai/gpt-oss-120b")
-        groq_agent = create_agent(
-            model=model,
-            tools=tools + cache_tools,
-            system_prompt=system_prompt,
-        )
-        
-        if query:
-            result = groq_agent.invoke({
-            "messages": self.history
-            })
-            
-            final_ai = next(
-            msg for msg in reversed(result["messages"])
-            if isinstance(msg, AIMessage)
-            )
-            
-            pp = pprint.PrettyPrinter(indent=4);
-            # pp.pprint(result);
-            # pp.pprint(final_ai.content);
-            self.history.append(final_ai)
-            
-            # Structure the response using an LLM agent
-            parser_prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are a response formatter. Convert the AI assistant's response into a structured JSON format.
+FORMATTER_PROMPT = """You are a response formatter. Convert the AI assistant's response into a structured JSON format.
 
 RULES FOR DETERMINING 'type':
 
@@ -163,21 +135,350 @@ EXAMPLES:
 - "Node exists: Yes" → type="text", data=null
 - "Blast radius: upstream=[X], downstream=[Y], teams=[Z]" → type="blast_radius", data={{"upstream":["X"], "downstream":["Y"], "teams":["Z"]}}
 
-ALWAYS remove type prefixes (service:, database:, team:, cache:) from node names."""),
-                ("user", "Format this response into structured data:\n{content}")
-            ])
-            
-            parser_llm = ChatGroq(model="llama-3.3-70b-versatile").with_structured_output(LLMOutput)
-            parser_chain = parser_prompt | parser_llm
-            
-            
-            structured_result = parser_chain.invoke({
-                "content": final_ai.content
-            })
+ALWAYS remove type prefixes (service:, database:, team:, cache:) from node names."""
+
+SUMMARY_PROMPT = """Summarize this conversation about a service dependency graph in a few sentences.
+Keep every service, database, cache and team name that was mentioned and what was learned about it.
+
+Previous summary: {summary}
+
+Conversation:
+{conversation}"""
+
+# summarize turns that slide out of a conversation's window instead of dropping them
+SUMMARIZE_SESSIONS = os.getenv("DOCKGRAPH_SESSION_SUMMARIZE", "").lower() in ("1", "true", "yes")
+
+STAGE_SECONDS = histogram(
+    "dockgraph_chat_stage_seconds",
+    "Time spent in each stage of a chat request: route (intent router), tool (routed graph call), "
+    "agent (model and tool loop), formatter (structuring model).",
+    ["stage"],
+)
+LLM_TOKENS = counter(
+    "dockgraph_llm_tokens_total",
+    "Tokens used by chat requests, by model and kind (input, output).",
+    ["model", "kind"],
+)
+TOOL_CALLS = counter(
+    "dockgraph_tool_calls_total",
+    "Graph tool calls made by chat requests, by tool and caller (router, agent).",
+    ["tool", "caller"],
+)
+TOOL_CALLS_PER_REQUEST = histogram(
+    "dockgraph_chat_tool_calls",
+    "Graph tool calls per answered chat request.",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21),
+)
+
+
+def record_routed(tool_name: str):
+    TOOL_CALLS.inc(tool=tool_name, caller="router")
+    TOOL_CALLS_PER_REQUEST.observe(1)
+
+
+def record_agent_run(usage: UsageMetadataCallbackHandler, messages: list):
+    """Token and tool-call counters for one agent run; messages are the ones it added."""
+    for model, used in usage.usage_metadata.items():
+        LLM_TOKENS.inc(used.get("input_tokens", 0), model=model, kind="input")
+        LLM_TOKENS.inc(used.get("output_tokens", 0), model=model, kind="output")
+
+    calls = [call["name"] for m in messages if isinstance(m, AIMessage) for call in m.tool_calls]
+    for name in calls:
+        TOOL_CALLS.inc(tool=name, caller="agent")
+    TOOL_CALLS_PER_REQUEST.observe(len(calls))
+
+
+class AgentRuntime():
+    """
+    Everything that is expensive to build and holds no conversation state:
+    the graph tools, both Groq clients, the agent graph and the formatter
+    chain. Built once per query engine and shared by every conversation.
+    """
+
+    def __init__(self, engine, cache=None):
+        self.engine = engine
+        self.cache = cache or get_cache()
+
+        # graph tools answer repeated calls from the shared cache
+        self.tools = cached_tools(create_tools(engine), self.cache)
+        self.model = ChatGroq(model="openai/gpt-oss-120b")
+        self.agent = create_agent(
+            model=self.model,
+            tools=self.tools,
+            system_prompt=SYSTEM_PROMPT,
+        )
+
+        # Structure the response using an LLM agent
+        self.parser_prompt = ChatPromptTemplate.from_messages([
+            ("system", FORMATTER_PROMPT),
+            ("user", "Format this response into structured data:\n{content}")
+        ])
+        self.parser_llm = ChatGroq(model="llama-3.3-70b-versatile").with_structured_output(LLMOutput)
+        self.parser_chain = self.parser_prompt | self.parser_llm
+
+        self.tools_by_name = {t.name: t for t in self.tools}
+        self.router = None
+        on_reload(self._reset_router)
+
+        self.summarizer = None
+        if SUMMARIZE_SESSIONS:
+            self.summary_chain = (
+                ChatPromptTemplate.from_template(SUMMARY_PROMPT)
+                | ChatGroq(model="llama-3.3-70b-versatile")
+            )
+            self.summarizer = self.summarize
+
+    def summarize(self, summary, messages) -> str:
+        conversation = "\n".join(f"{m.type}: {m.content}" for m in messages)
+        return self.summary_chain.invoke({
+            "summary": summary or "none",
+            "conversation": conversation,
+        }).content
+
+    def close(self):
+        remove_listener(self._reset_router)
+
+    def _reset_router(self, nodes, edges):
+        self.router = IntentRouter(n["id"] for n in nodes)
+
+    def get_router(self) -> IntentRouter:
+        if self.router is None:
+            self.router = IntentRouter(n["id"] for n in self.engine.get_nodes(""))
+        return self.router
+
+    async def aget_router(self) -> IntentRouter:
+        if self.router is None:
+            nodes = self.engine.get_nodes("")
+            if inspect.isawaitable(nodes):
+                nodes = await nodes
+            self.router = IntentRouter(n["id"] for n in nodes)
+        return self.router
+
+
+_runtimes = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_runtime(engine) -> AgentRuntime:
+    with _runtimes_lock:
+        runtime = _runtimes.get(id(engine))
+        if runtime is None or runtime.engine is not engine:
+            runtime = AgentRuntime(engine)
+            _runtimes[id(engine)] = runtime
+        return runtime
+
+
+def release_runtime(engine):
+    # call when the engine is closed: a later engine can be given the same id
+    with _runtimes_lock:
+        runtime = _runtimes.get(id(engine))
+        if runtime is not None and runtime.engine is engine:
+            del _runtimes[id(engine)]
+            runtime.close()
+
+
+class NLP():
+    # engine may be a QueryEngine or an AsyncQueryEngine (use allm_agent for the latter)
+    def __init__(self, engine: QueryEngine = None, runtime: AgentRuntime = None):
+        if runtime is None:
+            runtime = get_runtime(engine or make_query_engine())
+        self.runtime = runtime
+        self.qe = runtime.engine
+        self.cache = runtime.cache
+        # the CLI's own conversation, kept within the session token budget
+        self.session = Session()
+        self.history = self.session.messages
+
+    def _trim(self, history: list):
+        # callers passing their own history (API sessions) trim it on save
+        if history is self.history:
+            self.session.trim(self.runtime.summarizer)
+
+    def _final_answer(self, result, history: list) -> AIMessage:
+        final_ai = next(
+            msg for msg in reversed(result["messages"])
+            if isinstance(msg, AIMessage)
+        )
+        history.append(final_ai)
+        self._trim(history)
+        return final_ai
+
+    def _answered(self, output: LLMOutput, history: list) -> LLMOutput:
+        history.append(AIMessage(content=describe(output)))
+        self._trim(history)
+        return output
+
+    # Common question shapes are answered straight from the graph: no agent,
+    # no formatter call. Anything the router is unsure about returns None.
+    def fast_path(self, query: str, history: list):
+        with STAGE_SECONDS.time(stage="route"):
+            routed = self.runtime.get_router().route(query)
+        if not routed:
+            return None
+
+        tool_name, args = routed
+        with STAGE_SECONDS.time(stage="tool"):
+            result = self.runtime.tools_by_name[tool_name].invoke(args)
+        output = format_tool_result(tool_name, args, result)
+        if output:
+            record_routed(tool_name)
+        return output and self._answered(output, history)
+
+    async def afast_path(self, query: str, history: list):
+        with STAGE_SECONDS.time(stage="route"):
+            routed = (await self.runtime.aget_router()).route(query)
+        if not routed:
+            return None
+
+        tool_name, args = routed
+        with STAGE_SECONDS.time(stage="tool"):
+            result = await self.runtime.tools_by_name[tool_name].ainvoke(args)
+        output = format_tool_result(tool_name, args, result)
+        if output:
+            record_routed(tool_name)
+        return output and self._answered(output, history)
+
+    # history: the conversation's messages, defaults to this instance's own
+    def llm_agent(self, query : str, history: list = None):
+        # takes input from user
+        history = self.history if history is None else history
+        history.append(HumanMessage(content=query))
+
+        if query:
+            routed = self.fast_path(query, history)
+            if routed:
+                return routed
+
+            # collects token usage from the agent and formatter models
+            usage = UsageMetadataCallbackHandler()
+            config = {"callbacks": [usage]}
+            seen = len(history)
+
+            with STAGE_SECONDS.time(stage="agent"):
+                result = self.runtime.agent.invoke({
+                "messages": history
+                }, config=config)
+            final_ai = self._final_answer(result, history)
+
+            # the formatter model is only needed for free-text answers
+            structured_result = format_from_messages(result["messages"])
+            if structured_result is None:
+                with STAGE_SECONDS.time(stage="formatter"):
+                    structured_result = self.runtime.parser_chain.invoke({
+                        "content": final_ai.content
+                    }, config=config)
+            record_agent_run(usage, result["messages"][seen:])
             
             
             print(structured_result)
             return structured_result
         return {
             "data" : "enter a valid query"
-        }
\ No newline at end of file
+        }
+
+    # same flow as llm_agent, awaiting the model and graph calls
+    async def allm_agent(self, query : str, history: list = None):
+        history = self.history if history is None else history
+        history.append(HumanMessage(content=query))
+
+        if query:
+            routed = await self.afast_path(query, history)
+            if routed:
+                return routed
+
+            usage = UsageMetadataCallbackHandler()
+            config = {"callbacks": [usage]}
+            seen = len(history)
+
+            with STAGE_SECONDS.time(stage="agent"):
+                result = await self.runtime.agent.ainvoke({
+                "messages": history
+                }, config=config)
+            final_ai = self._final_answer(result, history)
+
+            structured_result = format_from_messages(result["messages"])
+            if structured_result is None:
+                with STAGE_SECONDS.time(stage="formatter"):
+                    structured_result = await self.runtime.parser_chain.ainvoke({
+                        "content": final_ai.content
+                    }, config=config)
+            record_agent_run(usage, result["messages"][seen:])
+
+            print(structured_result)
+            return structured_result
+        return {
+            "data" : "enter a valid query"
+        }
+
+    # allm_agent as a stream of events for /chat/stream: tool_start and
+    # tool_end (carrying the formatted graph result as soon as the tool
+    # returns), token (agent model output as it arrives), then result
+    async def astream_agent(self, query : str, history: list = None):
+        history = self.history if history is None else history
+        history.append(HumanMessage(content=query))
+
+        if not query:
+            yield {"event": "error", "message": "enter a valid query"}
+            return
+
+        with STAGE_SECONDS.time(stage="route"):
+            routed = (await self.runtime.aget_router()).route(query)
+        if routed:
+            tool_name, args = routed
+            yield {"event": "tool_start", "tool": tool_name, "args": args}
+            with STAGE_SECONDS.time(stage="tool"):
+                result = await self.runtime.tools_by_name[tool_name].ainvoke(args)
+            output = format_tool_result(tool_name, args, result)
+            if output:
+                record_routed(tool_name)
+                yield {"event": "tool_end", "tool": tool_name, "result": output.model_dump()}
+                self._answered(output, history)
+                yield {"event": "result", "result": output.model_dump()}
+                return
+
+        usage = UsageMetadataCallbackHandler()
+        config = {"callbacks": [usage]}
+        seen = len(history)
+
+        messages = None
+        # includes the time the client takes to read the events
+        agent_start = time.perf_counter()
+        async for event in self.runtime.agent.astream_events({"messages": history}, config=config, version="v2"):
+            kind = event["event"]
+            data = event["data"]
+
+            if kind == "on_chat_model_stream":
+                text = data["chunk"].content
+                if text and isinstance(text, str):
+                    yield {"event": "token", "text": text}
+
+            elif kind == "on_tool_start":
+                yield {"event": "tool_start", "tool": event["name"], "args": data.get("input")}
+
+            elif kind == "on_tool_end":
+                partial = format_tool_output(event["name"], data.get("input"), data.get("output"))
+                yield {
+                    "event": "tool_end",
+                    "tool": event["name"],
+                    "result": partial.model_dump() if partial else None,
+                }
+
+            elif kind == "on_chain_end" and not event["parent_ids"]:
+                messages = data["output"]["messages"]
+
+        STAGE_SECONDS.observe(time.perf_counter() - agent_start, stage="agent")
+
+        if not messages:
+            yield {"event": "error", "message": "Failed to process request"}
+            return
+
+        final_ai = self._final_answer({"messages": messages}, history)
+        structured_result = format_from_messages(messages)
+        if structured_result is None:
+            with STAGE_SECONDS.time(stage="formatter"):
+                structured_result = await self.runtime.parser_chain.ainvoke({
+                    "content": final_ai.content
+                }, config=config)
+        record_agent_run(usage, messages[seen:])
+
+        yield {"event": "result", "result": structured_result.model_dump()}
@@ -0,0 +1,147 @@
+import difflib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Filler that users put around entity names ("the auth service", "redis?")
+_FILLER = re.compile(r"^(?:the|a|an)\s+|[\s?.!'\"`]+$", re.IGNORECASE)
+
+_KINDS = {
+    "service": "service", "services": "service",
+    "database": "database", "databases": "database", "db": "database", "dbs": "database",
+    "cache": "cache", "caches": "cache",
+    "team": "team", "teams": "team",
+}
+
+_KIND = r"(?:(?P<kind>services?|databases?|dbs?|caches?)\s+)?"
+
+# (tool, pattern) in priority order; each pattern must match the whole question
+_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("path", re.compile(
+        r"^(?:what(?:'s| is)\s+the\s+|show(?:\s+me)?\s+the\s+)?(?:shortest\s+)?(?:path|route)\s+from\s+(?P<a>.+?)\s+to\s+(?P<b>.+)$")),
+    ("path", re.compile(
+        r"^how\s+does\s+(?P<a>.+?)\s+(?:reach|connect\s+to|get\s+to)\s+(?P<b>.+)$")),
+    ("blast_radius", re.compile(
+        r"^(?:what|which\s+\w+)\s+(?:breaks|break|fails|is\s+affected|are\s+affected)\s+if\s+(?P<a>.+?)\s+(?:goes\s+down|fails|dies|is\s+down|breaks|crashes)$")),
+    ("blast_radius", re.compile(
+        r"^(?:what(?:'s| is)\s+the\s+|show(?:\s+me)?\s+the\s+)?(?:blast\s+radius|impact)\s+(?:of|for)\s+(?P<a>.+)$")),
+    ("get_owner", re.compile(
+        r"^(?:who|which\s+team)\s+owns\s+(?P<a>.+)$")),
+    ("get_owner", re.compile(
+        r"^(?:who\s+is\s+|what\s+is\s+)?(?:the\s+)?owner\s+of\s+(?P<a>.+)$")),
+    ("get_owned_by_team", re.compile(
+        r"^what\s+" + _KIND + r"(?:does|do)\s+(?P<a>.+?)\s+own$")),
+    ("upstream", re.compile(
+        r"^(?:what|which|who)\s+" + _KIND + r"(?:depends|depend|relies|rely)\s+on\s+(?P<a>.+)$")),
+    ("upstream", re.compile(
+        r"^(?:what|which|who)\s+" + _KIND + r"(?:uses|use|calls|call)\s+(?P<a>.+)$")),
+    ("upstream", re.compile(
+        r"^(?:list\s+)?(?:the\s+)?(?:dependents|consumers|callers)\s+of\s+(?P<a>.+)$")),
+    ("downstream", re.compile(
+        r"^what\s+" + _KIND + r"(?:does|do)\s+(?P<a>.+?)\s+(?:depend\s+on|rely\s+on|use|call|need)$")),
+    ("downstream", re.compile(
+        r"^(?:list\s+)?(?:the\s+)?(?:dependencies|deps)\s+of\s+(?P<a>.+)$")),
+]
+
+# entities that must be a team / must not be a team, per tool
+_TEAM_ONLY = {"get_owned_by_team"}
+_NO_TEAMS = {"get_owner"}
+
+
+def _normalize(text: str) -> str:
+    text = text.strip().lower()
+    previous = None
+    while previous != text:
+        previous = text
+        text = _FILLER.sub("", text).strip()
+    return re.sub(r"[\s_]+", "-", text)
+
+
+class IntentRouter:
+    """
+    Recognizes the common question shapes ("who owns X", "what depends on X",
+    "what breaks if X goes down", "path from A to B", ...) and resolves X
+    against the known node ids, exactly or by fuzzy match. route() returns
+    the tool call to make, or None when it is not confident and the question
+    should go to the agent.
+    """
+
+    def __init__(self, node_ids: Iterable[str], cutoff: float = 0.8):
+        self.cutoff = cutoff
+        self.by_name: Dict[str, List[str]] = {}
+
+        for node_id in node_ids:
+            name = node_id.partition(":")[2]
+            for alias in {name.lower(), node_id.lower()}:
+                self.by_name.setdefault(alias, []).append(node_id)
+
+        # bare names, for prefix and fuzzy matching
+        self.names = [n for n in self.by_name if ":" not in n]
+
+    def resolve(self, mention: str, allow=lambda node_id: True) -> Optional[str]:
+        text = _normalize(mention)
+        if not text:
+            return None
+
+        candidates = [i for i in self.by_name.get(text, []) if allow(i)]
+
+        # "auth service" -> "auth-service"; "orders db" -> "orders-db"
+        if not candidates:
+            for suffix in ("-service", "-db", "-cache", "-team"):
+                candidates = [i for i in self.by_name.get(text + suffix, []) if allow(i)]
+                if candidates:
+                    break
+
+        names = self.names
+
+        # "redis" -> "redis-main", as long as only one name starts with it
+        if not candidates and len(text) >= 3:
+            prefixed = {
+                i for name in names if name.startswith(text)
+                for i in self.by_name[name] if allow(i)
+            }
+            if len(prefixed) == 1:
+                candidates = list(prefixed)
+
+        # typos: "paymnet-service", unless two names are about as close
+        if not candidates:
+            close = difflib.get_close_matches(text, names, n=2, cutoff=self.cutoff)
+            scores = [difflib.SequenceMatcher(None, text, c).ratio() for c in close]
+            if len(close) == 1 or (len(close) == 2 and scores[0] - scores[1] > 0.05):
+                candidates = [i for i in self.by_name[close[0]] if allow(i)]
+
+        unique = sorted(set(candidates))
+        return unique[0] if len(unique) == 1 else None
+
+    def route(self, query: str) -> Optional[Tuple[str, Dict]]:
+        text = query.strip().lower().rstrip("?.! ")
+
+        for tool_name, pattern in _PATTERNS:
+            m = pattern.match(text)
+            if not m:
+                continue
+
+            groups = m.groupdict()
+            if tool_name in _TEAM_ONLY:
+                allow = lambda i: i.startswith("team:")
+            elif tool_name in _NO_TEAMS:
+                allow = lambda i: not i.startswith("team:")
+            else:
+                allow = lambda i: True
+
+            a = self.resolve(groups["a"], allow)
+            if a is None:
+                return None
+
+            if tool_name == "path":
+                b = self.resolve(groups["b"], allow)
+                if b is None:
+                    return None
+                return tool_name, {"from_id": a, "to_id": b}
+
+            args = {"node_id": a}
+            kind = groups.get("kind")
+            if kind:
+                args["filters"] = _KINDS[kind]
+            return tool_name, args
+
+        return None
@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+
+DEFAULT_MAX_TOKENS = int(os.getenv("DOCKGRAPH_SESSION_TOKENS", 2000))
+DEFAULT_TTL = float(os.getenv("DOCKGRAPH_SESSION_TTL", 1800))  # idle seconds
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+# (previous summary or None, messages falling out of the window) -> new summary
+Summarizer = Callable[[Optional[str], List[BaseMessage]], str]
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    # ~4 characters per token plus a little per-message overhead; close
+    # enough to budget a window without loading a tokenizer
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    return len(content) // 4 + 4
+
+
+class Session:
+    """
+    One conversation: a sliding window of messages that fits in max_tokens,
+    preceded by a summary of everything that slid out (when a summarizer is
+    configured). `messages` is the list handed to the agent as history.
+    """
+
+    def __init__(self, session_id: str = None, messages: List[BaseMessage] = None,
+                 summary: str = None, updated_at: float = None, max_tokens: int = DEFAULT_MAX_TOKENS):
+        self.id = session_id or uuid.uuid4().hex
+        self.summary = summary
+        self.max_tokens = max_tokens
+        self.updated_at = updated_at or time.time()
+        self.messages: List[BaseMessage] = []
+        self.messages.extend(self._with_summary(messages or []))
+
+    def _with_summary(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        if not self.summary:
+            return messages
+        return [SystemMessage(content=SUMMARY_PREFIX + self.summary)] + messages
+
+    def turns(self) -> List[BaseMessage]:
+        """The conversation messages without the summary."""
+        return [m for m in self.messages if not isinstance(m, SystemMessage)]
+
+    def trim(self, summarizer: Optional[Summarizer] = None):
+        """Drop the oldest messages beyond the token budget, in place."""
+        body = self.turns()
+
+        kept, used = [], 0
+        for message in reversed(body):
+            cost = estimate_tokens(message)
+            if kept and used + cost > self.max_tokens:
+                break
+            kept.append(message)
+            used += cost
+        kept.reverse()
+
+        # never open the window halfway through an exchange
+        while len(kept) > 1 and not isinstance(kept[0], HumanMessage):
+            kept.pop(0)
+
+        dropped = body[:len(body) - len(kept)]
+        if dropped and summarizer:
+            self.summary = summarizer(self.summary, dropped)
+
+        self.messages[:] = self._with_summary(kept)
+        self.updated_at = time.time()
+
+
+class SessionStore(ABC):
+    def __init__(self, ttl: float = DEFAULT_TTL, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 summarizer: Optional[Summarizer] = None):
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+
+    def _expired(self, updated_at: float) -> bool:
+        return time.time() - updated_at > self.ttl
+
+    def load(self, session_id: Optional[str]) -> Session:
+        """The stored session, or a fresh one if it is unknown or has expired."""
+        session = self._get(session_id) if session_id else None
+        if session is None or self._expired(session.updated_at):
+            return Session(session_id, max_tokens=self.max_tokens)
+        return session
+
+    def save(self, session: Session):
+        session.trim(self.summarizer)
+        self._put(session)
+        self.expire()
+
+    @abstractmethod
+    def _get(self, session_id: str) -> Optional[Session]:
+        pass
+
+    @abstractmethod
+    def _put(self, session: Session):
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        pass
+
+    @abstractmethod
+    def expire(self) -> int:
+        """Remove idle sessions, returning how many were removed."""
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, session_id):
+        with self._lock:
+            stored = self.sessions.get(session_id)
+        if stored is None:
+            return None
+        # a copy, like the SQLite store: concurrent requests on one
+        # conversation must not append to the same list (the last save wins)
+        return Session(
+            session_id,
+            messages=stored.turns(),
+            summary=stored.summary,
+            updated_at=stored.updated_at,
+            max_tokens=stored.max_tokens,
+        )
+
+    def _put(self, session):
+        with self._lock:
+            self.sessions[session.id] = session
+
+    def delete(self, session_id):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def expire(self) -> int:
+        with self._lock:
+            idle = [sid for sid, s in self.sessions.items() if self._expired(s.updated_at)]
+            for sid in idle:
+                del self.sessions[sid]
+            return len(idle)
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path: str = "./data/sessions.db", **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    summary TEXT,
+                    messages TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)"
+            )
+
+    def _get(self, session_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT summary, messages, updated_at FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+
+        if not row:
+            return None
+
+        summary, messages, updated_at = row
+        return Session(
+            session_id,
+            messages=messages_from_dict(json.loads(messages)),
+            summary=summary,
+            updated_at=updated_at,
+            max_tokens=self.max_tokens,
+        )
+
+    def _put(self, session):
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO sessions (id, summary, messages, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    summary = excluded.summary,
+                    messages = excluded.messages,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    session.id,
+                    session.summary,
+                    json.dumps(messages_to_dict(session.turns())),
+                    session.updated_at,
+                ),
+            )
+
+    def delete(self, session_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def expire(self) -> int:
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?",
+                (time.time() - self.ttl,),
+            )
+            return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+def make_session_store(summarizer: Optional[Summarizer] = None) -> SessionStore:
+    # DOCKGRAPH_SESSION_STORE=memory (default) | sqlite
+    if os.getenv("DOCKGRAPH_SESSION_STORE", "memory").lower() == "sqlite":
+        path = os.getenv("DOCKGRAPH_SESSION_DB", "./data/sessions.db")
+        return SQLiteSessionStore(path, summarizer=summarizer)
+    return InMemorySessionStore(summarizer=summarizer)
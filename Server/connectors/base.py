@@ -1,7 +1,57 @@
-from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple
+from abc import ABC
+from typing import Dict, Iterator, List, Tuple
+
+# iter_records() yields (NODE, node) and (EDGE, edge)
+NODE = "node"
+EDGE = "edge"
+Record = Tuple[str, Dict]
+
 
 class Connector(ABC):
-    @abstractmethod
+    """
+    A source of graph nodes and edges. Implement parse(), iter_records(), or
+    both: each has a default in terms of the other. Connectors whose input
+    can outgrow memory implement iter_records() and produce records as they
+    read, so a streaming load never holds the whole inventory.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.parse is Connector.parse and cls.iter_records is Connector.iter_records:
+            raise TypeError(f"{cls.__name__} must implement parse() or iter_records()")
+
     def parse(self) -> Tuple[List[Dict], List[Dict]]:
-        pass
+        nodes, edges = [], []
+        for kind, record in self.iter_records():
+            (nodes if kind == NODE else edges).append(record)
+        return nodes, edges
+
+    def iter_records(self) -> Iterator[Record]:
+        nodes, edges = self.parse()
+        for node in nodes:
+            yield NODE, node
+        for edge in edges:
+            yield EDGE, edge
+
+    # input files, watched for changes by the ingestion daemon
+    def paths(self) -> List[str]:
+        return [self.path]
+
+    # directories searched for input files: the daemon watches them
+    # recursively and calls paths() again when files come and go
+    def roots(self) -> List[str]:
+        return []
+
+    # Independent pieces of parse() work, e.g. one per project of a directory
+    # connector. The parse runner parses each on its own (in parallel worker
+    # processes) and merge() combines their outputs, in units() order, into
+    # what parse() returns.
+    def units(self) -> List["Connector"]:
+        return [self]
+
+    def merge(self, parsed: List[Tuple["Connector", Tuple[List[Dict], List[Dict]]]]) -> Tuple[List[Dict], List[Dict]]:
+        nodes, edges = [], []
+        for _, (unit_nodes, unit_edges) in parsed:
+            nodes.extend(unit_nodes)
+            edges.extend(unit_edges)
+        return nodes, edges
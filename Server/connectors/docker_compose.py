@@ -1,34 +1,241 @@
-import yaml
+import glob
+import os
+import threading
 import re
-from .base import Connector
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .base import EDGE, NODE, Connector
+from .yaml_loader import content_hash, iter_collection, load_key, load_yaml, load_yaml_file
+
+# base files, in the order `docker compose` looks for them
+COMPOSE_FILES = ("compose.yaml", "compose.yml", "docker-compose.yaml", "docker-compose.yml")
+# override files, applied on top of the base in name order
+_OVERRIDE = re.compile(r"^(?:docker-)?compose\.[^/]+\.ya?ml$")
+
+# service keys whose lists are concatenated by an override instead of replaced
+_MERGED_SEQUENCES = {"ports", "expose", "volumes", "depends_on", "dns", "dns_search", "env_file", "extra_hosts", "networks", "secrets", "configs"}
+# service keys that may be written as a list of KEY=VALUE or as a mapping
+_KEY_VALUE = {"environment", "labels"}
+
+_HOST = r"[A-Za-z0-9][A-Za-z0-9_\-]*"
+# service names referenced from environment values (one value per line);
+# anything found is only kept if it names a service in the same project.
+# Every branch starts with a fixed character, so the scan skips ahead
+# instead of trying each position.
+ENV_REF = re.compile(
+    rf"""
+    # scheme://[user:password@]host, or a host:port list (mongodb, kafka);
+    # any scheme: http, redis, postgresql, mysql, amqp, mongodb, kafka, PLAINTEXT, ...
+    ://(?:[^@/\s]*@)?({_HOST}(?::\d+)?(?:,{_HOST}:\d+)*)
+    # user@service-name:5432 without a scheme
+    | @({_HOST}):\d+
+    # a value that is a bare host:port list, e.g. KAFKA_BROKERS=kafka-1:9092,kafka-2:9092
+    # (hosts start with a letter, so times like 12:30 are not taken for one)
+    | \n([A-Za-z][A-Za-z0-9_\-]*:\d+(?:,\s*{_HOST}:\d+)*)(?![\w@.\-])
+    """,
+    re.VERBOSE,
+)
+
+# The in-memory caches below spare a long-running process (the ingest daemon,
+# the API with DOCKGRAPH_WATCH) re-reading and re-merging unchanged projects;
+# parse workers start cold and rely on the on-disk YAML cache instead. Each
+# cache holds at least every file / project the last parse of each scanned
+# root discovered, so one pass over a large tree never evicts what the next
+# pass needs, and at least CACHE_ENTRIES; least recently used go first.
+CACHE_ENTRIES = int(os.getenv("DOCKGRAPH_COMPOSE_CACHE_ENTRIES", 1024))
+
+# path -> (mtime_ns, size, sha256, document); a changed mtime with the same
+# content is recognized by its hash and not parsed again
+_documents: "OrderedDict[str, Tuple[int, int, str, dict]]" = OrderedDict()
+# (namespaced, scan root, project directory) -> (((path, sha256), ...), (nodes, edges));
+# one entry per project, replaced when any of its files changes
+_results: "OrderedDict[Tuple, Tuple[Tuple, Tuple[List[Dict], List[Dict]]]]" = OrderedDict()
+# (namespaced, scan root) -> (files, projects) found by its last parse
+_discovered: Dict[Tuple, Tuple[int, int]] = {}
+_cache_lock = threading.Lock()
+
+
+def _capacity(cache: OrderedDict) -> int:
+    index = 0 if cache is _documents else 1
+    return max(CACHE_ENTRIES, sum(counts[index] for counts in _discovered.values()))
+
+
+def _trim(cache: OrderedDict):
+    capacity = _capacity(cache)
+    while len(cache) > capacity:
+        cache.popitem(last=False)
+
+
+def _cached(cache: OrderedDict, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _remember(cache: OrderedDict, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        _trim(cache)
+
+
+def _discover(key: Tuple, projects: Dict[str, List[str]]):
+    with _cache_lock:
+        _discovered[key] = (sum(len(files) for files in projects.values()), len(projects))
+        _trim(_documents)
+        _trim(_results)
+
+
+def _load(path: str) -> Tuple[str, dict]:
+    st = os.stat(path)
+    cached = _cached(_documents, path)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2], cached[3]
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = content_hash(raw)
+
+    if cached and cached[2] == digest:
+        doc = cached[3]
+    else:
+        doc = load_yaml(raw, digest) or {}
+
+    _remember(_documents, path, (st.st_mtime_ns, st.st_size, digest, doc))
+    return digest, doc
+
+
+def _key_values(value) -> Dict:
+    # ["A=1", "B"] -> {"A": "1", "B": None}
+    if isinstance(value, dict):
+        return dict(value)
+    pairs = {}
+    for item in value or []:
+        key, sep, val = str(item).partition("=")
+        pairs[key] = val if sep else None
+    return pairs
+
+
+def merge_service(base: Dict, override: Dict) -> Dict:
+    """Compose override semantics for one service definition."""
+    merged = dict(base)
+    for key, value in override.items():
+        current = merged.get(key)
+        if key in _KEY_VALUE:
+            merged[key] = {**_key_values(current), **_key_values(value)}
+        elif key in _MERGED_SEQUENCES and isinstance(current, list) and isinstance(value, list):
+            merged[key] = current + [v for v in value if v not in current]
+        elif isinstance(current, dict) and isinstance(value, dict):
+            merged[key] = {**current, **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_compose(documents: List[Dict]) -> Dict:
+    merged = {"services": {}}
+    for doc in documents:
+        for key, value in doc.items():
+            if key != "services":
+                merged[key] = value
+        for name, cfg in (doc.get("services") or {}).items():
+            merged["services"][name] = merge_service(merged["services"].get(name, {}), cfg or {})
+    return merged
+
+
+def _project_files(files: List[str]) -> List[str]:
+    # base file first (only the first one compose would pick), then overrides by name
+    names = {os.path.basename(f): f for f in files}
+    base = [names[n] for n in COMPOSE_FILES if n in names][:1]
+    overrides = sorted(f for n, f in names.items() if _OVERRIDE.match(n) and f not in base)
+    rest = sorted(f for f in files if f not in base and f not in overrides)
+    return base + overrides + rest
 
 
 class DockerComposeConnector(Connector):
-    def __init__(self, path="./data/docker-compose.yml"):
+    """
+    `path` is a compose file, a directory searched recursively for compose
+    projects, or a glob. Files in the same directory are one project: the
+    base file merged with its `docker-compose.*.yml` overrides.
+
+    When more than one project can be loaded (directories and globs), ids
+    are namespaced by project ("service:shop/api") so same-named services in
+    different repos stay apart; namespace=True/False forces either way. A
+    project is named by its compose `name:`, or else by its directory
+    relative to the scanned root ("a/deploy", "b/deploy"). Two projects
+    with the same name are an error rather than one merged project.
+    """
+
+    def __init__(self, path="./data/docker-compose.yml", namespace: Optional[bool] = None):
         self.path = path
+        self.namespace = namespace
 
-    # Extract service names referenced in env URLs
-    def _parse_env_refs(self, env_list):
-        refs = set()
+    def _namespaced(self) -> bool:
+        if self.namespace is not None:
+            return self.namespace
+        return not os.path.isfile(self.path)
 
-        for e in env_list or []:
-            if not isinstance(e, str):
-                continue
+    def _root(self) -> str:
+        """The directory project names are relative to."""
+        if os.path.isdir(self.path):
+            return os.path.abspath(self.path)
+        if os.path.isfile(self.path):
+            return os.path.dirname(os.path.abspath(self.path))
 
-            # http(s)://service-name
-            m = re.search(r"https?://([a-zA-Z0-9\-]+)", e)
-            if m:
-                refs.add(m.group(1))
+        # a glob: its leading part without wildcards
+        fixed = []
+        for part in os.path.normpath(self.path).split(os.sep):
+            if glob.has_magic(part):
+                break
+            fixed.append(part)
+        return os.path.abspath(os.sep.join(fixed) or ".")
 
-            # redis://service-name
-            m = re.search(r"redis://([a-zA-Z0-9\-]+)", e)
-            if m:
-                refs.add(m.group(1))
+    def projects(self) -> Dict[str, List[str]]:
+        """Project directory -> its compose files, base first."""
+        if os.path.isfile(self.path):
+            files = [self.path]
+        elif os.path.isdir(self.path):
+            files = []
+            for root, dirs, names in os.walk(self.path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "node_modules")
+                files.extend(
+                    os.path.join(root, n) for n in names
+                    if n in COMPOSE_FILES or _OVERRIDE.match(n)
+                )
+        else:
+            files = [f for f in glob.glob(self.path, recursive=True) if os.path.isfile(f)]
 
-            # postgres://user@service-name:5432/db
-            m = re.search(r"@([a-zA-Z0-9\-]+):\d+", e)
-            if m:
-                refs.add(m.group(1))
+        by_dir: Dict[str, List[str]] = {}
+        for f in files:
+            by_dir.setdefault(os.path.dirname(os.path.abspath(f)), []).append(f)
+        return {d: _project_files(fs) for d, fs in sorted(by_dir.items())}
+
+    def paths(self) -> List[str]:
+        return [f for files in self.projects().values() for f in files]
+
+    def roots(self) -> List[str]:
+        # a single file is a fixed input; directories and globs gain and lose projects
+        if os.path.isfile(self.path):
+            return []
+        return [self._root()]
+
+    # Extract service names referenced in env URLs, from either env form
+    def _parse_env_refs(self, env):
+        if isinstance(env, dict):
+            values = [str(v) for v in env.values() if v is not None]
+        else:
+            values = [e.partition("=")[2] for e in env or [] if isinstance(e, str)]
+
+        # one scan over all values instead of one search per pattern per line
+        refs = set()
+        for hosts, at, bare in ENV_REF.findall("\n" + "\n".join(values)):
+            if at:
+                refs.add(at)
+                continue
+            for host in (hosts or bare).split(","):
+                refs.add(host.strip().partition(":")[0])
 
         return refs
 
@@ -53,65 +260,206 @@ class DockerComposeConnector(Connector):
             return "uses"
         return "calls"
 
-    def parse(self):
-        with open(self.path, "r", encoding="utf-8") as f:
-            doc = yaml.safe_load(f)
+    def _project_name(self, root: str, directory: str, name) -> str:
+        if name:
+            return str(name).lower()
+        # compose's own default is the directory name; the path under the root
+        # keeps a/deploy and b/deploy apart
+        relative = os.path.relpath(directory, root)
+        if relative == ".":
+            relative = os.path.basename(directory)
+        return relative.replace(os.sep, "/").lower()
 
-        services = doc.get("services", {})
+    @staticmethod
+    def _claim(seen: Dict[str, str], project: str, directory: str):
+        if project in seen and seen[project] != directory:
+            raise ValueError(
+                f"compose projects {seen[project]} and {directory} are both named {project!r}; "
+                "rename one (compose `name:`) so their services are not merged"
+            )
+        seen[project] = directory
+
+    def parse(self):
+        namespaced = self._namespaced()
+        root = self._root()
+        seen: Dict[str, str] = {}
         nodes = []
         edges = []
 
-        # Build nodes first
-        node_index = {}
+        projects = self.projects()
+        _discover((namespaced, root), projects)
+        for directory, files in projects.items():
+            project, (project_nodes, project_edges) = self._parse_directory(namespaced, root, directory, files)
+            if namespaced:
+                self._claim(seen, project, directory)
+            nodes.extend(project_nodes)
+            edges.extend(project_edges)
 
-        for name, cfg in services.items():
-            ntype = self._infer_node_type(name, cfg)
+        return nodes, edges
 
-            properties = {}
+    def units(self) -> List[Connector]:
+        # one per project, so a tree of projects is parsed by every worker
+        projects = self.projects()
+        if len(projects) < 2:
+            return [self]
+        namespaced, root = self._namespaced(), self._root()
+        return [ComposeProject(self, namespaced, root, d, files) for d, files in projects.items()]
 
-            ports = cfg.get("ports", [])
-            if ports:
-                p = ports[0]
-                if isinstance(p, str) and ":" in p:
-                    try:
-                        properties["port"] = int(p.split(":")[0])
-                    except Exception:
-                        pass
+    def merge(self, parsed):
+        if len(parsed) == 1 and parsed[0][0] is self:
+            return parsed[0][1]
 
-            properties.update(cfg.get("labels", {}) or {})
+        # the same check parse() makes, from the project each unit's nodes carry
+        seen: Dict[str, str] = {}
+        for unit, (unit_nodes, _) in parsed:
+            if unit.namespaced:
+                for project in {n["properties"]["project"] for n in unit_nodes}:
+                    self._claim(seen, project, unit.directory)
+        return super().merge(parsed)
 
-            node = {
-                "id": f"{ntype}:{name}",
-                "type": ntype,
-                "name": name,
-                "properties": properties,
-            }
+    def _parse_directory(self, namespaced: bool, root: str, directory: str, files: List[str]):
+        """(project name, (nodes, edges)) of one project, from the caches when unchanged."""
+        loaded = [_load(f) for f in files]
+        key = (namespaced, root, directory)
+        digests = tuple((f, digest) for f, (digest, _) in zip(files, loaded))
 
-            nodes.append(node)
-            node_index[name] = node
+        cached = _cached(_results, key)
+        if cached is None or cached[0] != digests:
+            doc = merge_compose([d for _, d in loaded])
+            project = self._project_name(root, directory, doc.get("name"))
+            parsed = self._parse_project(doc, project if namespaced else None)
+            cached = (digests, (project, parsed))
+            _remember(_results, key, cached)
+
+        return cached[1]
+
+    def iter_records(self):
+        """
+        Same records as parse(), one project at a time and bypassing the
+        in-memory caches. A project that is a single file is read service by
+        service (one pass for nodes, one for edges), so only a name -> node
+        index is held; projects with overrides have to be merged first.
+        """
+        namespaced = self._namespaced()
+        root = self._root()
+        seen: Dict[str, str] = {}
+
+        for directory, files in self.projects().items():
+            if len(files) > 1:
+                doc = merge_compose([load_yaml_file(f) or {} for f in files])
+                project = self._project_name(root, directory, doc.get("name"))
+                if namespaced:
+                    self._claim(seen, project, directory)
+                nodes, edges = self._parse_project(doc, project if namespaced else None)
+                yield from ((NODE, n) for n in nodes)
+                yield from ((EDGE, e) for e in edges)
+                continue
+
+            path = files[0]
+            project = None
+            if namespaced:
+                project = self._project_name(root, directory, load_key(path, "name"))
+                self._claim(seen, project, directory)
+
+            node_index = {}
+            for name, cfg in iter_collection(path, "services"):
+                node = self._service_node(name, cfg or {}, project)
+                node_index[name] = (node["id"], node["type"])
+                yield NODE, node
+
+            for name, cfg in iter_collection(path, "services"):
+                for edge in self._service_edges(name, cfg or {}, node_index, project):
+                    yield EDGE, edge
+
+    def _parse_project(self, doc, project: Optional[str]):
+        services = doc.get("services", {})
+
+        # Build nodes first
+        nodes = [self._service_node(name, cfg, project) for name, cfg in services.items()]
+        node_index = {n["name"]: (n["id"], n["type"]) for n in nodes}
 
         # Build edges only from real runtime references
+        edges = []
         for name, cfg in services.items():
-            source_id = f"service:{name}"
+            edges.extend(self._service_edges(name, cfg, node_index, project))
 
-            env_refs = self._parse_env_refs(cfg.get("environment", []))
+        return nodes, edges
 
-            for ref in env_refs:
-                target_node = node_index.get(ref)
-                if not target_node:
-                    continue  # ignore unknown externals
+    # "shop/api-gateway" when namespaced, "api-gateway" otherwise
+    def _qualified(self, name, project: Optional[str]):
+        return f"{project}/{name}" if project else name
 
-                edge_type = self._infer_edge_type(target_node["type"])
+    def _service_node(self, name, cfg, project: Optional[str]):
+        cfg = {
+            **cfg,
+            "labels": _key_values(cfg.get("labels")),
+        }
+        ntype = self._infer_node_type(name, cfg)
 
-                edge = {
-                    "id": f"edge:{name}-{edge_type}-{ref}",
-                    "type": edge_type,
-                    "source": source_id,
-                    "target": target_node["id"],
-                    "properties": {},
-                }
+        properties = {}
 
-                edges.append(edge)
+        ports = cfg.get("ports", [])
+        if ports:
+            p = ports[0]
+            if isinstance(p, str) and ":" in p:
+                try:
+                    properties["port"] = int(p.split(":")[0])
+                except Exception:
+                    pass
 
-        return nodes, edges
+        properties.update(cfg.get("labels", {}) or {})
+        if project:
+            properties["project"] = project
+
+        return {
+            "id": f"{ntype}:{self._qualified(name, project)}",
+            "type": ntype,
+            "name": name,
+            "properties": properties,
+        }
+
+    # node_index: service name -> (node id, node type), for this project only
+    def _service_edges(self, name, cfg, node_index, project: Optional[str]):
+        source_id = f"service:{self._qualified(name, project)}"
+        edges = []
+
+        for ref in self._parse_env_refs(cfg.get("environment", [])):
+            target = node_index.get(ref)
+            if not target:
+                continue  # ignore unknown externals (references stay inside a project)
+
+            target_id, target_type = target
+            edge_type = self._infer_edge_type(target_type)
+
+            edges.append({
+                "id": f"edge:{self._qualified(name, project)}-{edge_type}-{ref}",
+                "type": edge_type,
+                "source": source_id,
+                "target": target_id,
+                "properties": {},
+            })
+
+        return edges
+
+
+class ComposeProject(Connector):
+    """
+    One project of a directory or glob DockerComposeConnector: the unit the
+    parse runner hands to a worker. Parsed the same way, with the same ids,
+    as by the whole connector.
+    """
+
+    def __init__(self, connector: DockerComposeConnector, namespaced: bool, root: str, directory: str, files: List[str]):
+        self.connector = connector
+        self.namespaced = namespaced
+        self.root = root
+        self.directory = directory
+        self.files = files
+        self.path = directory
+
+    def parse(self):
+        _, parsed = self.connector._parse_directory(self.namespaced, self.root, self.directory, self.files)
+        return parsed
 
+    def paths(self) -> List[str]:
+        return list(self.files)
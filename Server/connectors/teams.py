@@ -1,5 +1,5 @@
-import yaml
-from .base import Connector
+from .base import EDGE, NODE, Connector
+from .yaml_loader import iter_collection, load_yaml_file
 
 
 class TeamsConnector(Connector):
@@ -7,48 +7,53 @@ class TeamsConnector(Connector):
         self.path = path
 
     def parse(self):
-        with open(self.path, "r", encoding="utf-8") as f:
-            doc = yaml.safe_load(f)
+        doc = load_yaml_file(self.path)
 
-        teams = doc.get("teams", [])
         nodes = []
         edges = []
-
-        for t in teams:
-            name = t.get("name")
-            if not name:
-                continue  # skip invalid entries
-
-            safe_name = name.strip().lower().replace(" ", "-")
-
-            node = {
-                "id": f"team:{safe_name}",
-                "type": "team",
-                "name": name,  # human-readable
-                "properties": {
-                    "lead": t.get("lead"),
-                    "slack": t.get("slack_channel"),
-                    "pagerduty": t.get("pagerduty_schedule"),
-                },
-            }
-            nodes.append(node)
-
-            for owned in t.get("owns", []):
-                owned_lc = owned.lower()
-
-                if owned_lc.endswith("-db"):
-                    target = f"database:{owned}"
-                elif owned_lc.endswith("-cache") or "redis" in owned_lc:
-                    target = f"cache:{owned}"
-                else:
-                    target = f"service:{owned}"
-
-                edges.append({
-                    "id": f"edge:{safe_name}-owns-{owned}",
-                    "type": "owns",
-                    "source": f"team:{safe_name}",
-                    "target": target,
-                    "properties": {},
-                })
+        for t in doc.get("teams", []):
+            for kind, record in self._team_records(t):
+                (nodes if kind == NODE else edges).append(record)
 
         return nodes, edges
+
+    def iter_records(self):
+        # one team at a time, straight from the file
+        for t in iter_collection(self.path, "teams"):
+            yield from self._team_records(t)
+
+    def _team_records(self, t):
+        name = t.get("name")
+        if not name:
+            return  # skip invalid entries
+
+        safe_name = name.strip().lower().replace(" ", "-")
+
+        yield NODE, {
+            "id": f"team:{safe_name}",
+            "type": "team",
+            "name": name,  # human-readable
+            "properties": {
+                "lead": t.get("lead"),
+                "slack": t.get("slack_channel"),
+                "pagerduty": t.get("pagerduty_schedule"),
+            },
+        }
+
+        for owned in t.get("owns", []):
+            owned_lc = owned.lower()
+
+            if owned_lc.endswith("-db"):
+                target = f"database:{owned}"
+            elif owned_lc.endswith("-cache") or "redis" in owned_lc:
+                target = f"cache:{owned}"
+            else:
+                target = f"service:{owned}"
+
+            yield EDGE, {
+                "id": f"edge:{safe_name}-owns-{owned}",
+                "type": "owns",
+                "source": f"team:{safe_name}",
+                "target": target,
+                "properties": {},
+            }
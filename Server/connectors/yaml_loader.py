@@ -0,0 +1,289 @@
+import base64
+import datetime
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, Optional, Union
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import (
+    AliasEvent,
+    CollectionEndEvent,
+    CollectionStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    NodeEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+)
+from yaml.resolver import Resolver
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# libyaml's loader is several times faster than the pure-Python one and
+# builds the same documents; it is missing only where PyYAML was built
+# without libyaml
+try:
+    Loader = yaml.CSafeLoader
+except AttributeError:
+    Loader = yaml.SafeLoader
+
+# Streaming reads need the event-level API (compose one item, not the whole
+# document). libyaml's loader does not expose it, so its C event parser is
+# paired with PyYAML's own composer.
+try:
+    from yaml.cyaml import CParser
+
+    class _StreamLoader(CParser, Composer, SafeConstructor, Resolver):
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+except ImportError:
+    _StreamLoader = yaml.SafeLoader
+
+# parsed documents, stored as JSON under their content hash; "" disables the
+# cache. JSON keeps a cache entry data: reading one can never run code.
+CACHE_DIR = os.getenv("DOCKGRAPH_YAML_CACHE", "./data/.yaml_cache")
+# entries kept; beyond this the least recently used are pruned. Pruning runs
+# once per run (the first load in a process, then daily in the ingest
+# daemon), never per miss, so a run does not evict the entries it just wrote.
+# Keep it above the number of YAML files the connectors read.
+CACHE_ENTRIES = int(os.getenv("DOCKGRAPH_YAML_CACHE_ENTRIES", 10000))
+PRUNE_INTERVAL = 24 * 3600  # seconds
+
+# cache dir -> when this process last pruned it
+_pruned: Dict[str, float] = {}
+
+# bumped whenever the cached form changes, so old entries are never read
+_FORMAT = 2
+
+
+def content_hash(raw: Union[bytes, str]) -> str:
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def parse(raw: Union[bytes, str]) -> Any:
+    """YAML -> Python, with the fastest loader available; no caching."""
+    return yaml.load(raw, Loader=Loader)
+
+
+def _cache_path(cache_dir: str, digest: str) -> str:
+    # fan out over subdirectories so thousands of files don't share one
+    return os.path.join(cache_dir, digest[:2], f"{digest}.v{_FORMAT}.json")
+
+
+# What safe_load builds beyond JSON's types is tagged as {"__yaml__": tag, "value": ...}:
+# dates and timestamps, !!binary, !!set, the tuples of !!omap / !!pairs, and
+# mappings whose keys are not all strings (or that contain "__yaml__" themselves).
+_TAG = "__yaml__"
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and _TAG not in value:
+            return {k: _encode(v) for k, v in value.items()}
+        return {_TAG: "map", "value": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, tuple):
+        return {_TAG: "tuple", "value": [_encode(v) for v in value]}
+    if isinstance(value, set):
+        return {_TAG: "set", "value": [_encode(v) for v in value]}
+    if isinstance(value, datetime.datetime):
+        return {_TAG: "datetime", "value": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {_TAG: "date", "value": value.isoformat()}
+    if isinstance(value, bytes):
+        return {_TAG: "binary", "value": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode(obj: dict) -> Any:
+    # json object_hook: inner values are already decoded
+    tag = obj.get(_TAG)
+    if tag is None:
+        return obj
+    value = obj["value"]
+    if tag == "map":
+        return {_hashable(k): v for k, v in value}
+    if tag == "tuple":
+        return tuple(value)
+    if tag == "set":
+        return {_hashable(v) for v in value}
+    if tag == "datetime":
+        return datetime.datetime.fromisoformat(value)
+    if tag == "date":
+        return datetime.date.fromisoformat(value)
+    if tag == "binary":
+        return base64.b64decode(value)
+    raise ValueError(f"unknown tag {tag!r}")
+
+
+def _hashable(value: Any) -> Any:
+    # a !!seq key is constructed as a tuple by safe_load
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _prune(cache_dir: str, keep: int):
+    """Delete all but the `keep` most recently used entries (and any of an older format)."""
+    entries = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".tmp"):
+                continue  # another process is writing it
+            if not name.endswith(f".v{_FORMAT}.json"):
+                entries.append((-1.0, path))
+                continue
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                pass
+
+    entries.sort(reverse=True)
+    current = [e for e in entries if e[0] >= 0]
+    stale = [e for e in entries if e[0] < 0] + current[keep:]
+    for _, path in stale:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def prune_cache(cache_dir: Optional[str] = None, force: bool = False):
+    """Prune the cache if this process has not done so in the last PRUNE_INTERVAL."""
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir:
+        return
+    now = time.time()
+    if not force and now - _pruned.get(cache_dir, -PRUNE_INTERVAL) < PRUNE_INTERVAL:
+        return
+    _pruned[cache_dir] = now
+    _prune(cache_dir, CACHE_ENTRIES)
+
+
+def load_yaml(raw: Union[bytes, str], digest: str = None, cache_dir: Optional[str] = None) -> Any:
+    """
+    Parse a YAML document, or read it back from the on-disk cache if a
+    document with the same content has been parsed before.
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir:
+        return parse(raw)
+
+    prune_cache(cache_dir)
+    path = _cache_path(cache_dir, digest or content_hash(raw))
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f, object_hook=_decode)
+        # reads count as use: pruning drops the least recently used
+        os.utime(path)
+        return doc
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        # truncated or unreadable entry: parse again and overwrite it
+        print(f"ignoring YAML cache entry {path}: {e}")
+
+    doc = parse(raw)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_encode(doc), f)
+        os.replace(tmp, path)
+    except OSError as e:
+        # a read-only checkout still parses, just without the cache
+        print(f"cannot write YAML cache entry {path}: {e}")
+
+    return doc
+
+
+def load_yaml_file(path: str, cache_dir: Optional[str] = None) -> Any:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return load_yaml(raw, cache_dir=cache_dir)
+
+
+# ---------------- Streaming ----------------
+
+def _skip_value(loader):
+    # consume one value's events without building it. Anchored nodes are
+    # composed all the same, so that aliases further down the file resolve
+    # (the compose `x-common: &common` ... `<<: *common` idiom).
+    depth = 0
+    while True:
+        event = loader.peek_event()
+        if isinstance(event, NodeEvent) and not isinstance(event, AliasEvent) and event.anchor is not None:
+            loader.compose_node(None, None)
+        else:
+            loader.get_event()
+            if isinstance(event, CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, CollectionEndEvent):
+                depth -= 1
+        if depth == 0:
+            return
+
+
+def _seek(loader, key: str) -> bool:
+    """Position the loader on the value of a top-level key."""
+    loader.get_event()  # stream start
+    if not loader.check_event(yaml.DocumentStartEvent):
+        return False
+    loader.get_event()
+    if not loader.check_event(MappingStartEvent):
+        return False
+    loader.get_event()
+
+    while not loader.check_event(MappingEndEvent):
+        name = loader.construct_document(loader.compose_node(None, None))
+        if name == key:
+            return True
+        _skip_value(loader)
+    return False
+
+
+def load_key(path: str, key: str) -> Any:
+    """The value of one top-level key, skipping over the rest of the file."""
+    with open(path, "rb") as f:
+        loader = _StreamLoader(f)
+        try:
+            if _seek(loader, key):
+                return loader.construct_document(loader.compose_node(None, None))
+            return None
+        finally:
+            loader.dispose()
+
+
+def iter_collection(path: str, key: str) -> Iterator[Any]:
+    """
+    The items of a top-level sequence, or (name, value) pairs of a top-level
+    mapping, built one at a time while the file is read, so memory stays
+    bounded by the largest item rather than the file.
+    """
+    with open(path, "rb") as f:
+        loader = _StreamLoader(f)
+        try:
+            if not _seek(loader, key):
+                return
+
+            if loader.check_event(SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(SequenceEndEvent):
+                    yield loader.construct_document(loader.compose_node(None, None))
+            elif loader.check_event(MappingStartEvent):
+                loader.get_event()
+                while not loader.check_event(MappingEndEvent):
+                    name = loader.construct_document(loader.compose_node(None, None))
+                    yield name, loader.construct_document(loader.compose_node(None, None))
+        finally:
+            loader.dispose()
@@ -0,0 +1,127 @@
+import time
+from typing import List, Dict, Optional
+from graph.driver import AsyncNeo4jPool
+from graph.schema import async_ensure_schema
+from graph.metrics import timed_query
+from graph.profile import QueryProfiler, get_profiler
+from graph.query import (
+    CHECK_NODE_EXISTENCE,
+    GET_NODE,
+    GET_OWNER,
+    PATH,
+    get_nodes_query,
+    owned_by_team_query,
+    downstream_query,
+    upstream_query,
+    to_node,
+    blast_radius_query,
+    to_blast_radius,
+    BLAST_RADIUS_MAX_DEPTH,
+    BLAST_RADIUS_LIMIT,
+)
+
+
+class AsyncQueryEngine:
+    """
+    QueryEngine on the Neo4j async driver: same methods and return shapes,
+    but every call is awaited so a single event loop can keep many graph
+    queries in flight. Call `await engine.connect()` before first use.
+    """
+
+    def __init__(self, pool: Optional[AsyncNeo4jPool] = None, profiler: Optional[QueryProfiler] = None):
+        self._owns_pool = pool is None
+        self.driver = pool or AsyncNeo4jPool()
+        self.profiler = profiler or get_profiler()
+        self.schema = None
+
+    async def connect(self):
+        async with self.driver.session(database="neo4j") as session:
+            await (await session.run("RETURN 1")).consume()
+        self.schema = await async_ensure_schema(self.driver)
+        return self
+
+    async def close(self):
+        if self._owns_pool:
+            await self.driver.close()
+
+    # same profiling as QueryEngine._records
+    async def _records(self, method: str, query: str, params: Dict) -> List:
+        if not self.profiler.enabled:
+            async with self.driver.session() as session:
+                result = await session.run(query, params)
+                return [record async for record in result]
+
+        profile = self.profiler.sample()
+        start = time.perf_counter()
+        async with self.driver.session() as session:
+            result = await session.run(f"PROFILE {query}" if profile else query, params)
+            records = [record async for record in result]
+            plan = (await result.consume()).profile if profile else None
+        self.profiler.observe(method, query, params, time.perf_counter() - start, len(records), plan)
+        return records
+
+    async def _single(self, method: str, query: str, params: Dict):
+        records = await self._records(method, query, params)
+        return records[0] if records else None
+
+    # ---------------- Basic Queries ----------------
+
+    @timed_query
+    async def check_node_existence(self, node_id: str) -> bool:
+        result = await self._single("check_node_existence", CHECK_NODE_EXISTENCE, {"id": node_id})
+        return result["nodeExists"] if result else False
+
+    @timed_query
+    async def get_node(self, node_id: str) -> Optional[Dict]:
+        result = await self._single("get_node", GET_NODE, {"id": node_id})
+        if not result:
+            return None
+        return to_node(result["props"], result["type"])
+
+    @timed_query
+    async def get_nodes(self, type: str = "", filters: Dict = None) -> List[Dict]:
+        filters = filters or {}
+        records = await self._records("get_nodes", get_nodes_query(type, filters), filters)
+        return [to_node(record["props"], type) for record in records]
+
+    # ---------------- Ownership ----------------
+
+    @timed_query
+    async def get_owner(self, node_id: str) -> Optional[Dict]:
+        result = await self._single("get_owner", GET_OWNER, {"id": node_id})
+        if not result:
+            return None
+        return to_node(result["props"], "team")
+
+    @timed_query
+    async def get_owned_by_team(self, node_id: str, filters: str = None) -> Optional[Dict]:
+        records = await self._records("get_owned_by_team", owned_by_team_query(filters), {"id": node_id})
+        return [to_node(record["props"], "team") for record in records]
+
+    # ---------------- Traversals ----------------
+
+    @timed_query
+    async def downstream(self, node_id: str, filters: str = None) -> List[Dict]:
+        records = await self._records("downstream", downstream_query(filters), {"id": node_id})
+        return [to_node(record["props"], record["type"]) for record in records]
+
+    @timed_query
+    async def upstream(self, node_id: str, filters: str = None) -> List[Dict]:
+        records = await self._records("upstream", upstream_query(filters), {"id": node_id})
+        return [to_node(record["props"], record["type"]) for record in records]
+
+    # ---------------- Paths ----------------
+
+    @timed_query
+    async def path(self, from_id: str, to_id: str) -> List[str]:
+        result = await self._single("path", PATH, {"startId": from_id, "endId": to_id})
+        if not result:
+            return []
+        return result["path"]
+
+    # ---------------- Impact Analysis ----------------
+
+    @timed_query
+    async def blast_radius(self, node_id: str, filters: str = None, depth: int = BLAST_RADIUS_MAX_DEPTH, limit: int = BLAST_RADIUS_LIMIT) -> Dict:
+        record = await self._single("blast_radius", blast_radius_query(filters, depth), {"id": node_id, "limit": limit})
+        return to_blast_radius(node_id, record)
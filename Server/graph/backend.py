@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+# The operations the rest of the app needs from wherever the graph lives.
+# Neo4j: GraphStorage / QueryEngine. Embedded: LocalStorage / LocalQueryEngine
+# (graph/local.py). Pick one with DOCKGRAPH_BACKEND (see graph/engine.py).
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class StorageBackend(ABC):
+    """Writes: bulk upserts and deletes, and whole loads as one transaction."""
+
+    @abstractmethod
+    def upsert_nodes(self, nodes: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE, replace: bool = False) -> int:
+        pass
+
+    @abstractmethod
+    def upsert_edges(self, edges: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        pass
+
+    @abstractmethod
+    def delete_nodes(self, node_ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        pass
+
+    @abstractmethod
+    def delete_edges(self, edges: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        pass
+
+    @abstractmethod
+    def ingest(
+        self,
+        nodes: Iterable[Dict] = (),
+        edges: Iterable[Dict] = (),
+        delete_node_ids: Iterable[str] = (),
+        delete_edges: Iterable[Dict] = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        replace: bool = True,
+    ) -> Dict:
+        """
+        Removals, then nodes, then edges, all or nothing. Returns counts,
+        node_seconds / edge_seconds, and the edges that could not be attached
+        ("dangling_edges": [{id, type, source, target, missing: [ids]}]).
+        """
+        pass
+
+    @abstractmethod
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def get_nodes_by_type(self, node_type: str) -> List[Dict]:
+        pass
+
+    def upsert_node(self, node: Dict):
+        self.upsert_nodes([node])
+
+    def upsert_edge(self, edge: Dict):
+        self.upsert_edges([edge])
+
+    def delete_node(self, node_id: str):
+        self.delete_nodes([node_id])
+
+    def close(self):
+        pass
+
+
+class QueryBackend(ABC):
+    """Reads: the queries behind the agent's tools (see create_tools)."""
+
+    @abstractmethod
+    def check_node_existence(self, node_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def get_nodes(self, type: str = "", filters: Dict = None) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def get_owner(self, node_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def get_owned_by_team(self, node_id: str, filters: str = None) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def downstream(self, node_id: str, filters: str = None) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def upstream(self, node_id: str, filters: str = None) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def path(self, from_id: str, to_id: str) -> List[str]:
+        pass
+
+    # defaults are graph.query's BLAST_RADIUS_MAX_DEPTH / BLAST_RADIUS_LIMIT
+    @abstractmethod
+    def blast_radius(self, node_id: str, filters: str = None, depth: int = 10, limit: int = 500) -> Dict:
+        pass
+
+    def close(self):
+        pass
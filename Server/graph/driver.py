@@ -0,0 +1,191 @@
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MAX_POOL_SIZE = 50
+DEFAULT_ACQUISITION_TIMEOUT = 30.0  # seconds to wait for a free connection
+DEFAULT_LIVENESS_CHECK_TIMEOUT = 60.0  # idle connections older than this are pinged before reuse
+
+
+def pool_settings() -> Dict:
+    return {
+        "max_connection_pool_size": int(
+            os.getenv("NEO4J_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE)
+        ),
+        "connection_acquisition_timeout": float(
+            os.getenv("NEO4J_ACQUISITION_TIMEOUT", DEFAULT_ACQUISITION_TIMEOUT)
+        ),
+        "liveness_check_timeout": float(
+            os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT", DEFAULT_LIVENESS_CHECK_TIMEOUT)
+        ),
+    }
+
+
+def _connection_counts(driver) -> Dict:
+    # the driver keeps no public pool stats, so peek at its pool (best effort)
+    pool = getattr(driver, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {"in_use": None, "idle": None}
+
+    in_use = idle = 0
+    for per_address in list(connections.values()):
+        for connection in list(per_address):
+            if connection.in_use:
+                in_use += 1
+            else:
+                idle += 1
+    return {"in_use": in_use, "idle": idle}
+
+
+class Neo4jPool:
+    """
+    One Neo4j driver (and therefore one connection pool) shared by everything
+    in the process. Exposes the same session() call as a driver, so it can be
+    handed to QueryEngine / GraphStorage in place of one.
+    """
+
+    def __init__(self, uri: str = None, user: str = None, password: str = None, **settings):
+        uri = uri or os.getenv("NEO4J_URI")
+        user = user or os.getenv("NEO4J_USERNAME", "neo4j")
+        password = password or os.getenv("NEO4J_PASSWORD")
+
+        if not uri:
+            raise RuntimeError("NEO4J_URI is not set")
+
+        self.settings = {**pool_settings(), **settings}
+        self.driver = GraphDatabase.driver(uri, auth=(user, password), **self.settings)
+
+        self._lock = threading.Lock()
+        self._sessions_open = 0
+        self._sessions_total = 0
+
+    @contextmanager
+    def session(self, **kwargs):
+        with self._lock:
+            self._sessions_open += 1
+            self._sessions_total += 1
+
+        try:
+            with self.driver.session(**kwargs) as session:
+                yield session
+        finally:
+            with self._lock:
+                self._sessions_open -= 1
+
+    def verify_connectivity(self):
+        self.driver.verify_connectivity()
+
+    def is_alive(self) -> bool:
+        try:
+            self.driver.verify_connectivity()
+            return True
+        except Exception:
+            return False
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                **_connection_counts(self.driver),
+                "max_size": self.settings["max_connection_pool_size"],
+                "sessions_open": self._sessions_open,
+                "sessions_total": self._sessions_total,
+            }
+
+    def close(self):
+        self.driver.close()
+
+
+class AsyncNeo4jPool:
+    """
+    asyncio counterpart of Neo4jPool built on AsyncGraphDatabase, for use
+    by AsyncQueryEngine inside the event loop (no locking needed).
+    """
+
+    def __init__(self, uri: str = None, user: str = None, password: str = None, **settings):
+        uri = uri or os.getenv("NEO4J_URI")
+        user = user or os.getenv("NEO4J_USERNAME", "neo4j")
+        password = password or os.getenv("NEO4J_PASSWORD")
+
+        if not uri:
+            raise RuntimeError("NEO4J_URI is not set")
+
+        self.settings = {**pool_settings(), **settings}
+        self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password), **self.settings)
+
+        self._sessions_open = 0
+        self._sessions_total = 0
+
+    @asynccontextmanager
+    async def session(self, **kwargs):
+        self._sessions_open += 1
+        self._sessions_total += 1
+
+        try:
+            async with self.driver.session(**kwargs) as session:
+                yield session
+        finally:
+            self._sessions_open -= 1
+
+    async def verify_connectivity(self):
+        await self.driver.verify_connectivity()
+
+    async def is_alive(self) -> bool:
+        try:
+            await self.driver.verify_connectivity()
+            return True
+        except Exception:
+            return False
+
+    def metrics(self) -> Dict:
+        return {
+            **_connection_counts(self.driver),
+            "max_size": self.settings["max_connection_pool_size"],
+            "sessions_open": self._sessions_open,
+            "sessions_total": self._sessions_total,
+        }
+
+    async def close(self):
+        await self.driver.close()
+
+
+_pool: Optional[Neo4jPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Neo4jPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = Neo4jPool()
+        return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+_async_pool: Optional[AsyncNeo4jPool] = None
+
+
+def get_async_pool() -> AsyncNeo4jPool:
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncNeo4jPool()
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
@@ -0,0 +1,43 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# where the graph lives: "neo4j" (default), or "local" for the embedded
+# store in graph/local.py (in memory, persisted to DOCKGRAPH_LOCAL_DB if set)
+BACKEND = os.getenv("DOCKGRAPH_BACKEND", "neo4j").lower()
+
+# what answers queries: the backend itself by default, or "snapshot" for an
+# in-process copy of the connector output (see graph/snapshot.py)
+QUERY_ENGINE = os.getenv("DOCKGRAPH_QUERY_ENGINE", BACKEND).lower()
+
+
+def make_storage(pool=None):
+    if BACKEND == "local":
+        from graph.local import LocalStorage, get_local_graph
+        return LocalStorage(get_local_graph())
+
+    from graph.storage import GraphStorage
+    return GraphStorage(pool)
+
+
+def make_query_engine(pool=None):
+    if QUERY_ENGINE == "snapshot":
+        from graph.snapshot import SnapshotQueryEngine
+        return SnapshotQueryEngine.from_connectors()
+
+    if QUERY_ENGINE == "local":
+        from graph.local import LocalQueryEngine, get_local_graph
+        return LocalQueryEngine(get_local_graph())
+
+    from graph.query import QueryEngine
+    return QueryEngine(pool)
+
+
+async def make_async_query_engine(pool=None):
+    # the in-process engines answer in microseconds, so they are used as-is
+    if QUERY_ENGINE in ("snapshot", "local"):
+        return make_query_engine()
+
+    from graph.async_query import AsyncQueryEngine
+    return await AsyncQueryEngine(pool).connect()
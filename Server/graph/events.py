@@ -0,0 +1,28 @@
+from typing import Callable, Dict, List
+
+# Callbacks run after load_graph() (or any other writer) has replaced the
+# graph, with the full node and edge lists that were just written. Used to
+# refresh in-memory snapshots and drop cached query results.
+ReloadListener = Callable[[List[Dict], List[Dict]], None]
+
+_listeners: List[ReloadListener] = []
+
+
+def on_reload(callback: ReloadListener) -> ReloadListener:
+    if callback not in _listeners:
+        _listeners.append(callback)
+    return callback
+
+
+def remove_listener(callback: ReloadListener):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def notify_reload(nodes: List[Dict], edges: List[Dict]):
+    for callback in list(_listeners):
+        callback(nodes, edges)
+
+
+def has_listeners() -> bool:
+    return bool(_listeners)
@@ -1,29 +1,88 @@
-from graph.storage import GraphStorage
+import argparse
+import os
 from connectors.docker_compose import DockerComposeConnector
 from connectors.teams import TeamsConnector
+from graph.runner import ConnectorRunner
+from graph.engine import make_storage
+from graph.stream import stream_load
+from graph.sync import GraphSync
 
 
-def load_graph():
-    storage = GraphStorage()
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else float("inf")
 
-    connectors = [
-        DockerComposeConnector(path="./data/docker-compose.yml"),
-        TeamsConnector(path="./data/teams.yaml"),
+
+def default_connectors():
+    # the compose path may also be a directory of projects or a glob
+    return [
+        DockerComposeConnector(path=os.getenv("DOCKGRAPH_COMPOSE_PATH", "./data/docker-compose.yml")),
+        TeamsConnector(path=os.getenv("DOCKGRAPH_TEAMS_PATH", "./data/teams.yaml")),
     ]
 
-    for connector in connectors:
-        nodes, edges = connector.parse()
 
-        # Store nodes first
-        for node in nodes:
-            storage.upsert_node(node)
+def load_graph(batch_size: int = 1000, incremental: bool = False, workers: int = None, stream: bool = False,
+               connectors=None):
+    """
+    Load every connector into the graph, parsing them in parallel. Nodes and
+    edges that disappeared from a source since the last load are deleted.
+    The whole load is one transaction: every node is written before any
+    edge, and readers see the previous graph until it commits. Edges whose
+    endpoint no connector produced are reported in stats["dangling_edges"].
+    With incremental=True, only what changed since the last load is written.
+    With stream=True, connectors are read record by record in constant memory
+    (see graph.stream); nothing is deleted and the load is not atomic.
+    """
+    connectors = default_connectors() if connectors is None else connectors
+
+    if stream:
+        storage = make_storage()
+        try:
+            stats = stream_load(connectors, storage, batch_size=batch_size)
+        finally:
+            storage.close()
+        stats.update(nodes_deleted=0, edges_deleted=0)
+        return _report(stats)
+
+    runner = ConnectorRunner(connectors, workers=workers)
+    sync = GraphSync(batch_size=batch_size)
+
+    stats = sync.sync(runner.parse_all(), full=not incremental)
+    stats["connectors"] = runner.timings
+    return _report(stats)
 
-        # Then store edges
-        for edge in edges:
-            storage.upsert_edge(edge)
 
-    storage.close()
+def _report(stats):
+    stats["nodes_per_sec"] = _rate(stats["nodes_upserted"], stats["node_seconds"])
+    stats["edges_per_sec"] = _rate(stats["edges_upserted"], stats["edge_seconds"])
+
+    for source, timing in stats["connectors"].items():
+        print(
+            f"  {source}: {timing['nodes']} nodes, {timing['edges']} edges, "
+            f"parsed in {timing['parse_seconds']:.3f}s"
+            + (f", written in {timing['write_seconds']:.3f}s" if "write_seconds" in timing else "")
+        )
+    print(
+        f"upserted {stats['nodes_upserted']} nodes ({stats['nodes_per_sec']:.0f}/s), "
+        f"{stats['edges_upserted']} edges ({stats['edges_per_sec']:.0f}/s); "
+        f"deleted {stats['nodes_deleted']} nodes, {stats['edges_deleted']} edges"
+    )
+
+    dangling = stats.get("dangling_edges", [])
+    if dangling:
+        print(f"{len(dangling)} edges not written, their endpoints are in no connector:")
+        for edge in dangling[:20]:
+            print(f"  {edge['id']} ({edge['type']}): missing {', '.join(edge['missing'])}")
+        if len(dangling) > 20:
+            print(f"  ... and {len(dangling) - 20} more")
+    return stats
 
 
 if __name__ == "__main__":
-    load_graph()
+    parser = argparse.ArgumentParser(description="Load connector output into the graph")
+    parser.add_argument("--incremental", action="store_true", help="write only what changed since the last load")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--stream", action="store_true", help="read connectors record by record in constant memory")
+    parser.add_argument("--workers", type=int, default=None, help="parse processes (default: DOCKGRAPH_PARSE_WORKERS or CPU count)")
+    args = parser.parse_args()
+
+    load_graph(batch_size=args.batch_size, incremental=args.incremental, workers=args.workers, stream=args.stream)
@@ -0,0 +1,381 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from graph.backend import DEFAULT_BATCH_SIZE, StorageBackend
+from graph.snapshot import GraphSnapshot, SnapshotQueryEngine
+
+load_dotenv()
+
+# SQLite file the embedded graph is persisted to; "" keeps it in memory only
+LOCAL_DB = os.getenv("DOCKGRAPH_LOCAL_DB", "")
+
+# (source, TYPE, id, target): the graph's identity of a relationship, as in
+# MERGE (a)-[:TYPE {id: ...}]->(b)
+EdgeKey = Tuple[str, str, str, str]
+
+
+def _edge_key(edge: Dict) -> EdgeKey:
+    return edge["source"], edge["type"].upper(), edge["id"], edge["target"]
+
+
+def _props(node: Dict) -> Dict:
+    props = dict(node.get("properties", {}))
+    props["id"] = node["id"]
+    props["name"] = node.get("name")
+    return props
+
+
+def _stored(props: Dict) -> Dict:
+    # like Neo4j, a null property is no property
+    return {k: v for k, v in props.items() if v is not None}
+
+
+class _Transaction:
+    """
+    Changes to a LocalGraph, applied in place as they are made. The first
+    time a node or edge is touched its previous state is kept, which is both
+    the undo log for rollback() and the set of rows to persist on commit.
+    """
+
+    def __init__(self, graph: "LocalGraph"):
+        self.graph = graph
+        self.nodes_before: Dict[str, Optional[Tuple[str, Dict]]] = {}
+        self.edges_before: Dict[EdgeKey, bool] = {}
+
+    def set_node(self, node_id: str, node_type: str, props: Dict):
+        nodes = self.graph.nodes
+        self.nodes_before.setdefault(node_id, nodes.get(node_id))
+        nodes[node_id] = (node_type, props)
+
+    def delete_node(self, node_id: str):
+        nodes = self.graph.nodes
+        if node_id not in nodes:
+            return
+        # DETACH DELETE
+        for key in list(self.graph.touching.get(node_id, ())):
+            self.remove_edge(key)
+        self.nodes_before.setdefault(node_id, nodes[node_id])
+        del nodes[node_id]
+
+    def add_edge(self, key: EdgeKey) -> List[str]:
+        """Attach the edge; returns its missing endpoints (and writes nothing) if any."""
+        g = self.graph
+        source, _, _, target = key
+        missing = [i for i in (source, target) if i not in g.nodes]
+        if not missing and key not in g.edges:
+            self.edges_before.setdefault(key, False)
+            g._link(key)
+        return missing
+
+    def remove_edge(self, key: EdgeKey):
+        g = self.graph
+        if key in g.edges:
+            self.edges_before.setdefault(key, True)
+            g._unlink(key)
+
+    def rollback(self):
+        g = self.graph
+        for key, existed in self.edges_before.items():
+            if existed and key not in g.edges:
+                g._link(key)
+            elif not existed and key in g.edges:
+                g._unlink(key)
+        for node_id, before in self.nodes_before.items():
+            if before is None:
+                g.nodes.pop(node_id, None)
+            else:
+                g.nodes[node_id] = before
+
+
+class LocalGraph:
+    """
+    Embedded stand-in for the Neo4j database: the graph lives in process
+    memory and, when `path` is set, is persisted to a SQLite file and read
+    back from it on start. Writes go through transaction(), which commits
+    to SQLite and memory together or to neither.
+
+    Readers get an immutable GraphSnapshot of the last committed version;
+    it is rebuilt on first read after a commit, and a read that arrives
+    while a write is in progress is served the previous snapshot.
+    """
+
+    def __init__(self, path: str = LOCAL_DB):
+        self.path = path
+        self.nodes: Dict[str, Tuple[str, Dict]] = {}
+        self.edges: Set[EdgeKey] = set()
+        # node id -> keys of the edges attached to it
+        self.touching: Dict[str, Set[EdgeKey]] = defaultdict(set)
+        self.version = 0
+        self._snapshot: Tuple[int, Optional[GraphSnapshot]] = (-1, None)
+        self._lock = threading.RLock()
+        self.conn = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            with self.conn:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS nodes (id TEXT PRIMARY KEY, type TEXT NOT NULL, props TEXT NOT NULL)"
+                )
+                self.conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS edges (
+                        source TEXT NOT NULL,
+                        type TEXT NOT NULL,
+                        id TEXT NOT NULL,
+                        target TEXT NOT NULL,
+                        PRIMARY KEY (source, type, id, target)
+                    )
+                    """
+                )
+            self._read()
+
+    def _read(self):
+        for node_id, node_type, props in self.conn.execute("SELECT id, type, props FROM nodes"):
+            self.nodes[node_id] = (node_type, json.loads(props))
+        for key in self.conn.execute("SELECT source, type, id, target FROM edges"):
+            self._link(tuple(key))
+
+    def _link(self, key: EdgeKey):
+        self.edges.add(key)
+        self.touching[key[0]].add(key)
+        self.touching[key[3]].add(key)
+
+    def _unlink(self, key: EdgeKey):
+        self.edges.discard(key)
+        for node_id in (key[0], key[3]):
+            attached = self.touching.get(node_id)
+            if attached is not None:
+                attached.discard(key)
+                if not attached:
+                    del self.touching[node_id]
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            tx = _Transaction(self)
+            try:
+                yield tx
+                self._persist(tx)
+            except BaseException:
+                tx.rollback()
+                raise
+            if tx.nodes_before or tx.edges_before:
+                self.version += 1
+
+    def _persist(self, tx: _Transaction):
+        if self.conn is None:
+            return
+
+        upserted = [
+            (i, self.nodes[i][0], json.dumps(self.nodes[i][1], default=str))
+            for i in tx.nodes_before if i in self.nodes
+        ]
+        deleted = [(i,) for i in tx.nodes_before if i not in self.nodes]
+        added = [k for k in tx.edges_before if k in self.edges]
+        removed = [k for k in tx.edges_before if k not in self.edges]
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO nodes (id, type, props) VALUES (?, ?, ?)", upserted)
+            self.conn.executemany("DELETE FROM nodes WHERE id = ?", deleted)
+            self.conn.executemany("INSERT OR IGNORE INTO edges (source, type, id, target) VALUES (?, ?, ?, ?)", added)
+            self.conn.executemany(
+                "DELETE FROM edges WHERE source = ? AND type = ? AND id = ? AND target = ?", removed
+            )
+
+    def snapshot(self) -> GraphSnapshot:
+        version, snapshot = self._snapshot
+        if snapshot is not None and version == self.version:
+            return snapshot
+
+        # a write (or another rebuild) holds the lock: serve the last
+        # committed snapshot meanwhile rather than wait for it
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot[0] != self.version:
+                nodes = [
+                    {"id": i, "type": t, "name": props.get("name"), "properties": props}
+                    for i, (t, props) in self.nodes.items()
+                ]
+                edges = [{"type": t, "source": s, "target": d} for s, t, _, d in self.edges]
+                self._snapshot = (self.version, GraphSnapshot(nodes, edges))
+            return self._snapshot[1]
+        finally:
+            self._lock.release()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_graph: Optional[LocalGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_local_graph() -> LocalGraph:
+    """The process-wide embedded graph, shared by storage and queries."""
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = LocalGraph()
+        return _graph
+
+
+def close_local_graph():
+    global _graph
+    with _graph_lock:
+        if _graph is not None:
+            _graph.close()
+            _graph = None
+
+
+class LocalStorage(StorageBackend):
+    """GraphStorage on a LocalGraph: same operations, same merge rules."""
+
+    # a shared graph is left for its owner to close
+    def __init__(self, graph: Optional[LocalGraph] = None):
+        self._owns_graph = graph is None
+        self.graph = graph or LocalGraph()
+
+    def close(self):
+        if self._owns_graph:
+            self.graph.close()
+
+    # ---------------- Nodes ----------------
+
+    @staticmethod
+    def _write_nodes(tx: _Transaction, nodes: List[Dict], replace: bool):
+        for node in nodes:
+            props = _props(node)
+            if not replace:
+                before = tx.graph.nodes.get(node["id"])
+                if before is not None:
+                    props = {**before[1], **props}
+            tx.set_node(node["id"], node["type"], _stored(props))
+
+    def upsert_nodes(self, nodes: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE, replace: bool = False) -> int:
+        nodes = list(nodes)
+        with self.graph.transaction() as tx:
+            self._write_nodes(tx, nodes, replace)
+        return len(nodes)
+
+    def delete_nodes(self, node_ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        ids = list(node_ids)
+        with self.graph.transaction() as tx:
+            for node_id in ids:
+                tx.delete_node(node_id)
+        return len(ids)
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        with self.graph._lock:
+            found = self.graph.nodes.get(node_id)
+        if found is None:
+            return None
+        return {"id": node_id, "type": found[0], "properties": dict(found[1])}
+
+    def get_nodes_by_type(self, node_type: str) -> List[Dict]:
+        with self.graph._lock:
+            return [
+                {"id": i, "type": t, "properties": dict(props)}
+                for i, (t, props) in self.graph.nodes.items()
+                if t == node_type
+            ]
+
+    # ---------------- Edges ----------------
+
+    # like the Cypher MATCH ... MATCH ... MERGE, an edge with a missing
+    # endpoint is skipped; the count is of edges submitted, as in GraphStorage
+    def upsert_edges(self, edges: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        keys = [_edge_key(e) for e in edges]
+        with self.graph.transaction() as tx:
+            for key in keys:
+                tx.add_edge(key)
+        return len(keys)
+
+    def delete_edges(self, edges: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        keys = [_edge_key(e) for e in edges]
+        with self.graph.transaction() as tx:
+            for key in keys:
+                tx.remove_edge(key)
+        return len(keys)
+
+    # ---------------- Ingestion ----------------
+
+    def ingest(
+        self,
+        nodes: Iterable[Dict] = (),
+        edges: Iterable[Dict] = (),
+        delete_node_ids: Iterable[str] = (),
+        delete_edges: Iterable[Dict] = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        replace: bool = True,
+    ) -> Dict:
+        # everything is read before the transaction starts, so malformed
+        # input fails without touching the graph
+        nodes = list(nodes)
+        edges = [(e, _edge_key(e)) for e in edges]
+        delete_ids = list(delete_node_ids)
+        delete_keys = [_edge_key(e) for e in delete_edges]
+
+        report = {
+            "nodes_upserted": len(nodes),
+            "nodes_deleted": len(delete_ids),
+            "edges_upserted": 0,
+            "edges_deleted": len(delete_keys),
+            "dangling_edges": [],
+        }
+
+        with self.graph.transaction() as tx:
+            start = time.perf_counter()
+            for key in delete_keys:
+                tx.remove_edge(key)
+            for node_id in delete_ids:
+                tx.delete_node(node_id)
+            self._write_nodes(tx, nodes, replace)
+            report["node_seconds"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for edge, key in edges:
+                missing = tx.add_edge(key)
+                if missing:
+                    report["dangling_edges"].append({
+                        "id": edge["id"],
+                        "type": edge["type"].lower(),
+                        "source": edge["source"],
+                        "target": edge["target"],
+                        "missing": missing,
+                    })
+                else:
+                    report["edges_upserted"] += 1
+            report["edge_seconds"] = time.perf_counter() - start
+
+        return report
+
+
+class LocalQueryEngine(SnapshotQueryEngine):
+    """
+    QueryEngine on a LocalGraph. Queries run on the graph's snapshot of its
+    last committed version, with the same traversal code as the snapshot
+    engine, so results follow every write without a reload event.
+    """
+
+    def __init__(self, graph: Optional[LocalGraph] = None):
+        self._owns_graph = graph is None
+        self.graph = graph or LocalGraph()
+        self._subscribed = False
+
+    @property
+    def snapshot(self) -> GraphSnapshot:
+        return self.graph.snapshot()
+
+    def close(self):
+        if self._owns_graph:
+            self.graph.close()
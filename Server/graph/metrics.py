@@ -0,0 +1,204 @@
+import functools
+import inspect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+# In-process counters and latency histograms, rendered in the Prometheus text
+# exposition format by the API's /metrics endpoint. Every metric lives in
+# REGISTRY from the moment its module is imported; values are per process.
+
+# seconds; from sub-millisecond cache and snapshot lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """A named metric with fixed label names; subclasses render its sample lines."""
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        pass
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in values]
+
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram, as Prometheus expects: each bucket counts the
+    observations less than or equal to its upper bound.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts (not cumulative), sum, count]
+        self.values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self.values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self.values.items())
+
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.labels + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REGISTRY: Dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(cls, name: str, *args, **kwargs) -> Metric:
+    # modules may be reloaded (tests, benchmarks): the same name is the same metric
+    with _registry_lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = REGISTRY[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name} is already registered as a {metric.type}")
+        return metric
+
+
+def counter(name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+    return _register(Counter, name, help, labels)
+
+
+def histogram(name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram, name, help, labels, buckets)
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format (version 0.0.4)."""
+    with _registry_lock:
+        metrics = sorted(REGISTRY.values(), key=lambda m: m.name)
+    return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# ---------------- Graph ----------------
+
+QUERY_SECONDS = histogram(
+    "dockgraph_query_seconds",
+    "Latency of each query engine method.",
+    ["engine", "method"],
+)
+
+CONNECTOR_PARSE_SECONDS = histogram(
+    "dockgraph_connector_parse_seconds",
+    "Time to read and parse one connector's source.",
+    ["connector"],
+)
+
+LOAD_SECONDS = histogram(
+    "dockgraph_load_seconds",
+    "Time spent writing a load to the graph, by step (nodes, edges).",
+    ["step"],
+)
+
+
+def timed_query(func):
+    """Record a query engine method in QUERY_SECONDS, labelled with the engine class."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def run_async(self, *args, **kwargs):
+            with QUERY_SECONDS.time(engine=type(self).__name__, method=func.__name__):
+                return await func(self, *args, **kwargs)
+
+        return run_async
+
+    @functools.wraps(func)
+    def run(self, *args, **kwargs):
+        with QUERY_SECONDS.time(engine=type(self).__name__, method=func.__name__):
+            return func(self, *args, **kwargs)
+
+    return run
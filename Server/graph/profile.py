@@ -0,0 +1,119 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Opt-in: with DOCKGRAPH_PROFILE=true the Neo4j query engines time every query,
+# log the slow ones, and run a sample of them under Cypher PROFILE
+PROFILE = os.getenv("DOCKGRAPH_PROFILE", "false").lower() == "true"
+SAMPLE_RATE = float(os.getenv("DOCKGRAPH_PROFILE_SAMPLE", 0.1))  # fraction of queries run with PROFILE
+SLOW_QUERY_MS = float(os.getenv("DOCKGRAPH_SLOW_QUERY_MS", 500))
+KEEP = int(os.getenv("DOCKGRAPH_PROFILE_KEEP", 50))  # profiles (and slow queries) kept for /admin/profiles
+
+
+def plan_operators(plan: Dict) -> List[Dict]:
+    """The operators of a PROFILE plan, depth first from the root."""
+    operators = []
+    stack = [plan]
+    while stack:
+        op = stack.pop()
+        operators.append({
+            # "Expand(All)@neo4j" -> "Expand(All)"
+            "operator": op.get("operatorType", "").split("@")[0],
+            "db_hits": op.get("dbHits", 0),
+            "rows": op.get("rows", 0),
+            "details": op.get("args", {}).get("Details"),
+        })
+        stack.extend(reversed(op.get("children", [])))
+    return operators
+
+
+class QueryProfiler():
+    """
+    Timing and PROFILE plans of the queries a query engine runs. Safe to
+    share between threads; holds only the last `keep` profiles and slow
+    queries, plus running totals per engine method.
+    """
+
+    def __init__(self, enabled: bool = PROFILE, sample_rate: float = SAMPLE_RATE,
+                 slow_ms: float = SLOW_QUERY_MS, keep: int = KEEP, rng: random.Random = None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.rng = rng or random.Random()
+        self.profiles = deque(maxlen=keep)
+        self.slow = deque(maxlen=keep)
+        self.methods: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def sample(self) -> bool:
+        """Whether the next query should run with PROFILE."""
+        return self.enabled and self.rng.random() < self.sample_rate
+
+    def observe(self, method: str, query: str, params: Dict, seconds: float, rows: int, plan: Optional[Dict] = None):
+        """Record one query; plan is the summary's profile when it ran with PROFILE."""
+        ms = seconds * 1000
+        entry = {
+            "method": method,
+            "at": time.time(),
+            "ms": round(ms, 3),
+            "rows": rows,
+            "parameters": params,
+        }
+
+        if plan is not None:
+            operators = plan_operators(plan)
+            entry["db_hits"] = sum(op["db_hits"] for op in operators)
+            entry["operators"] = operators
+            entry["query"] = " ".join(query.split())
+
+        slow = ms >= self.slow_ms
+        with self._lock:
+            stats = self.methods.setdefault(method, {
+                "queries": 0, "slow": 0, "max_ms": 0.0,
+                "profiled": 0, "db_hits": 0, "max_db_hits": 0, "max_rows": 0,
+            })
+            stats["queries"] += 1
+            stats["max_ms"] = max(stats["max_ms"], entry["ms"])
+            stats["max_rows"] = max(stats["max_rows"], rows)
+            if slow:
+                stats["slow"] += 1
+                self.slow.append(entry)
+            if plan is not None:
+                stats["profiled"] += 1
+                stats["db_hits"] += entry["db_hits"]
+                stats["max_db_hits"] = max(stats["max_db_hits"], entry["db_hits"])
+                self.profiles.append(entry)
+
+        if slow:
+            hits = f", {entry['db_hits']} db hits" if plan is not None else ""
+            print(f"slow query: {method} took {ms:.0f}ms ({rows} rows{hits}) parameters={params}")
+
+    def report(self, limit: int = None) -> Dict:
+        """Settings, per-method totals and the newest profiles and slow queries first."""
+        with self._lock:
+            profiles = list(self.profiles)[::-1][:limit]
+            slow = list(self.slow)[::-1][:limit]
+            methods = {name: dict(stats) for name, stats in self.methods.items()}
+
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_query_ms": self.slow_ms,
+            "methods": methods,
+            "profiles": profiles,
+            "slow_queries": slow,
+        }
+
+
+_profiler = QueryProfiler()
+
+
+def get_profiler() -> QueryProfiler:
+    """The process-wide profiler shared by QueryEngine and AsyncQueryEngine."""
+    return _profiler
@@ -1,139 +1,225 @@
-from platform import node
-from neo4j import GraphDatabase
 from typing import List, Dict, Optional
-import os
 from dotenv import load_dotenv
 from langchain.tools import tool
+from graph.backend import QueryBackend
+from graph.driver import Neo4jPool
+from graph.metrics import timed_query
+from graph.profile import QueryProfiler, get_profiler
+from graph.schema import ENTITY_LABEL, ensure_schema, node_type
+import inspect
+import time
 
 load_dotenv();
 
 
+# ---------------- Cypher ----------------
+# Shared by QueryEngine and AsyncQueryEngine so both always run the same queries
+
+CHECK_NODE_EXISTENCE = f"""
+RETURN EXISTS {{ (n:{ENTITY_LABEL} {{id: $id}}) }} AS nodeExists
+"""
+
+GET_NODE = f"""
+MATCH (n:{ENTITY_LABEL} {{id: $id}})
+RETURN {node_type()} AS type, properties(n) AS props
+"""
+
+GET_OWNER = f"""
+MATCH (t:team)-[:OWNS]->(n:{ENTITY_LABEL} {{id: $id}})
+RETURN properties(t) AS props
+"""
+
+PATH = f"""
+MATCH (a:{ENTITY_LABEL} {{id: $startId}}), (b:{ENTITY_LABEL} {{id: $endId}})
+MATCH p = shortestPath((a)-[*]->(b))
+RETURN [n IN nodes(p) | n.id] AS path
+"""
+
+
+def _label_segment(filters: Optional[str]) -> str:
+    return f":{filters}" if filters else ""
+
+
+def get_nodes_query(type: str, filters: Dict) -> str:
+    where_clause = " AND ".join([f"n.{k} = ${k}" for k in filters])
+    label = type or ENTITY_LABEL
+
+    return f"""
+    MATCH (n:{label})
+    {"WHERE " + where_clause if where_clause else ""}
+    RETURN properties(n) AS props
+    """
+
+
+def owned_by_team_query(filters: Optional[str]) -> str:
+    # finding services, db, caches that are owned by a team with id
+    return f"""
+    MATCH (n:{ENTITY_LABEL} {{id: $id}})-[:OWNS]-(t{_label_segment(filters)})
+    RETURN properties(t) as props
+    """
+
+
+def downstream_query(filters: Optional[str]) -> str:
+    return f"""
+    MATCH (start:{ENTITY_LABEL} {{id: $id}})-[*..10]->(n{_label_segment(filters)})
+    RETURN DISTINCT properties(n) AS props, {node_type()} AS type
+    """
+
+
+def upstream_query(filters: Optional[str]) -> str:
+    return f"""
+    MATCH (n{_label_segment(filters)})-[*..10]->(target:{ENTITY_LABEL} {{id: $id}})
+    RETURN DISTINCT properties(n) AS props, {node_type()} AS type
+    """
+
+
+def to_node(props: Dict, type: str) -> Dict:
+    return {
+        "id": props["id"],
+        "type": type,
+        "properties": props,
+    }
+
+
+BLAST_RADIUS_MAX_DEPTH = 10
+BLAST_RADIUS_LIMIT = 500
+
+
+def blast_radius_query(filters: Optional[str], depth: int) -> str:
+    """
+    Upstream, downstream and owning teams of a node in one round trip.
+    Each direction is capped at $limit + 1 rows so callers can tell when
+    the result was truncated without counting the whole neighbourhood.
+    """
+    depth = max(1, min(int(depth), BLAST_RADIUS_MAX_DEPTH))
+    label_segment = _label_segment(filters)
+
+    return f"""
+    MATCH (start:{ENTITY_LABEL} {{id: $id}})
+    CALL {{
+        WITH start
+        OPTIONAL MATCH (start)-[*1..{depth}]->(d{label_segment})
+        WITH DISTINCT d LIMIT $limit + 1
+        RETURN collect(d) AS downstream
+    }}
+    CALL {{
+        WITH start
+        OPTIONAL MATCH (u{label_segment})-[*1..{depth}]->(start)
+        WITH DISTINCT u LIMIT $limit + 1
+        RETURN collect(u) AS upstream
+    }}
+    UNWIND [start] + downstream[..$limit] + upstream[..$limit] AS affected
+    OPTIONAL MATCH (t:team)-[:OWNS]->(affected)
+    WITH downstream, upstream, collect(DISTINCT t) AS teams
+    RETURN
+        [n IN downstream[..$limit] | {{props: properties(n), type: {node_type()}}}] AS downstream,
+        [n IN upstream[..$limit] | {{props: properties(n), type: {node_type()}}}] AS upstream,
+        [t IN teams | properties(t)] AS teams,
+        size(downstream) > $limit AS downstreamTruncated,
+        size(upstream) > $limit AS upstreamTruncated
+    """
+
+
+def to_blast_radius(node_id: str, record) -> Dict:
+    if not record:
+        return {
+            "node": node_id,
+            "downstream": [],
+            "upstream": [],
+            "teams": [],
+            "truncated": False,
+        }
 
-class QueryEngine:
-    def __init__(self):
-        uri = os.getenv("NEO4J_URI")
-        user = os.getenv("NEO4J_USERNAME")
-        password = os.getenv("NEO4J_PASSWORD")
-        auth = (user, password)
-        # print(uri, auth)
-        self.driver = GraphDatabase.driver(uri=uri, auth=auth)
+    return {
+        "node": node_id,
+        "downstream": [to_node(n["props"], n["type"]) for n in record["downstream"]],
+        "upstream": [to_node(n["props"], n["type"]) for n in record["upstream"]],
+        "teams": [to_node(props, "team") for props in record["teams"]],
+        "truncated": record["downstreamTruncated"] or record["upstreamTruncated"],
+    }
+
+
+class QueryEngine(QueryBackend):
+    # pass the process-wide pool to share connections; without one the
+    # engine opens (and on close() shuts) a private pool
+    def __init__(self, pool: Optional[Neo4jPool] = None, profiler: Optional[QueryProfiler] = None):
+        self._owns_pool = pool is None
+        self.driver = pool or Neo4jPool()
+        self.profiler = profiler or get_profiler()
         with self.driver.session(database="neo4j") as session:
             session.run("RETURN 1")
+        self.schema = ensure_schema(self.driver)
 
     def close(self):
-        self.driver.close()
+        if self._owns_pool:
+            self.driver.close()
+
+    def _records(self, method: str, query: str, params: Dict) -> List:
+        if not self.profiler.enabled:
+            with self.driver.session() as session:
+                return list(session.run(query, params))
+
+        profile = self.profiler.sample()
+        start = time.perf_counter()
+        with self.driver.session() as session:
+            result = session.run(f"PROFILE {query}" if profile else query, params)
+            records = list(result)
+            plan = result.consume().profile if profile else None
+        self.profiler.observe(method, query, params, time.perf_counter() - start, len(records), plan)
+        return records
+
+    def _single(self, method: str, query: str, params: Dict):
+        records = self._records(method, query, params)
+        return records[0] if records else None
 
     # ---------------- Basic Queries ----------------
 
     
+    @timed_query
     def check_node_existence(self, node_id:str) -> bool:
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                RETURN EXISTS { (n {id: $id}) } AS nodeExists
-                """,
-                id=node_id
-            ).single()
-            
-            return result["nodeExists"] if result else False
+        result = self._single("check_node_existence", CHECK_NODE_EXISTENCE, {"id": node_id})
+
+        return result["nodeExists"] if result else False
         
         
+    @timed_query
     def get_node(self, node_id: str) -> Optional[Dict]:
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (n {id: $id})
-                RETURN labels(n) AS labels, properties(n) AS props
-                """,
-                id=node_id,
-            ).single()
-
-            if not result:
-                return None
-
-            return {
-                "id": result["props"]["id"],
-                "type": result["labels"][0],
-                "properties": result["props"],
-            }
+        result = self._single("get_node", GET_NODE, {"id": node_id})
+
+        if not result:
+            return None
 
+        return to_node(result["props"], result["type"])
+
+    @timed_query
     def get_nodes(self, type: str = "", filters: Dict = None) -> List[Dict]:
         filters = filters or {}
+        query = get_nodes_query(type, filters)
 
-        where_clause = " AND ".join([f"n.{k} = ${k}" for k in filters])
-
-        if type == "":
-            query = f"""
-            MATCH (n) 
-            {"WHERE " + where_clause if where_clause else ""}
-            RETURN properties(n) as props
-            """
-        else:
-            query = f"""    
-            MATCH (n:{type})
-            {"WHERE " + where_clause if where_clause else ""}
-            RETURN properties(n) AS props
-            """
-
-        with self.driver.session() as session:
-            result = session.run(query, **filters)
+        records = self._records("get_nodes", query, filters)
 
-            return [
-                {
-                    "id": record["props"]["id"],
-                    "type": type,
-                    "properties": record["props"],
-                }
-                for record in result
-            ]
+        return [to_node(record["props"], type) for record in records]
 
     # ---------------- Ownership ----------------
 
+    @timed_query
     def get_owner(self, node_id: str) -> Optional[Dict]:
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:team)-[:OWNS]->(n {id: $id})
-                RETURN properties(t) AS props
-                """,
-                id=node_id,
-            ).single()
-
-            if not result:
-                return None
-
-            return {
-                "id": result["props"]["id"],
-                "type": "team",
-                "properties": result["props"],
-            }
+        result = self._single("get_owner", GET_OWNER, {"id": node_id})
+
+        if not result:
+            return None
+
+        return to_node(result["props"], "team")
     
+    @timed_query
     def get_owned_by_team(self, node_id : str, filters: str = None) -> Optional[Dict]:
+        records = self._records("get_owned_by_team", owned_by_team_query(filters), {"id": node_id})
 
-        # finding services, db, caches that are owned by a team with id
-        label_segment = f":{filters}" if filters else ""
+        return [to_node(record["props"], "team") for record in records]
 
-        query = f"""
-            MATCH (n {{id: $id}})-[:OWNS]-(t{label_segment})
-            RETURN properties(t) as props
-            """
-        with self.driver.session() as session:
-            result = session.run(
-                query,
-                id=node_id,
-            )
-
-            if not result:
-                return None;
-            
-            return [{
-                "id" : record["props"]["id"],
-                "type" : "team",
-                "properties" : record["props"]
-            } for record in result
-            ] 
     # ---------------- Traversals ----------------
 
+    @timed_query
     def downstream(self, node_id: str, filters: str = None) -> List[Dict]:
         """
         Find all transitive dependencies - what nodes this one depends on.
@@ -149,90 +235,34 @@ class QueryEngine:
             list: A list of all downstream nodes (dependencies) with their properties
                   Returns empty list if no dependencies found
         """
-        
-        label_segment = f":{filters}" if filters else ""
-        
-        query =f"""
-        MATCH (start {{id: $id}})-[*..10]->(n{label_segment})
-        RETURN DISTINCT properties(n) AS props, labels(n)[0] AS type
-        """
+        records = self._records("downstream", downstream_query(filters), {"id": node_id})
 
-        with self.driver.session() as session:
-            result = session.run(query, id=node_id)
-
-            return [
-                {
-                    "id": record["props"]["id"],
-                    "type": record["type"],
-                    "properties": record["props"],
-                }
-                for record in result
-            ]
+        return [to_node(record["props"], record["type"]) for record in records]
 
+    @timed_query
     def upstream(self, node_id: str, filters : str = None) -> List[Dict]:
-        label_segment = f":{filters}" if filters else ""
-            
-        query = f"""
-        MATCH (n{label_segment})-[*..10]->(target {{id: $id}})
-        RETURN DISTINCT properties(n) AS props, labels(n)[0] AS type
-        """
-
-        with self.driver.session() as session:
-            result = session.run(query, id=node_id)
+        records = self._records("upstream", upstream_query(filters), {"id": node_id})
 
-            return [
-                {
-                    "id": record["props"]["id"],
-                    "type": record["type"],
-                    "properties": record["props"],
-                }
-                for record in result
-            ]
+        return [to_node(record["props"], record["type"]) for record in records]
 
     # ---------------- Paths ----------------
 
+    @timed_query
     def path(self, from_id: str, to_id: str) -> List[str]:
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (a {id: $startId}), (b {id: $endId})
-                MATCH p = shortestPath((a)-[*]->(b))
-                RETURN [n IN nodes(p) | n.id] AS path
-                """,
-                startId=from_id,
-                endId=to_id,
-            ).single()
+        result = self._single("path", PATH, {"startId": from_id, "endId": to_id})
 
-            if not result:
-                return []
+        if not result:
+            return []
 
-            return result["path"]
+        return result["path"]
 
     # ---------------- Impact Analysis ----------------
 
-    def blast_radius(self, node_id: str, filters: str = None) -> Dict:
-        downstream_nodes = self.downstream(node_id, filters)
-        upstream_nodes = self.upstream(node_id, filters)
+    @timed_query
+    def blast_radius(self, node_id: str, filters: str = None, depth: int = BLAST_RADIUS_MAX_DEPTH, limit: int = BLAST_RADIUS_LIMIT) -> Dict:
+        record = self._single("blast_radius", blast_radius_query(filters, depth), {"id": node_id, "limit": limit})
 
-        affected_nodes = {
-            n["id"]: n for n in downstream_nodes + upstream_nodes
-        }
-
-        affected_nodes[node_id] = self.get_node(node_id)
-
-        affected_teams = {}
-
-        for node in affected_nodes.values():
-            owner = self.get_owner(node.get("id"))
-            if owner:
-                affected_teams[owner["id"]] = owner
-
-        return {
-            "node": node_id,
-            "downstream": downstream_nodes,
-            "upstream": upstream_nodes,
-            "teams": list(affected_teams.values()),
-        }
+        return to_blast_radius(node_id, record)
 
 def create_tools(engine: QueryEngine):
     
@@ -358,7 +388,7 @@ def create_tools(engine: QueryEngine):
         return engine.path(from_id, to_id)
 
     @tool
-    def blast_radius(node_id: str, filters: Optional[str] = None) -> Dict:
+    def blast_radius(node_id: str, filters: Optional[str] = None, depth: int = BLAST_RADIUS_MAX_DEPTH) -> Dict:
         """
         Perform comprehensive impact analysis - shows all effects of a node failure.
         Reveals the complete blast radius including dependencies, dependents, and teams.
@@ -367,13 +397,15 @@ def create_tools(engine: QueryEngine):
             node_id (str): Node identifier in format 'type:name'
                           (e.g., 'database:payments-db')
             filters (str): Optional filter by 'service', 'database', or 'cache'
+            depth (int): How many hops to follow in each direction (1-10, default 10)
         
         Returns:
-            dict: Impact analysis with 'node', 'downstream', 'upstream', 'teams' keys
+            dict: Impact analysis with 'node', 'downstream', 'upstream', 'teams' keys,
+                  and 'truncated' set when the result was capped
         """
-        return engine.blast_radius(node_id, filters)
+        return engine.blast_radius(node_id, filters, depth)
 
-    return [
+    tools = [
         check_node_existence,
         get_node,
         get_nodes,
@@ -384,7 +416,18 @@ def create_tools(engine: QueryEngine):
         path,
         blast_radius,
     ]
-    
-    
-        
-        
\ No newline at end of file
+
+    # AsyncQueryEngine methods return coroutines: give every tool an async
+    # entry point so the agent awaits them instead of blocking a thread
+    if inspect.iscoroutinefunction(engine.get_node):
+        for t in tools:
+            t.coroutine = _awaiting(t.func)
+
+    return tools
+
+
+def _awaiting(func):
+    async def run(*args, **kwargs):
+        return await func(*args, **kwargs)
+
+    return run
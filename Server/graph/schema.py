@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional
+
+# Every node also carries this shared label so that label-less lookups
+# (`MATCH (n:Entity {id: $id})`) are index seeks instead of full scans
+ENTITY_LABEL = "Entity"
+
+NODE_LABELS = ("service", "database", "cache", "team")
+
+# index states reported by the first ensure_schema call in this process
+_schema: Optional[List[Dict]] = None
+
+
+# Cypher expression for a node's type that skips the shared label,
+# so callers keep seeing "service", "team", ...
+def node_type(var: str = "n") -> str:
+    return f"[l IN labels({var}) WHERE l <> '{ENTITY_LABEL}'][0]"
+
+
+def _constraint_statements() -> List[str]:
+    return [
+        f"CREATE CONSTRAINT {label.lower()}_id_unique IF NOT EXISTS "
+        f"FOR (n:{label}) REQUIRE n.id IS UNIQUE"
+        for label in (ENTITY_LABEL,) + NODE_LABELS
+    ]
+
+
+_INDEX_STATUS = """
+SHOW INDEXES
+YIELD name, labelsOrTypes, properties, state
+RETURN name, labelsOrTypes, properties, state
+"""
+
+# nodes written before the shared label existed
+_BACKFILL_ENTITY_LABEL = f"""
+MATCH (n)
+WHERE n.id IS NOT NULL AND NOT n:{ENTITY_LABEL}
+SET n:{ENTITY_LABEL}
+"""
+
+_AWAIT_INDEXES = "CALL db.awaitIndexes(300)"
+
+
+def _report(status: List[Dict]):
+    online = [i["name"] for i in status if i["state"] == "ONLINE"]
+    pending = [i["name"] for i in status if i["state"] != "ONLINE"]
+    print(f"schema ready: {len(online)} indexes online {online}")
+    if pending:
+        print(f"schema: indexes not online yet {pending}")
+
+
+def index_status(driver) -> List[Dict]:
+    with driver.session() as session:
+        result = session.run(_INDEX_STATUS)
+        return [record.data() for record in result]
+
+
+def ensure_schema(driver, force: bool = False) -> List[Dict]:
+    """
+    Create the id uniqueness constraints (and their backing indexes) for every
+    node label, tag pre-existing nodes with the shared Entity label, and wait
+    for the indexes to come online. Safe to call repeatedly; only the first
+    call per process does any work unless force=True; later calls return the
+    index states it reported (use index_status for a fresh reading).
+
+    Returns the state of every index, e.g. [{"name": ..., "state": "ONLINE"}]
+    """
+    global _schema
+
+    if _schema is not None and not force:
+        return _schema
+
+    with driver.session() as session:
+        for statement in _constraint_statements():
+            session.run(statement).consume()
+
+        session.run(_BACKFILL_ENTITY_LABEL).consume()
+        session.run(_AWAIT_INDEXES).consume()
+
+    status = index_status(driver)
+    _report(status)
+
+    _schema = status
+    return status
+
+
+async def async_index_status(driver) -> List[Dict]:
+    async with driver.session() as session:
+        result = await session.run(_INDEX_STATUS)
+        return [record.data() async for record in result]
+
+
+# same as ensure_schema, for AsyncNeo4jPool / async drivers
+async def async_ensure_schema(driver, force: bool = False) -> List[Dict]:
+    global _schema
+
+    if _schema is not None and not force:
+        return _schema
+
+    async with driver.session() as session:
+        for statement in _constraint_statements():
+            await (await session.run(statement)).consume()
+        await (await session.run(_BACKFILL_ENTITY_LABEL)).consume()
+        await (await session.run(_AWAIT_INDEXES)).consume()
+
+    status = await async_index_status(driver)
+    _report(status)
+
+    _schema = status
+    return status
@@ -0,0 +1,317 @@
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+from graph.backend import QueryBackend
+from graph.events import on_reload, remove_listener
+from graph.metrics import timed_query
+from graph.query import BLAST_RADIUS_MAX_DEPTH, BLAST_RADIUS_LIMIT
+
+# matches the `[*..10]` bound used by the Cypher traversals
+TRAVERSAL_DEPTH = 10
+
+OWNS = "owns"
+
+
+class GraphSnapshot:
+    """
+    Immutable, read-only copy of the graph in CSR form: nodes are numbered
+    0..n-1 and each direction's adjacency is a pair of flat int arrays
+    (offsets, targets), so neighbours of node i are
+    targets[offsets[i]:offsets[i + 1]].
+
+    Built from the same node/edge dicts the connectors produce, with the same
+    merge rules as GraphStorage: nodes are merged by id (later properties
+    win), edges whose endpoints are missing are dropped.
+    """
+
+    def __init__(self, nodes: Iterable[Dict], edges: Iterable[Dict]):
+        self.ids: List[str] = []
+        self.types: List[str] = []
+        self.props: List[Dict] = []
+        self.index: Dict[str, int] = {}
+
+        for node in nodes:
+            # stored the way Neo4j stores them: no null properties
+            props = {k: v for k, v in node.get("properties", {}).items() if v is not None}
+            props["id"] = node["id"]
+            if node.get("name") is not None:
+                props["name"] = node["name"]
+
+            i = self.index.get(node["id"])
+            if i is None:
+                self.index[node["id"]] = len(self.ids)
+                self.ids.append(node["id"])
+                self.types.append(node["type"])
+                self.props.append(props)
+            else:
+                self.props[i].update(props)
+
+        pairs = set()
+        for edge in edges:
+            a = self.index.get(edge["source"])
+            b = self.index.get(edge["target"])
+            if a is None or b is None:
+                continue
+            pairs.add((a, b, edge["type"].lower()))
+
+        self.edge_count = len(pairs)
+
+        self.out_offsets, self.out_targets, self.out_types = self._csr(pairs)
+        self.in_offsets, self.in_targets, self.in_types = self._csr(
+            (b, a, t) for a, b, t in pairs
+        )
+
+    def _csr(self, edges):
+        edges = sorted(edges)
+        n = len(self.ids)
+
+        offsets = array("l", [0] * (n + 1))
+        targets = array("l", [0] * len(edges))
+        types = []
+
+        for k, (a, b, t) in enumerate(edges):
+            offsets[a + 1] += 1
+            targets[k] = b
+            types.append(t)
+
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        return offsets, targets, types
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------------- Traversal ----------------
+
+    def bfs(self, start: int, offsets, targets, max_depth: int = TRAVERSAL_DEPTH) -> Dict[int, int]:
+        """Nodes reachable from start in 1..max_depth hops, mapped to their distance."""
+        reached = {}
+        frontier = [start]
+        depth = 0
+
+        while frontier and depth < max_depth:
+            depth += 1
+            next_frontier = []
+            for i in frontier:
+                for k in range(offsets[i], offsets[i + 1]):
+                    j = targets[k]
+                    if j not in reached:
+                        reached[j] = depth
+                        next_frontier.append(j)
+            frontier = next_frontier
+
+        return reached
+
+    def shortest_path(self, start: int, end: int) -> List[int]:
+        if start == end:
+            return []
+
+        parent = {start: None}
+        queue = deque([start])
+
+        while queue and end not in parent:
+            i = queue.popleft()
+            for k in range(self.out_offsets[i], self.out_offsets[i + 1]):
+                j = self.out_targets[k]
+                if j not in parent:
+                    parent[j] = i
+                    queue.append(j)
+
+        if end not in parent:
+            return []
+
+        path = []
+        i = end
+        while i is not None:
+            path.append(i)
+            i = parent[i]
+        return path[::-1]
+
+    def owners(self, i: int) -> List[int]:
+        return [
+            self.in_targets[k]
+            for k in range(self.in_offsets[i], self.in_offsets[i + 1])
+            if self.in_types[k] == OWNS and self.types[self.in_targets[k]] == "team"
+        ]
+
+    def owns_neighbours(self, i: int) -> List[int]:
+        out = [
+            self.out_targets[k]
+            for k in range(self.out_offsets[i], self.out_offsets[i + 1])
+            if self.out_types[k] == OWNS
+        ]
+        into = [
+            self.in_targets[k]
+            for k in range(self.in_offsets[i], self.in_offsets[i + 1])
+            if self.in_types[k] == OWNS
+        ]
+        return out + into
+
+    def node(self, i: int, type: str = None) -> Dict:
+        return {
+            "id": self.ids[i],
+            "type": self.types[i] if type is None else type,
+            "properties": dict(self.props[i]),
+        }
+
+
+class SnapshotQueryEngine(QueryBackend):
+    """
+    Drop-in replacement for QueryEngine that answers every query from an
+    in-process GraphSnapshot instead of Neo4j. The snapshot is swapped
+    atomically whenever load_graph() reports a reload.
+    """
+
+    def __init__(self, nodes: Iterable[Dict] = (), edges: Iterable[Dict] = (), subscribe: bool = True):
+        self.snapshot = GraphSnapshot(nodes, edges)
+        self._subscribed = subscribe
+        if subscribe:
+            on_reload(self.refresh)
+
+    @classmethod
+    def from_connectors(cls, connectors=None, subscribe: bool = True) -> "SnapshotQueryEngine":
+        if connectors is None:
+            from graph.load_graph import default_connectors
+            connectors = default_connectors()
+
+        nodes, edges = [], []
+        for connector in connectors:
+            n, e = connector.parse()
+            nodes.extend(n)
+            edges.extend(e)
+
+        return cls(nodes, edges, subscribe=subscribe)
+
+    def refresh(self, nodes: Iterable[Dict], edges: Iterable[Dict]):
+        # build fully before swapping so readers never see a partial graph
+        self.snapshot = GraphSnapshot(nodes, edges)
+
+    def close(self):
+        if self._subscribed:
+            remove_listener(self.refresh)
+
+    def _matches(self, snapshot: GraphSnapshot, i: int, filters: Optional[str]) -> bool:
+        return not filters or snapshot.types[i] == filters
+
+    # ---------------- Basic Queries ----------------
+
+    @timed_query
+    def check_node_existence(self, node_id: str) -> bool:
+        return node_id in self.snapshot.index
+
+    @timed_query
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        snapshot = self.snapshot
+        i = snapshot.index.get(node_id)
+        return None if i is None else snapshot.node(i)
+
+    @timed_query
+    def get_nodes(self, type: str = "", filters: Dict = None) -> List[Dict]:
+        snapshot = self.snapshot
+        filters = filters or {}
+
+        return [
+            snapshot.node(i, type)
+            for i in range(len(snapshot))
+            if (not type or snapshot.types[i] == type)
+            and all(snapshot.props[i].get(k) == v for k, v in filters.items())
+        ]
+
+    # ---------------- Ownership ----------------
+
+    @timed_query
+    def get_owner(self, node_id: str) -> Optional[Dict]:
+        snapshot = self.snapshot
+        i = snapshot.index.get(node_id)
+        if i is None:
+            return None
+
+        owners = snapshot.owners(i)
+        return snapshot.node(owners[0], "team") if owners else None
+
+    @timed_query
+    def get_owned_by_team(self, node_id: str, filters: str = None) -> Optional[Dict]:
+        snapshot = self.snapshot
+        i = snapshot.index.get(node_id)
+        if i is None:
+            return []
+
+        return [
+            snapshot.node(j, "team")
+            for j in snapshot.owns_neighbours(i)
+            if self._matches(snapshot, j, filters)
+        ]
+
+    # ---------------- Traversals ----------------
+
+    # takes the caller's snapshot: indices are only meaningful within one,
+    # and self.snapshot may be swapped by a reload between two reads
+    def _traverse(self, snapshot: GraphSnapshot, node_id: str, filters: Optional[str], downstream: bool, depth: int = TRAVERSAL_DEPTH) -> List[int]:
+        i = snapshot.index.get(node_id)
+        if i is None:
+            return []
+
+        if downstream:
+            reached = snapshot.bfs(i, snapshot.out_offsets, snapshot.out_targets, depth)
+        else:
+            reached = snapshot.bfs(i, snapshot.in_offsets, snapshot.in_targets, depth)
+
+        return [j for j in reached if self._matches(snapshot, j, filters)]
+
+    @timed_query
+    def downstream(self, node_id: str, filters: str = None) -> List[Dict]:
+        snapshot = self.snapshot
+        return [snapshot.node(j) for j in self._traverse(snapshot, node_id, filters, downstream=True)]
+
+    @timed_query
+    def upstream(self, node_id: str, filters: str = None) -> List[Dict]:
+        snapshot = self.snapshot
+        return [snapshot.node(j) for j in self._traverse(snapshot, node_id, filters, downstream=False)]
+
+    # ---------------- Paths ----------------
+
+    @timed_query
+    def path(self, from_id: str, to_id: str) -> List[str]:
+        snapshot = self.snapshot
+        a = snapshot.index.get(from_id)
+        b = snapshot.index.get(to_id)
+        if a is None or b is None:
+            return []
+
+        return [snapshot.ids[i] for i in snapshot.shortest_path(a, b)]
+
+    # ---------------- Impact Analysis ----------------
+
+    @timed_query
+    def blast_radius(self, node_id: str, filters: str = None, depth: int = BLAST_RADIUS_MAX_DEPTH, limit: int = BLAST_RADIUS_LIMIT) -> Dict:
+        snapshot = self.snapshot
+        depth = max(1, min(int(depth), BLAST_RADIUS_MAX_DEPTH))
+        start = snapshot.index.get(node_id)
+
+        if start is None:
+            return {
+                "node": node_id,
+                "downstream": [],
+                "upstream": [],
+                "teams": [],
+                "truncated": False,
+            }
+
+        down = self._traverse(snapshot, node_id, filters, downstream=True, depth=depth)
+        up = self._traverse(snapshot, node_id, filters, downstream=False, depth=depth)
+        truncated = len(down) > limit or len(up) > limit
+        down, up = down[:limit], up[:limit]
+
+        teams = {}
+        for i in [start] + down + up:
+            for t in snapshot.owners(i):
+                teams.setdefault(t, snapshot.node(t, "team"))
+
+        return {
+            "node": node_id,
+            "downstream": [snapshot.node(j) for j in down],
+            "upstream": [snapshot.node(j) for j in up],
+            "teams": list(teams.values()),
+            "truncated": truncated,
+        }
@@ -1,40 +1,106 @@
-from neo4j import GraphDatabase
-from typing import Dict, List
-import os
+import time
+from typing import Dict, Iterable, List, Optional
+from collections import defaultdict
 from dotenv import load_dotenv
+from graph.backend import DEFAULT_BATCH_SIZE, StorageBackend
+from graph.driver import Neo4jPool
+from graph.schema import ENTITY_LABEL, ensure_schema, node_type
 
 # This looks for a .env file in the current directory
 load_dotenv() # for local
 
 
-class GraphStorage:
-    # start a connection
+def _chunks(rows: List[Dict], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
 
-    def __init__(self):
-        uri = os.getenv("NEO4J_URI")
-        user = os.getenv("NEO4J_USERNAME", "neo4j")
-        password = os.getenv("NEO4J_PASSWORD")
 
-        if not uri:
-            raise RuntimeError("NEO4J_URI is not set")
+# ---------------- Bulk queries ----------------
+# shared by the bulk methods (one transaction per batch) and ingest() (one
+# transaction for everything)
 
-        self.driver = GraphDatabase.driver(
-            uri,
-            auth=(user, password)
-        )
-        GraphDatabase.driver.verify_connectivity();
+def _node_rows(nodes: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    by_label = defaultdict(list)
+    for node in nodes:
+        props = node.get("properties", {}).copy()
+        props["id"] = node["id"]
+        props["name"] = node.get("name")
+        by_label[node["type"]].append({"id": node["id"], "props": props})
+    return by_label
+
+
+def _edge_rows(edges: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    by_type = defaultdict(list)
+    for edge in edges:
+        by_type[edge["type"].upper()].append({
+            "id": edge["id"],
+            "source": edge["source"],
+            "target": edge["target"],
+        })
+    return by_type
+
+
+def _upsert_nodes_query(label: str, replace: bool) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MERGE (n:{ENTITY_LABEL} {{id: row.id}})
+    SET n:{label}, n {"=" if replace else "+="} row.props
+    """
+
+
+def _upsert_edges_query(rel_type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MATCH (a:{ENTITY_LABEL} {{id: row.source}})
+    MATCH (b:{ENTITY_LABEL} {{id: row.target}})
+    MERGE (a)-[r:{rel_type} {{id: row.id}}]->(b)
+    """
+
+
+# like _upsert_edges_query, but returns the rows it could not attach
+def _resolve_edges_query(rel_type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    OPTIONAL MATCH (a:{ENTITY_LABEL} {{id: row.source}})
+    OPTIONAL MATCH (b:{ENTITY_LABEL} {{id: row.target}})
+    FOREACH (_ IN CASE WHEN a IS NULL OR b IS NULL THEN [] ELSE [1] END |
+        MERGE (a)-[:{rel_type} {{id: row.id}}]->(b)
+    )
+    WITH row, a, b
+    WHERE a IS NULL OR b IS NULL
+    RETURN row.id AS id, row.source AS source, row.target AS target,
+           a IS NULL AS missing_source, b IS NULL AS missing_target
+    """
 
-    # closing connection
-    def close(self):
-        self.driver.close()
 
-    # Create index for fast lookup by id
-    # def _ensure_indexes(self):
-    #     with self.driver.session() as session:
-    #         session.run(
-    #             "CREATE CONSTRAINT IF NOT EXISTS "
-    #             "ON (n) ASSERT n.id IS UNIQUE"
-    #         )
+def _delete_edges_query(rel_type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MATCH (:{ENTITY_LABEL} {{id: row.source}})-[r:{rel_type} {{id: row.id}}]->(:{ENTITY_LABEL} {{id: row.target}})
+    DELETE r
+    """
+
+
+_DELETE_NODES_QUERY = f"""
+UNWIND $rows AS id
+MATCH (n:{ENTITY_LABEL} {{id: id}})
+DETACH DELETE n
+"""
+
+
+class GraphStorage(StorageBackend):
+    # start a connection
+
+    def __init__(self, pool: Optional[Neo4jPool] = None):
+        self._owns_pool = pool is None
+        self.driver = pool or Neo4jPool()
+        self.driver.verify_connectivity()
+        self.schema = ensure_schema(self.driver)
+
+    # closing connection (a shared pool is left for its owner to close)
+    def close(self):
+        if self._owns_pool:
+            self.driver.close()
 
     # ---------------- Nodes ----------------
     
@@ -48,20 +114,38 @@ class GraphStorage:
         with self.driver.session() as session:
             session.run(
                 f"""
-                MERGE (n:{label} {{id: $id}})
-                SET n += $props
+                MERGE (n:{ENTITY_LABEL} {{id: $id}})
+                SET n:{label}, n += $props
                 """,
                 id=node["id"],
                 props=props,
             )
 
+    # bulk upsert: one UNWIND batch per label, each batch in its own write transaction.
+    # replace=True overwrites the stored properties instead of merging into them,
+    # so properties dropped from the source disappear from the graph too
+    def upsert_nodes(self, nodes: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE, replace: bool = False) -> int:
+        written = 0
+        with self.driver.session() as session:
+            for label, rows in _node_rows(nodes).items():
+                query = _upsert_nodes_query(label, replace)
+                for batch in _chunks(rows, batch_size):
+                    session.execute_write(self._run_batch, query, batch)
+                    written += len(batch)
+
+        return written
+
+    @staticmethod
+    def _run_batch(tx, query: str, rows: List[Dict]):
+        tx.run(query, rows=rows).consume()
+
     # get node
     def get_node(self, node_id: str) -> Dict | None:
         with self.driver.session() as session:
             result = session.run(
-                """
-                MATCH (n {id: $id})
-                RETURN labels(n) AS labels, properties(n) AS props
+                f"""
+                MATCH (n:{ENTITY_LABEL} {{id: $id}})
+                RETURN {node_type()} AS type, properties(n) AS props
                 """,
                 id=node_id,
             ).single()
@@ -71,7 +155,7 @@ class GraphStorage:
 
             return {
                 "id": result["props"]["id"],
-                "type": result["labels"][0],
+                "type": result["type"],
                 "properties": result["props"],
             }
 
@@ -98,13 +182,23 @@ class GraphStorage:
     def delete_node(self, node_id: str):
         with self.driver.session() as session:
             session.run(
-                """
-                MATCH (n {id: $id})
+                f"""
+                MATCH (n:{ENTITY_LABEL} {{id: $id}})
                 DETACH DELETE n
                 """,
                 id=node_id,
             )
 
+    # bulk delete, along with any relationships still attached
+    def delete_nodes(self, node_ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        ids = list(node_ids)
+
+        with self.driver.session() as session:
+            for batch in _chunks(ids, batch_size):
+                session.execute_write(self._run_batch, _DELETE_NODES_QUERY, batch)
+
+        return len(ids)
+
     # ---------------- Edges ----------------
 
     # update edge
@@ -114,11 +208,107 @@ class GraphStorage:
         with self.driver.session() as session:
             session.run(
                 f"""
-                MATCH (a {{id: $source}})
-                MATCH (b {{id: $target}})
+                MATCH (a:{ENTITY_LABEL} {{id: $source}})
+                MATCH (b:{ENTITY_LABEL} {{id: $target}})
                 MERGE (a)-[r:{rel_type} {{id: $id}}]->(b)
                 """,
                 id=edge["id"],
                 source=edge["source"],
                 target=edge["target"],
             )
+
+    # bulk upsert: one UNWIND batch per relationship type
+    def upsert_edges(self, edges: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        written = 0
+        with self.driver.session() as session:
+            for rel_type, rows in _edge_rows(edges).items():
+                query = _upsert_edges_query(rel_type)
+                for batch in _chunks(rows, batch_size):
+                    session.execute_write(self._run_batch, query, batch)
+                    written += len(batch)
+
+        return written
+
+    # bulk delete; relationships are matched through their (indexed) endpoints
+    def delete_edges(self, edges: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        deleted = 0
+        with self.driver.session() as session:
+            for rel_type, rows in _edge_rows(edges).items():
+                query = _delete_edges_query(rel_type)
+                for batch in _chunks(rows, batch_size):
+                    session.execute_write(self._run_batch, query, batch)
+                    deleted += len(batch)
+
+        return deleted
+
+    # ---------------- Ingestion ----------------
+
+    # One load as a single write transaction: removals, then every node, then
+    # every edge, so edges resolve against all of the load's nodes. Readers
+    # keep seeing the previous graph until it commits, and a failure anywhere
+    # rolls the whole load back. Edges with a missing endpoint are not written
+    # and come back in "dangling_edges" instead of being dropped silently.
+    def ingest(
+        self,
+        nodes: Iterable[Dict] = (),
+        edges: Iterable[Dict] = (),
+        delete_node_ids: Iterable[str] = (),
+        delete_edges: Iterable[Dict] = (),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        replace: bool = True,
+    ) -> Dict:
+        node_rows = _node_rows(nodes)
+        edge_rows = _edge_rows(edges)
+        delete_edge_rows = _edge_rows(delete_edges)
+        delete_ids = list(delete_node_ids)
+
+        def work(tx):
+            # runs again from the top if the driver retries the transaction
+            report = {
+                "nodes_upserted": 0,
+                "nodes_deleted": len(delete_ids),
+                "edges_upserted": 0,
+                "edges_deleted": 0,
+                "dangling_edges": [],
+            }
+            start = time.perf_counter()
+
+            for rel_type, rows in delete_edge_rows.items():
+                for batch in _chunks(rows, batch_size):
+                    tx.run(_delete_edges_query(rel_type), rows=batch).consume()
+                    report["edges_deleted"] += len(batch)
+
+            for batch in _chunks(delete_ids, batch_size):
+                tx.run(_DELETE_NODES_QUERY, rows=batch).consume()
+
+            for label, rows in node_rows.items():
+                for batch in _chunks(rows, batch_size):
+                    tx.run(_upsert_nodes_query(label, replace), rows=batch).consume()
+                    report["nodes_upserted"] += len(batch)
+
+            report["node_seconds"] = time.perf_counter() - start
+            start = time.perf_counter()
+
+            for rel_type, rows in edge_rows.items():
+                for batch in _chunks(rows, batch_size):
+                    dangling = [
+                        {
+                            "id": r["id"],
+                            "type": rel_type.lower(),
+                            "source": r["source"],
+                            "target": r["target"],
+                            "missing": [
+                                i for i, gone in ((r["source"], r["missing_source"]), (r["target"], r["missing_target"]))
+                                if gone
+                            ],
+                        }
+                        for r in tx.run(_resolve_edges_query(rel_type), rows=batch)
+                    ]
+                    report["dangling_edges"].extend(dangling)
+                    report["edges_upserted"] += len(batch) - len(dangling)
+
+            report["edge_seconds"] = time.perf_counter() - start
+            return report
+
+        with self.driver.session() as session:
+            return session.execute_write(work)
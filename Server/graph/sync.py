@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from graph.backend import DEFAULT_BATCH_SIZE
+from graph.engine import BACKEND, make_storage
+from graph.events import notify_reload
+from graph.metrics import LOAD_SECONDS
+
+load_dotenv()
+
+# What was last written to the graph, per source; diffed against on every sync
+STATE_PATH = os.getenv("DOCKGRAPH_SYNC_STATE", "./data/.graph_state.json")
+
+Parsed = Tuple[List[Dict], List[Dict]]
+
+
+def fingerprint(value) -> str:
+    # keys are hashed in the order connectors emit them (sorting doubles the
+    # cost); a reordering at worst costs an item-by-item diff that finds nothing
+    encoded = json.dumps(value, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def source_key(connector) -> str:
+    # "DockerComposeConnector:./data/docker-compose.yml"
+    return f"{type(connector).__name__}:{getattr(connector, 'path', '')}"
+
+
+def merge_nodes(nodes) -> Dict[str, Dict]:
+    # same rule as the graph: one node per id, later properties win
+    merged = {}
+    for node in nodes:
+        previous = merged.get(node["id"])
+        if previous is None:
+            merged[node["id"]] = node
+        else:
+            merged[node["id"]] = {
+                **previous,
+                **node,
+                "properties": {**previous.get("properties", {}), **node.get("properties", {})},
+            }
+    return merged
+
+
+def merge_edges(edges) -> Dict[str, Dict]:
+    return {edge["id"]: edge for edge in edges}
+
+
+def _relationship(edge: Dict) -> Tuple[str, str, str]:
+    # all of an edge that is stored in the graph (properties are not)
+    return edge["type"].upper(), edge["source"], edge["target"]
+
+
+class SyncState:
+    """
+    Connector output as of the last successful sync, keyed by source_key,
+    with a fingerprint of each source's output so an unchanged source is
+    recognized without diffing it item by item.
+
+    The file holds two JSON lines: the fingerprints, then the output itself.
+    Only the first is read until a source has actually changed.
+    """
+
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self.fingerprints: Dict[str, str] = {}
+        self._sources: Optional[Dict[str, Dict]] = None
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.fingerprints = json.loads(f.readline() or "{}")
+        else:
+            self._sources = {}
+
+    @property
+    def sources(self) -> Dict[str, Dict]:
+        if self._sources is None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                f.readline()
+                self._sources = json.loads(f.readline() or "{}")
+        return self._sources
+
+    @sources.setter
+    def sources(self, sources: Dict[str, Dict]):
+        self._sources = sources
+        self.fingerprints = {key: s["fingerprint"] for key, s in sources.items()}
+
+    def save(self):
+        if not self.path:
+            return
+        # write-then-rename so a crash never leaves half a state file behind
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.fingerprints, separators=(",", ":")) + "\n")
+            f.write(json.dumps(self.sources, separators=(",", ":"), default=str) + "\n")
+        os.replace(tmp, self.path)
+
+    def nodes(self, sources: Dict[str, Dict] = None) -> Dict[str, Dict]:
+        sources = self.sources if sources is None else sources
+        return merge_nodes(n for s in sources.values() for n in s["nodes"])
+
+    def edges(self, sources: Dict[str, Dict] = None) -> Dict[str, Dict]:
+        sources = self.sources if sources is None else sources
+        return merge_edges(e for s in sources.values() for e in s["edges"])
+
+
+_memory_state: Optional[SyncState] = None
+
+
+def default_state() -> SyncState:
+    # the state describes what one particular graph holds
+    global _memory_state
+    if BACKEND == "local":
+        from graph.local import LOCAL_DB
+        if LOCAL_DB:
+            return SyncState(f"{LOCAL_DB}.state.json")
+        # an in-memory graph starts out empty in every process and is shared
+        # within it, and so is its state
+        if _memory_state is None:
+            _memory_state = SyncState("")
+        return _memory_state
+    return SyncState()
+
+
+class Delta:
+    """The writes that bring the graph from one state to the next."""
+
+    def __init__(self, sources: Dict[str, Dict]):
+        self.sources = sources
+        self.upsert_nodes: List[Dict] = []
+        self.delete_nodes: List[str] = []
+        self.upsert_edges: List[Dict] = []
+        self.delete_edges: List[Dict] = []
+        self.changed_sources: List[str] = []
+
+    def __bool__(self):
+        return bool(self.upsert_nodes or self.delete_nodes or self.upsert_edges or self.delete_edges)
+
+    def counts(self) -> Dict:
+        return {
+            "nodes_upserted": len(self.upsert_nodes),
+            "nodes_deleted": len(self.delete_nodes),
+            "edges_upserted": len(self.upsert_edges),
+            "edges_deleted": len(self.delete_edges),
+        }
+
+
+class GraphSync:
+    """
+    Applies connector output to the graph incrementally: each source's output
+    is fingerprinted and compared with what was last applied, and only the
+    added, changed and removed nodes and edges are written. Sources that are
+    not passed to sync() are left as they are, so one connector can be
+    re-synced on its own.
+
+    Each sync is written as one transaction (StorageBackend.ingest), so readers
+    never see a half-applied load. `storage` is any StorageBackend; by
+    default one for DOCKGRAPH_BACKEND (on `pool`, for Neo4j) is opened for
+    each write.
+    """
+
+    def __init__(self, pool=None, state: Optional[SyncState] = None, batch_size: int = DEFAULT_BATCH_SIZE, storage=None):
+        self.pool = pool
+        self.state = state if state is not None else default_state()
+        self.batch_size = batch_size
+        self.storage = storage
+
+    def plan(self, parsed: Dict[str, Parsed], full: bool = False) -> Delta:
+        """
+        Diff the parsed output of some sources against the stored state.
+        full=True rewrites every node and edge (still deleting removed ones),
+        for when the graph may have drifted from the state file.
+        """
+        changed = {}
+        for key, (nodes, edges) in parsed.items():
+            digest = fingerprint([nodes, edges])
+            if full or self.state.fingerprints.get(key) != digest:
+                changed[key] = {"fingerprint": digest, "nodes": nodes, "edges": edges}
+
+        if not changed and not full:
+            return Delta({})
+
+        sources = {**self.state.sources, **changed}
+        delta = Delta(sources)
+        delta.changed_sources = list(changed)
+
+        old_nodes, new_nodes = self.state.nodes(), self.state.nodes(sources)
+        old_edges, new_edges = self.state.edges(), self.state.edges(sources)
+
+        delta.delete_nodes = [i for i in old_nodes if i not in new_nodes]
+        delta.upsert_nodes = [
+            n for i, n in new_nodes.items()
+            if full or old_nodes.get(i) != n
+        ]
+
+        # removed edges, and moved ones: an edge whose type or endpoints
+        # changed would be merged in next to the old relationship
+        delta.delete_edges = [
+            e for i, e in old_edges.items()
+            if i not in new_edges or _relationship(new_edges[i]) != _relationship(e)
+        ]
+
+        # edges onto newly created nodes are (re)written too: the first time
+        # round their MATCH found nothing to attach to
+        added = {i for i in new_nodes if i not in old_nodes}
+        delta.upsert_edges = [
+            e for i, e in new_edges.items()
+            if full or old_edges.get(i) != e or e["source"] in added or e["target"] in added
+        ]
+
+        return delta
+
+    def apply(self, delta: Delta) -> Dict:
+        """Write the delta in one transaction and record the new state; returns the write report."""
+        report = {"node_seconds": 0.0, "edge_seconds": 0.0, "dangling_edges": []}
+
+        if delta:
+            storage = self.storage or make_storage(self.pool)
+            try:
+                report = storage.ingest(
+                    nodes=delta.upsert_nodes,
+                    edges=delta.upsert_edges,
+                    delete_node_ids=delta.delete_nodes,
+                    delete_edges=delta.delete_edges,
+                    batch_size=self.batch_size,
+                    replace=True,
+                )
+            finally:
+                if self.storage is None:
+                    storage.close()
+            LOAD_SECONDS.observe(report["node_seconds"], step="nodes")
+            LOAD_SECONDS.observe(report["edge_seconds"], step="edges")
+
+        # only once the transaction has committed: a failed write is retried
+        # in full next time
+        if delta.changed_sources:
+            self.state.sources = delta.sources
+            self.state.save()
+
+        return report
+
+    def sync(self, parsed: Dict[str, Parsed], full: bool = False) -> Dict:
+        start = time.perf_counter()
+        delta = self.plan(parsed, full=full)
+        report = self.apply(delta)
+
+        # listeners (snapshot, caches) only hear about reloads that changed something
+        if delta:
+            notify_reload(list(self.state.nodes().values()), list(self.state.edges().values()))
+
+        stats = {
+            **delta.counts(),
+            **report,
+            "changed_sources": delta.changed_sources,
+            "seconds": time.perf_counter() - start,
+        }
+        return stats
@@ -0,0 +1,382 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from dotenv import load_dotenv
+from graph.driver import get_pool
+from graph.engine import BACKEND
+from graph.sync import GraphSync, source_key
+
+load_dotenv()
+
+# quiet period after the last change before a source is re-parsed; editors and
+# git checkouts write a file in several steps
+DEBOUNCE = float(os.getenv("DOCKGRAPH_WATCH_DEBOUNCE", 0.3))  # seconds
+# a steady stream of writes still gets synced after this long
+MAX_DELAY = float(os.getenv("DOCKGRAPH_WATCH_MAX_DELAY", 1.0))
+POLL_INTERVAL = float(os.getenv("DOCKGRAPH_WATCH_POLL", 0.5))
+# a failed write is retried after RETRY_DELAY, doubling up to RETRY_MAX_DELAY
+RETRY_DELAY = float(os.getenv("DOCKGRAPH_WATCH_RETRY", 1.0))
+RETRY_MAX_DELAY = float(os.getenv("DOCKGRAPH_WATCH_RETRY_MAX", 60.0))
+
+
+def _tree_dirs(root: str) -> Iterator[str]:
+    # the directories connectors search (DockerComposeConnector skips the same)
+    for directory, dirs, _ in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "node_modules")
+        yield directory
+
+
+class Watcher(ABC):
+    """
+    Reports which of a set of files changed, and any entry added or removed
+    anywhere under the root directories (where new input files can appear).
+    """
+
+    def __init__(self, paths: Iterable[str], roots: Iterable[str] = ()):
+        self.paths: Set[str] = {os.path.abspath(p) for p in paths}
+        self.roots: Set[str] = {os.path.abspath(r) for r in roots if os.path.isdir(r)}
+
+    def in_tree(self, path: str) -> bool:
+        return any(path == r or path.startswith(r + os.sep) for r in self.roots)
+
+    def update(self, paths: Iterable[str]):
+        """Replace the watched files, e.g. after a project appeared under a root."""
+        self.paths = {os.path.abspath(p) for p in paths}
+
+    @abstractmethod
+    def changes(self, timeout: float) -> Set[str]:
+        """Block for up to timeout seconds; the watched paths that changed."""
+        pass
+
+    def close(self):
+        pass
+
+
+# <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux inotify through libc. Watches the parent directories rather than
+    the files, so editors that save by writing a temp file and renaming it
+    over the original are still seen. Roots are watched directory by
+    directory, and directories created under them are added as they appear.
+    """
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, paths: Iterable[str], roots: Iterable[str] = ()):
+        super().__init__(paths, roots)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        # raises AttributeError where libc has no inotify (macOS, Windows)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.dirs: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+        try:
+            for directory in {os.path.dirname(p) for p in self.paths}:
+                self._watch(directory)
+            for root in self.roots:
+                self._watch_tree(root)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch(self, directory: str):
+        if directory in self._wds:
+            return
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.dirs[wd] = directory
+        self._wds[directory] = wd
+
+    def _watch_tree(self, root: str):
+        for directory in _tree_dirs(root):
+            self._watch(directory)
+
+    def update(self, paths: Iterable[str]):
+        super().update(paths)
+        for directory in {os.path.dirname(p) for p in self.paths}:
+            try:
+                self._watch(directory)
+            except OSError as e:
+                print(f"cannot watch {directory}: {e}")
+
+    def changes(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_IGNORED:
+                # the directory itself was deleted or moved away
+                directory = self.dirs.pop(wd, None)
+                self._wds.pop(directory, None)
+                continue
+
+            path = os.path.join(self.dirs.get(wd, ""), os.fsdecode(name))
+            if path in self.paths:
+                changed.add(path)
+            elif self.in_tree(path):
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # a new project directory: watch it and whatever it already holds
+                    try:
+                        self._watch_tree(path)
+                    except OSError:
+                        pass  # already gone again
+                changed.add(path)
+
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher(Watcher):
+    """
+    Portable fallback: compares each file's mtime, size and inode. Under the
+    roots it compares every directory's, which changes when an entry is
+    added to or removed from it.
+    """
+
+    def __init__(self, paths: Iterable[str], roots: Iterable[str] = (), interval: float = POLL_INTERVAL):
+        super().__init__(paths, roots)
+        self.interval = interval
+        self.seen = {p: self._signature(p) for p in self.paths}
+        self.dirs = {d: self._signature(d) for root in self.roots for d in _tree_dirs(root)}
+
+    def update(self, paths: Iterable[str]):
+        super().update(paths)
+        self.seen = {p: self.seen[p] if p in self.seen else self._signature(p) for p in self.paths}
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _tree_changes(self) -> Set[str]:
+        changed = set()
+        for directory, seen in list(self.dirs.items()):
+            signature = self._signature(directory)
+            if signature == seen:
+                continue
+            changed.add(directory)
+            if signature is None:
+                del self.dirs[directory]
+                continue
+            self.dirs[directory] = signature
+            for d in _tree_dirs(directory):
+                if d not in self.dirs:
+                    self.dirs[d] = self._signature(d)
+                    changed.add(d)
+        return changed
+
+    def changes(self, timeout: float) -> Set[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._tree_changes()
+            for path in self.paths:
+                signature = self._signature(path)
+                if signature != self.seen[path]:
+                    self.seen[path] = signature
+                    changed.add(path)
+
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+
+def make_watcher(paths: Iterable[str], roots: Iterable[str] = ()) -> Watcher:
+    paths, roots = list(paths), list(roots)
+    # DOCKGRAPH_WATCH_POLLING=true forces polling, e.g. for network filesystems
+    if os.getenv("DOCKGRAPH_WATCH_POLLING", "false").lower() != "true":
+        try:
+            return InotifyWatcher(paths, roots)
+        except (AttributeError, OSError) as e:
+            print(f"inotify unavailable ({e}), polling for changes instead")
+    return PollingWatcher(paths, roots)
+
+
+class IngestDaemon:
+    """
+    Keeps the graph in step with the connector input files: when a file
+    changes, only its connector is re-parsed and the difference is applied
+    through GraphSync, which also notifies reload listeners (query caches,
+    snapshots, the intent router).
+    """
+
+    def __init__(self, connectors: List = None, sync: GraphSync = None, watcher: Watcher = None,
+                 debounce: float = DEBOUNCE, max_delay: float = MAX_DELAY,
+                 retry_delay: float = RETRY_DELAY, max_retry_delay: float = RETRY_MAX_DELAY):
+        if connectors is None:
+            from graph.load_graph import default_connectors
+            connectors = default_connectors()
+
+        self.connectors = connectors
+        self.by_path = {os.path.abspath(p): c for c in connectors for p in c.paths()}
+        # directories searched by a connector, where its input files come and go
+        self.roots = [(os.path.abspath(r), c) for c in connectors for r in c.roots()]
+        self.sync = sync or GraphSync(pool=get_pool() if BACKEND == "neo4j" else None)
+        self.watcher = watcher or make_watcher(self.by_path, [r for r, _ in self.roots])
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        # connectors whose changes have not been written yet, by id
+        self.pending: Dict[int, object] = {}
+        self._backoff = retry_delay
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync_sources(self, connectors: List) -> Optional[Dict]:
+        parsed = {}
+        for connector in connectors:
+            try:
+                parsed[source_key(connector)] = connector.parse()
+            except Exception as e:
+                # half-written or invalid file: keep serving the last good graph
+                print(f"skipping {connector.path}: {e}")
+
+        if not parsed:
+            return None
+
+        stats = self.sync.sync(parsed)
+        print(
+            f"synced {', '.join(parsed)}: "
+            f"+{stats['nodes_upserted']}/-{stats['nodes_deleted']} nodes, "
+            f"+{stats['edges_upserted']}/-{stats['edges_deleted']} edges "
+            f"({len(stats['dangling_edges'])} dangling) in {stats['seconds']:.3f}s"
+        )
+        return stats
+
+    def _collect(self, changed: Set[str]) -> Set[str]:
+        # wait for the burst to settle, but not forever
+        deadline = time.monotonic() + self.max_delay
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = self.watcher.changes(min(self.debounce, remaining))
+            if not more:
+                break
+            changed |= more
+        return changed
+
+    def _rescan(self, connector) -> bool:
+        """List a connector's files again; whether any were added or removed."""
+        old = {p for p, c in self.by_path.items() if c is connector}
+        try:
+            new = {os.path.abspath(p) for p in connector.paths()}
+        except OSError as e:
+            print(f"cannot list {connector.path}: {e}")
+            return False
+        if new == old:
+            return False
+
+        for path in old - new:
+            del self.by_path[path]
+        for path in new - old:
+            self.by_path[path] = connector
+        self.watcher.update(self.by_path)
+        return True
+
+    def _sync_pending(self):
+        try:
+            self.sync_sources(list(self.pending.values()))
+        except Exception as e:
+            # Neo4j unavailable, ingest rolled back, ...: the graph still holds
+            # the last committed load, so keep the sources pending and retry
+            print(f"sync failed, retrying in {self._backoff:.1f}s: {e}")
+            self._retry_at = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, self.max_retry_delay)
+            return
+
+        self.pending.clear()
+        self._backoff = self.retry_delay
+
+    def run(self):
+        # catch up on anything that changed while nobody was watching
+        self.pending = {id(c): c for c in self.connectors}
+
+        while not self._stop.is_set():
+            timeout = 0.5
+            if self.pending:
+                wait = self._retry_at - time.monotonic()
+                if wait <= 0:
+                    self._sync_pending()
+                    continue
+                timeout = min(timeout, wait)
+
+            changed = self.watcher.changes(timeout=timeout)
+            if not changed:
+                continue
+
+            changed = self._collect(changed)
+            # a connector reading several of the changed files is parsed once
+            for path in sorted(changed):
+                if path in self.by_path:
+                    connector = self.by_path[path]
+                    self.pending[id(connector)] = connector
+            # a project added or removed under a connector's directory
+            for root, connector in self.roots:
+                if any(p == root or p.startswith(root + os.sep) for p in changed) and self._rescan(connector):
+                    self.pending[id(connector)] = connector
+
+        self.watcher.close()
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, name="dockgraph-ingest", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+    daemon = IngestDaemon()
+    print(f"watching {', '.join(daemon.by_path)} ({type(daemon.watcher).__name__})")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,50 @@
+import pytest
+from benchmarks.estate import layers, write_estate
+from connectors.docker_compose import DockerComposeConnector
+from connectors.teams import TeamsConnector
+
+
+def test_estate_has_the_requested_shape(tmp_path):
+    estate = write_estate(str(tmp_path), services=100, fan_out=2, depth=4)
+    nodes, edges = DockerComposeConnector(estate["compose"]).parse()
+    by_type = {}
+    for n in nodes:
+        by_type[n["type"]] = by_type.get(n["type"], 0) + 1
+
+    assert by_type == {"service": 100, "database": 20, "cache": 2}
+    # every layer but the last calls fan_out services of the next one
+    assert [len(tier) for tier in layers(100, 4)] == [25, 25, 25, 25]
+    assert sum(e["type"] == "calls" for e in edges) == 75 * 2
+
+    team_nodes, team_edges = TeamsConnector(estate["teams"]).parse()
+    ids = {n["id"] for n in nodes}
+    assert len(team_nodes) == 5 and all(e["target"] in ids for e in team_edges)
+
+
+def test_suite_smoke(monkeypatch):
+    from benchmarks.suite import run
+    from connectors import yaml_loader
+    from graph.local import close_local_graph
+
+    # the graph modules are already imported (with the default backend) here
+    for module in ("graph.engine", "graph.sync"):
+        monkeypatch.setattr(f"{module}.BACKEND", "local")
+    monkeypatch.setattr("graph.engine.QUERY_ENGINE", "local")
+    monkeypatch.setattr("graph.sync._memory_state", None)
+    monkeypatch.setattr(yaml_loader, "CACHE_DIR", "")
+    close_local_graph()
+
+    try:
+        results = run(services=50, queries=5, chats=0, workers=1)
+    finally:
+        close_local_graph()
+
+    assert set(results) == {"estate", "environment", "load", "queries", "chat"}
+    assert results["estate"]["services"] == 50 and results["chat"] is None
+    assert results["load"]["nodes"] > 50 and results["load"]["dangling_edges"] == 0
+    for name in ("downstream", "upstream", "path", "blast_radius"):
+        assert results["queries"][name]["count"] == 5
+        assert {"mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"} <= set(results["queries"][name])
+
+    with pytest.raises(ValueError, match="neo4j-uri"):
+        run(services=5, backend="neo4j")
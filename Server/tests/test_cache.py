@@ -0,0 +1,68 @@
+from chat.cache import Cache, MISS, cached_tools, get_cache
+from graph.query import create_tools
+from graph.events import notify_reload
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_are_normalized():
+    cache = Cache()
+    cache.put("downstream", {"node_id": " service:api ", "filters": None}, ["x"])
+
+    assert cache.get("downstream", {"node_id": "service:api"}) == ["x"]
+    assert cache.get("upstream", {"node_id": "service:api"}) is MISS
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cached_tools_skip_the_engine():
+    calls = []
+
+    class Engine:
+        def get_owner(self, node_id):
+            calls.append(node_id)
+            return {"id": "team:" + node_id}
+
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    cache = Cache()
+    tools = {t.name: t for t in cached_tools(create_tools(Engine()), cache)}
+
+    assert tools["get_owner"].invoke({"node_id": "service:a"}) == {"id": "team:service:a"}
+    assert tools["get_owner"].invoke({"node_id": "service:a"}) == {"id": "team:service:a"}
+    tools["get_owner"].invoke({"node_id": "service:b"})
+
+    assert calls == ["service:a", "service:b"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_lru_eviction_and_ttl():
+    clock = Clock()
+    cache = Cache(max_size=2, ttl=10, clock=clock)
+    cache.put("get_node", {"node_id": "a"}, 1)
+    cache.put("get_node", {"node_id": "b"}, 2)
+    cache.get("get_node", {"node_id": "a"})
+    cache.put("get_node", {"node_id": "c"}, 3)
+
+    assert cache.get("get_node", {"node_id": "b"}) is MISS
+    assert cache.stats()["evictions"] == 1
+
+    clock.now = 11
+    assert cache.get("get_node", {"node_id": "a"}) is MISS
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidated_on_reload():
+    cache = get_cache()
+    cache.put("get_node", {"node_id": "a"}, None)
+    assert cache.get("get_node", {"node_id": "a"}) is None
+
+    notify_reload([], [])
+    assert cache.get("get_node", {"node_id": "a"}) is MISS
@@ -0,0 +1,132 @@
+import json
+import re
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class StubChatModel(BaseChatModel):
+    """Calls blast_radius on the node named in the question, then answers in two tokens."""
+
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages):
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        last = messages[-1]
+        if isinstance(last, HumanMessage):
+            node_id = re.search(r"\w+:[\w./\-]+", last.content).group(0)
+            return None, {"name": "blast_radius", "args": {"node_id": node_id}, "id": f"call-{len(messages)}"}
+        return ["It is ", "contained."], None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens, call = self._reply(messages)
+        message = AIMessage(content="", tool_calls=[call]) if call else AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens, call = self._reply(messages)
+        if call:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0},
+            ]))
+            return
+        for token in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def events(response):
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        parsed.append({"event": name.removeprefix("event: "), **json.loads(data.removeprefix("data: "))})
+    return parsed
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "unused")
+    monkeypatch.setattr("graph.engine.QUERY_ENGINE", "snapshot")
+    monkeypatch.setattr("api.chat.QUERY_ENGINE", "snapshot")
+    from fastapi.testclient import TestClient
+    from langchain.agents import create_agent
+    from api.chat import app
+    from chat.nlp import SYSTEM_PROMPT
+
+    def use_model(model):
+        runtime = app.state.runtime
+        runtime.agent = create_agent(model=model, tools=runtime.tools, system_prompt=SYSTEM_PROMPT)
+
+    with TestClient(app) as test_client:
+        test_client.use_model = use_model
+        yield test_client
+
+
+def test_routed_question_short_circuits_the_agent(client):
+    client.use_model(StubChatModel(fail=True))  # must not be called
+    response = client.post("/chat/stream", params={"prompt": "who owns orders-db"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    stream = events(response)
+    assert [e["event"] for e in stream] == ["session", "tool_start", "tool_end", "result"]
+    assert stream[1]["tool"] == "get_owner"
+    assert stream[3]["result"]["data"] == ["orders-team"]
+
+
+def test_agent_events_arrive_in_order(client):
+    client.use_model(StubChatModel())
+    response = client.post("/chat/stream", params={"prompt": "give me an overview of database:orders-db"})
+    stream = events(response)
+    kinds = [e["event"] for e in stream]
+
+    assert kinds[0] == "session" and kinds[-1] == "result"
+    assert kinds.index("tool_start") < kinds.index("tool_end") < kinds.index("token")
+    assert "".join(e["text"] for e in stream if e["event"] == "token") == "It is contained."
+
+    tool_end = stream[kinds.index("tool_end")]
+    assert tool_end["tool"] == "blast_radius" and tool_end["result"]["type"] == "blast_radius"
+    # answered from the tool result, without the formatter model
+    assert stream[-1]["result"] == tool_end["result"]
+
+    # the turn is kept for the next question in the conversation
+    session = client.app.state.sessions.load(stream[0]["conversation_id"])
+    assert len(session.turns()) == 2
+
+
+def test_failures_end_the_stream_with_an_error_event(client):
+    client.use_model(StubChatModel(fail=True))
+    stream = events(client.post("/chat/stream", params={"prompt": "give me an overview of database:orders-db"}))
+
+    assert [e["event"] for e in stream] == ["session", "error"]
+    assert "model unavailable" in stream[1]["message"]
+
+    stream = events(client.post("/chat/stream", params={"prompt": ""}))
+    assert [e["event"] for e in stream] == ["session", "error"]
+
+
+def test_shutdown_releases_the_runtime(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "unused")
+    monkeypatch.setattr("graph.engine.QUERY_ENGINE", "snapshot")
+    monkeypatch.setattr("api.chat.QUERY_ENGINE", "snapshot")
+    from fastapi.testclient import TestClient
+    from api.chat import app
+    from chat import nlp
+    from graph import events
+
+    with TestClient(app):
+        first = app.state.runtime
+        assert nlp._runtimes[id(app.state.engine)] is first
+
+    assert id(app.state.engine) not in nlp._runtimes
+    assert first._reset_router not in events._listeners
+
+    with TestClient(app):
+        assert app.state.runtime is not first
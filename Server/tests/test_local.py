@@ -0,0 +1,104 @@
+import pytest
+from graph.local import LocalGraph, LocalQueryEngine, LocalStorage
+from graph.snapshot import SnapshotQueryEngine
+from graph.sync import GraphSync, SyncState
+from tests.test_runner import connectors
+
+
+def parsed():
+    return {type(c).__name__: c.parse() for c in connectors()}
+
+
+def loaded(tmp_path, path=""):
+    graph = LocalGraph(path)
+    sync = GraphSync(state=SyncState(str(tmp_path / "state.json")), storage=LocalStorage(graph))
+    return graph, sync.sync(parsed())
+
+
+def ids(nodes):
+    return sorted(n["id"] for n in nodes)
+
+
+def test_queries_match_the_snapshot_engine(tmp_path):
+    graph, _ = loaded(tmp_path)
+    local = LocalQueryEngine(graph)
+    outputs = parsed().values()
+    expected = SnapshotQueryEngine(
+        [n for nodes, _ in outputs for n in nodes],
+        [e for _, edges in outputs for e in edges],
+        subscribe=False,
+    )
+
+    for node_id in ("service:order-service", "database:orders-db", "team:platform-team"):
+        assert ids(local.downstream(node_id)) == ids(expected.downstream(node_id))
+        assert ids(local.upstream(node_id, "service")) == ids(expected.upstream(node_id, "service"))
+        assert local.get_owner(node_id) == expected.get_owner(node_id)
+        assert local.blast_radius(node_id, depth=3) == expected.blast_radius(node_id, depth=3)
+    assert local.path("service:api-gateway", "database:orders-db") == expected.path("service:api-gateway", "database:orders-db")
+    assert local.get_nodes("database") == expected.get_nodes("database")
+
+
+def test_ingest_reports_dangling_edges_and_persists(tmp_path):
+    path = str(tmp_path / "graph.db")
+    graph, stats = loaded(tmp_path, path)
+    assert stats["dangling_edges"] == [] and stats["edges_upserted"] == 28
+
+    report = LocalStorage(graph).ingest(edges=[
+        {"id": "e", "type": "owns", "source": "team:platform-team", "target": "service:gone", "properties": {}},
+    ])
+    assert report["edges_upserted"] == 0
+    assert report["dangling_edges"][0]["missing"] == ["service:gone"]
+    snapshot = graph.snapshot()
+    graph.close()
+
+    reopened = LocalGraph(path)
+    assert sorted(reopened.snapshot().ids) == sorted(snapshot.ids)
+    assert reopened.snapshot().edge_count == snapshot.edge_count
+
+    # DETACH DELETE
+    storage = LocalStorage(reopened)
+    storage.delete_nodes(["database:orders-db"])
+    assert storage.get_node("database:orders-db") is None
+    assert all("database:orders-db" not in (k[0], k[3]) for k in reopened.edges)
+
+
+def test_failed_transaction_leaves_the_graph_untouched(tmp_path, monkeypatch):
+    graph, _ = loaded(tmp_path, str(tmp_path / "graph.db"))
+    before = (dict(graph.nodes), set(graph.edges), graph.snapshot())
+
+    def fail(tx):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(graph, "_persist", fail)
+    with pytest.raises(OSError):
+        LocalStorage(graph).ingest(
+            nodes=[{"id": "service:new", "type": "service", "name": "new", "properties": {}}],
+            delete_node_ids=["database:orders-db"],
+        )
+
+    assert (dict(graph.nodes), set(graph.edges)) == before[:2]
+    # readers keep the version that was committed
+    assert graph.snapshot() is before[2]
+
+
+def test_a_query_reads_one_snapshot_while_writes_commit(tmp_path, monkeypatch):
+    graph, _ = loaded(tmp_path)
+    local = LocalQueryEngine(graph)
+    node_id = "database:orders-db"
+    before = local.blast_radius(node_id, depth=3)
+
+    real = graph.snapshot
+    reads = []
+
+    def snapshot_then_commit():
+        snapshot = real()
+        reads.append(snapshot)
+        if len(reads) == 1:
+            # an ingest commits right after the query took its snapshot,
+            # shifting every index after the deleted node
+            LocalStorage(graph).delete_nodes([snapshot.ids[0]])
+        return snapshot
+
+    monkeypatch.setattr(graph, "snapshot", snapshot_then_commit)
+    assert local.blast_radius(node_id, depth=3) == before
+    assert len(reads) == 1
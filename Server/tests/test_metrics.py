@@ -0,0 +1,77 @@
+import pytest
+from graph.metrics import Counter, Histogram, Metric
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("test_seconds", "Test latency.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        h.observe(value, stage="agent")
+
+    lines = h.render().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test latency.", "# TYPE test_seconds histogram"]
+    assert lines[2:] == [
+        'test_seconds_bucket{stage="agent",le="0.1"} 1',
+        'test_seconds_bucket{stage="agent",le="1.0"} 3',
+        'test_seconds_bucket{stage="agent",le="+Inf"} 4',
+        'test_seconds_sum{stage="agent"} 4.05',
+        'test_seconds_count{stage="agent"} 4',
+    ]
+
+
+def test_counter_checks_its_labels():
+    c = Counter("test_total", "Test counter.", ["model", "kind"])
+    c.inc(12, model='gpt "oss"', kind="input")
+
+    assert c.render().splitlines()[-1] == 'test_total{model="gpt \\"oss\\"",kind="input"} 12'
+    try:
+        c.inc(kind="input")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("missing label accepted")
+
+
+def test_agent_run_counts_tokens_and_tool_calls(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "unused")
+    from langchain_core.callbacks import UsageMetadataCallbackHandler
+    from langchain_core.messages import AIMessage, ToolMessage
+    from chat.nlp import LLM_TOKENS, TOOL_CALLS, record_agent_run
+
+    usage = UsageMetadataCallbackHandler()
+    usage.usage_metadata = {"stub-model": {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}}
+    before = LLM_TOKENS.value(model="stub-model", kind="input"), TOOL_CALLS.value(tool="upstream", caller="agent")
+
+    record_agent_run(usage, [
+        AIMessage(content="", tool_calls=[{"id": "1", "name": "upstream", "args": {"node_id": "database:orders-db"}}]),
+        ToolMessage(content="[]", name="upstream", tool_call_id="1"),
+        AIMessage(content="nothing depends on it"),
+    ])
+
+    assert LLM_TOKENS.value(model="stub-model", kind="input") == before[0] + 120
+    assert TOOL_CALLS.value(tool="upstream", caller="agent") == before[1] + 1
+
+
+def test_metrics_endpoint_reports_chat_stages(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "unused")
+    monkeypatch.setattr("graph.engine.QUERY_ENGINE", "snapshot")
+    monkeypatch.setattr("api.chat.QUERY_ENGINE", "snapshot")
+    from fastapi.testclient import TestClient
+    from api.chat import app
+
+    with TestClient(app) as client:
+        app.state.runtime.cache.invalidate()
+        client.post("/chat", params={"prompt": "who owns orders-db"})
+        response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE dockgraph_chat_stage_seconds histogram" in body
+    assert 'dockgraph_chat_stage_seconds_count{stage="route"}' in body
+    assert 'dockgraph_tool_calls_total{tool="get_owner",caller="router"}' in body
+    assert 'dockgraph_query_seconds_count{engine="SnapshotQueryEngine",method="get_owner"}' in body
+    assert 'dockgraph_cache_lookup_seconds_count{tool="get_owner",result="miss"}' in body
+
+
+def test_metric_is_abstract():
+    with pytest.raises(TypeError):
+        Metric("test_abstract", "No samples.")
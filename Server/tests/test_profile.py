@@ -0,0 +1,126 @@
+import random
+from graph.profile import QueryProfiler, plan_operators
+from graph.query import QueryEngine
+
+PLAN = {
+    "operatorType": "ProduceResults@neo4j", "dbHits": 0, "rows": 2, "args": {},
+    "children": [{
+        "operatorType": "VarLengthExpand(All)@neo4j", "dbHits": 40, "rows": 2,
+        "args": {"Details": "(start)-[anon_0*..10]->(n)"},
+        "children": [{
+            "operatorType": "NodeIndexSeek@neo4j", "dbHits": 2, "rows": 1,
+            "args": {"Details": "RANGE INDEX start:Entity(id) WHERE id = $id"}, "children": [],
+        }],
+    }],
+}
+
+
+class Summary:
+    def __init__(self, profile):
+        self.profile = profile
+
+
+class Result:
+    def __init__(self, records, profile):
+        self.records = records
+        self.profile = profile
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def consume(self):
+        return Summary(self.profile)
+
+
+class Driver:
+    """Answers every query with two rows; PROFILE queries also get PLAN."""
+
+    def __init__(self):
+        self.queries = []
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params):
+        self.queries.append((query, params))
+        rows = [{"props": {"id": "service:a"}, "type": "service"}, {"props": {"id": "database:b"}, "type": "database"}]
+        return Result(rows, PLAN if query.startswith("PROFILE") else None)
+
+
+def engine(profiler):
+    # skip __init__: it connects to Neo4j and creates the schema
+    qe = QueryEngine.__new__(QueryEngine)
+    qe.driver = Driver()
+    qe.profiler = profiler
+    return qe
+
+
+def test_plan_operators_flatten_depth_first():
+    operators = plan_operators(PLAN)
+
+    assert [op["operator"] for op in operators] == ["ProduceResults", "VarLengthExpand(All)", "NodeIndexSeek"]
+    assert sum(op["db_hits"] for op in operators) == 42
+
+
+def test_sampled_queries_run_with_profile():
+    profiler = QueryProfiler(enabled=True, sample_rate=1.0, slow_ms=1e9)
+    qe = engine(profiler)
+
+    assert [n["id"] for n in qe.downstream("service:api")] == ["service:a", "database:b"]
+    query, params = qe.driver.queries[-1]
+    assert query.startswith("PROFILE") and params == {"id": "service:api"}
+
+    report = profiler.report()
+    assert report["methods"]["downstream"]["db_hits"] == 42
+    assert report["profiles"][0]["rows"] == 2
+    assert report["profiles"][0]["parameters"] == {"id": "service:api"}
+    assert report["profiles"][0]["operators"][1]["operator"] == "VarLengthExpand(All)"
+
+
+def test_disabled_profiler_runs_queries_untouched():
+    profiler = QueryProfiler(enabled=False, sample_rate=1.0)
+    qe = engine(profiler)
+
+    qe.get_owner("database:orders-db")
+
+    assert not qe.driver.queries[-1][0].startswith("PROFILE")
+    assert profiler.report()["methods"] == {}
+
+
+def test_slow_queries_are_logged_with_parameters(capsys):
+    profiler = QueryProfiler(enabled=True, sample_rate=0.5, slow_ms=0, keep=3, rng=random.Random(1))
+    qe = engine(profiler)
+
+    for i in range(5):
+        qe.upstream(f"service:svc-{i}")
+
+    report = profiler.report(limit=2)
+    assert report["methods"]["upstream"]["queries"] == 5
+    assert report["methods"]["upstream"]["slow"] == 5
+    assert [q["parameters"]["id"] for q in report["slow_queries"]] == ["service:svc-4", "service:svc-3"]
+    assert "slow query: upstream" in capsys.readouterr().out
+
+
+def test_admin_profiles_need_a_configured_token(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "unused")
+    monkeypatch.setattr("graph.engine.QUERY_ENGINE", "snapshot")
+    monkeypatch.setattr("api.chat.QUERY_ENGINE", "snapshot")
+    from fastapi.testclient import TestClient
+    from api.chat import app
+
+    with TestClient(app) as client:
+        # no token configured: not served at all
+        monkeypatch.setattr("api.chat.ADMIN_TOKEN", "")
+        assert client.get("/admin/profiles").status_code == 404
+
+        monkeypatch.setattr("api.chat.ADMIN_TOKEN", "s3cret")
+        assert client.get("/admin/profiles").status_code == 403
+        assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        response = client.get("/admin/profiles", headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 200 and "methods" in response.json()
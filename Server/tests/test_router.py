@@ -0,0 +1,108 @@
+import os
+import pytest
+from chat.router import IntentRouter
+from chat.formatter import format_tool_result
+from graph.snapshot import SnapshotQueryEngine
+
+node_ids = [
+    "service:api-gateway",
+    "service:auth-service",
+    "service:payment-service",
+    "database:payments-db",
+    "database:users-db",
+    "cache:redis-main",
+    "team:payments-team",
+]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Who owns the auth service?", ("get_owner", {"node_id": "service:auth-service"})),
+    ("who owns paymnet-service", ("get_owner", {"node_id": "service:payment-service"})),
+    ("What services depend on redis?", ("upstream", {"node_id": "cache:redis-main", "filters": "service"})),
+    ("what does api-gateway depend on", ("downstream", {"node_id": "service:api-gateway"})),
+    ("What breaks if payments-db goes down?", ("blast_radius", {"node_id": "database:payments-db"})),
+    ("path from api gateway to users db", ("path", {"from_id": "service:api-gateway", "to_id": "database:users-db"})),
+    ("what does payments-team own", ("get_owned_by_team", {"node_id": "team:payments-team"})),
+])
+def test_routes_known_shapes(query, expected):
+    assert IntentRouter(node_ids).route(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "What breaks if postgres goes down?",  # unknown entity
+    "who owns s",                          # too vague to resolve
+    "summarize the architecture for me",   # not a known shape
+])
+def test_falls_back_when_unsure(query):
+    assert IntentRouter(node_ids).route(query) is None
+
+
+def test_formats_tool_results():
+    qe = SnapshotQueryEngine.from_connectors(subscribe=False)
+
+    out = format_tool_result("get_owner", {"node_id": "database:orders-db"}, qe.get_owner("database:orders-db"))
+    assert (out.type, out.data) == ("list", ["orders-team"])
+
+    args = {"from_id": "service:api-gateway", "to_id": "database:payments-db"}
+    out = format_tool_result("path", args, qe.path(**args))
+    assert out.type == "path" and out.data[0] == "api-gateway"
+
+    out = format_tool_result("blast_radius", {"node_id": "database:payments-db"}, qe.blast_radius("database:payments-db"))
+    assert out.type == "blast_radius" and "payments-team" in out.data["teams"]
+
+
+def test_fast_path_skips_the_llm(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", os.getenv("GROQ_API_KEY", "unused"))
+    from chat.nlp import NLP
+
+    nlp = NLP(engine=SnapshotQueryEngine.from_connectors(subscribe=False))
+    out = nlp.llm_agent("who owns orders-db?")
+
+    assert (out.type, out.data) == ("list", ["orders-team"])
+    assert len(nlp.history) == 2
+
+
+def tool_turn(question, tool_name, args, answer):
+    """A question answered with one real tool call, as the agent leaves it in the history."""
+    from langchain_core.messages import AIMessage, HumanMessage
+    from graph.query import create_tools
+
+    tools = {t.name: t for t in create_tools(SnapshotQueryEngine.from_connectors(subscribe=False))}
+    call = {"type": "tool_call", "id": f"call-{tool_name}", "name": tool_name, "args": args}
+    return [
+        HumanMessage(content=question),
+        AIMessage(content="", tool_calls=[call]),
+        tools[tool_name].invoke(call),
+        AIMessage(content=answer),
+    ]
+
+
+def test_formats_from_the_agents_last_tool_call():
+    from langchain_core.messages import AIMessage, HumanMessage
+    from chat.formatter import format_from_messages
+
+    messages = tool_turn("who owns payments-db", "get_owner", {"node_id": "database:payments-db"}, "payments-team owns it") + [
+        HumanMessage(content="thanks, what is a blast radius?"),
+        AIMessage(content="It is everything affected when a node fails."),
+    ]
+
+    # the second question used no tools: leave it to the LLM formatter
+    assert format_from_messages(messages) is None
+
+    out = format_from_messages(messages[:4])
+    assert (out.type, out.message, out.data) == ("list", "Owner of payments-db", ["payments-team"])
+
+
+def test_formats_list_tool_output():
+    from chat.formatter import format_from_messages
+
+    # LangChain keeps these results as list content rather than JSON
+    path = tool_turn("route from the gateway to payments-db", "path",
+                     {"from_id": "service:api-gateway", "to_id": "database:payments-db"}, "via payment-service")
+    assert isinstance(path[2].content, list)
+    out = format_from_messages(path)
+    assert (out.type, out.data) == ("path", ["api-gateway", "payment-service", "payments-db"])
+
+    empty = tool_turn("what does orders-db depend on", "downstream", {"node_id": "database:orders-db"}, "nothing")
+    assert empty[2].content == []
+    assert format_from_messages(empty) is not None
@@ -0,0 +1,61 @@
+import os
+from connectors.docker_compose import DockerComposeConnector
+from connectors.teams import TeamsConnector
+from graph.runner import ConnectorRunner
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+class RecordingStorage:
+    """Stands in for GraphStorage; records whether each edge's endpoints existed when it was written."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.edges = []
+
+    def upsert_nodes(self, nodes, batch_size=1000, replace=False):
+        for node in nodes:
+            self.nodes[node["id"]] = node
+        return len(nodes)
+
+    def upsert_edges(self, edges, batch_size=1000):
+        for edge in edges:
+            known = edge["source"] in self.nodes and edge["target"] in self.nodes
+            self.edges.append((edge["id"], known))
+        return len(edges)
+
+
+def connectors():
+    return [
+        TeamsConnector(os.path.join(DATA, "teams.yaml")),
+        DockerComposeConnector(os.path.join(DATA, "docker-compose.yml")),
+    ]
+
+
+def test_parallel_parse_matches_serial():
+    serial = ConnectorRunner(connectors(), workers=1).parse_all()
+    parallel = ConnectorRunner(connectors(), workers=2).parse_all()
+
+    assert parallel == serial
+    assert len(serial) == 2
+
+
+def test_directory_connector_is_split_across_workers(tmp_path, monkeypatch):
+    from connectors import yaml_loader
+
+    monkeypatch.setattr(yaml_loader, "CACHE_DIR", "")
+    services = "".join(f"  svc-{j}:\n    environment:\n      - DB=postgres://db:5432\n" for j in range(100))
+    for i in range(16):
+        (tmp_path / f"project-{i}").mkdir()
+        (tmp_path / f"project-{i}" / "compose.yaml").write_text(
+            f"services:\n{services}  db:\n    image: postgres\n", encoding="utf-8",
+        )
+    connector = DockerComposeConnector(str(tmp_path))
+    assert len(connector.units()) == 16
+
+    runner = ConnectorRunner([connector], workers=4)
+    assert runner.parse_all() == ConnectorRunner([connector], workers=1).parse_all()
+    assert list(runner.parsed.values())[0] == connector.parse()
+
+    timing = list(runner.timings.values())[0]
+    assert timing["units"] == 16 and timing["workers"] > 1
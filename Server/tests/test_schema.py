@@ -0,0 +1,54 @@
+from graph import schema
+
+
+class Record:
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return self._data
+
+
+class Result(list):
+    def consume(self):
+        return None
+
+
+class Driver:
+    """Counts the statements run against it; every index is ONLINE."""
+
+    def __init__(self):
+        self.queries = []
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params=None):
+        self.queries.append(query)
+        if "SHOW INDEXES" in query:
+            return Result([Record({"name": "entity_id_unique", "labelsOrTypes": ["Entity"],
+                                   "properties": ["id"], "state": "ONLINE"})])
+        return Result()
+
+
+def test_schema_is_bootstrapped_once_per_process(monkeypatch):
+    monkeypatch.setattr(schema, "_schema", None)
+    first = Driver()
+    status = schema.ensure_schema(first)
+    assert status[0]["state"] == "ONLINE"
+    assert any("awaitIndexes" in q for q in first.queries)
+
+    # later engines reuse the report: no DDL, no SHOW INDEXES, no wait
+    second = Driver()
+    assert schema.ensure_schema(second) == status
+    assert second.queries == []
+
+    forced = Driver()
+    schema.ensure_schema(forced, force=True)
+    assert any("SHOW INDEXES" in q for q in forced.queries)
@@ -0,0 +1,98 @@
+import time
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from chat.session import InMemorySessionStore, Session, SQLiteSessionStore, estimate_tokens
+
+
+def exchange(n):
+    return [HumanMessage(content=f"question {n} " + "x" * 40), AIMessage(content=f"answer {n} " + "y" * 40)]
+
+
+def test_trim_keeps_newest_turns_within_budget():
+    messages = exchange(1) + exchange(2) + exchange(3)
+    session = Session(messages=messages, max_tokens=3 * estimate_tokens(messages[-1]))
+    history = session.messages
+
+    session.trim()
+
+    # trimmed in place, so the list handed to the agent stays current
+    assert history is session.messages
+    assert [m.content.split()[1] for m in history] == ["3", "3"]
+    assert isinstance(history[0], HumanMessage)
+
+
+def test_dropped_turns_are_summarized():
+    calls = []
+
+    def summarizer(summary, dropped):
+        calls.append((summary, len(dropped)))
+        return "talked about 1 and 2"
+
+    session = Session(messages=exchange(1) + exchange(2) + exchange(3), max_tokens=40)
+    session.trim(summarizer)
+
+    assert calls == [(None, 4)]
+    assert isinstance(session.messages[0], SystemMessage)
+    assert "talked about 1 and 2" in session.messages[0].content
+    assert len(session.turns()) == 2
+
+
+def test_memory_store_expires_idle_sessions():
+    store = InMemorySessionStore(ttl=60)
+    session = store.load(None)
+    session.messages.extend(exchange(1))
+    store.save(session)
+
+    assert store.load(session.id).turns() == session.turns()
+
+    store.sessions[session.id].updated_at = time.time() - 120
+    assert store.load(session.id).turns() == []
+    assert store.expire() == 1
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), summarizer=lambda s, d: "earlier")
+    session = store.load("conv-1")
+    session.max_tokens = 40
+    session.messages.extend(exchange(1) + exchange(2))
+    store.save(session)
+
+    loaded = store.load("conv-1")
+    assert loaded.summary == "earlier"
+    assert [m.content for m in loaded.turns()] == [m.content for m in session.turns()]
+
+    store.delete("conv-1")
+    assert store.load("conv-1").turns() == []
+    store.close()
+
+
+def test_api_keeps_conversation_history(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "unused")
+    monkeypatch.setattr("graph.engine.QUERY_ENGINE", "snapshot")
+    monkeypatch.setattr("api.chat.QUERY_ENGINE", "snapshot")
+    from fastapi.testclient import TestClient
+    from api.chat import app
+
+    with TestClient(app) as client:
+        first = client.post("/chat", params={"prompt": "who owns orders-db"}).json()
+        cid = first["conversation_id"]
+        client.post("/chat", params={"prompt": "what depends on orders-db", "conversation_id": cid})
+
+        session = app.state.sessions.load(cid)
+        assert len(session.turns()) == 4
+
+
+def test_memory_store_hands_out_independent_copies():
+    store = InMemorySessionStore()
+    session = store.load(None)
+    session.messages.extend(exchange(1))
+    store.save(session)
+
+    # two requests on the same conversation at once
+    first, second = store.load(session.id), store.load(session.id)
+    first.messages.extend(exchange(2))
+    second.messages.extend(exchange(3))
+
+    assert first.messages is not second.messages
+    assert [m.content.split()[1] for m in second.turns()] == ["1", "1", "3", "3"]
+    store.save(second)
+    assert store.load(session.id).turns() == second.turns()
@@ -0,0 +1,53 @@
+from graph.snapshot import SnapshotQueryEngine
+from graph.events import notify_reload
+
+nodes = [
+    {"id": "service:api", "type": "service", "name": "api", "properties": {}},
+    {"id": "service:orders", "type": "service", "name": "orders", "properties": {}},
+    {"id": "database:orders-db", "type": "database", "name": "orders-db", "properties": {}},
+    {"id": "team:orders-team", "type": "team", "name": "orders-team", "properties": {"lead": None}},
+]
+
+edges = [
+    {"id": "e1", "type": "calls", "source": "service:api", "target": "service:orders"},
+    {"id": "e2", "type": "reads_writes", "source": "service:orders", "target": "database:orders-db"},
+    {"id": "e3", "type": "owns", "source": "team:orders-team", "target": "database:orders-db"},
+    {"id": "e4", "type": "calls", "source": "service:api", "target": "service:missing"},
+]
+
+
+def ids(result):
+    return sorted(n["id"] for n in result)
+
+
+def test_traversals():
+    qe = SnapshotQueryEngine(nodes, edges, subscribe=False)
+
+    assert ids(qe.downstream("service:api")) == ["database:orders-db", "service:orders"]
+    assert ids(qe.downstream("service:api", "database")) == ["database:orders-db"]
+    assert ids(qe.upstream("database:orders-db")) == ["service:api", "service:orders", "team:orders-team"]
+    assert qe.path("service:api", "database:orders-db") == ["service:api", "service:orders", "database:orders-db"]
+    assert qe.path("database:orders-db", "service:api") == []
+
+
+def test_ownership_and_blast_radius():
+    qe = SnapshotQueryEngine(nodes, edges, subscribe=False)
+
+    assert qe.get_owner("database:orders-db")["id"] == "team:orders-team"
+    assert qe.get_owner("service:api") is None
+    assert "lead" not in qe.get_node("team:orders-team")["properties"]
+
+    br = qe.blast_radius("database:orders-db", limit=1)
+    assert [t["id"] for t in br["teams"]] == ["team:orders-team"]
+    assert br["truncated"] is True
+    assert len(br["upstream"]) == 1
+
+
+def test_refreshes_on_reload():
+    qe = SnapshotQueryEngine(nodes, edges)
+    try:
+        notify_reload(nodes[:1], [])
+        assert not qe.check_node_existence("service:orders")
+        assert qe.downstream("service:api") == []
+    finally:
+        qe.close()
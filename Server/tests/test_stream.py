@@ -0,0 +1,89 @@
+import os
+import pytest
+import yaml
+from connectors import yaml_loader
+from connectors.base import Connector
+from connectors.docker_compose import DockerComposeConnector
+from connectors.teams import TeamsConnector
+from graph.stream import stream_load
+from tests.test_docker_compose import estate
+from tests.test_runner import DATA, RecordingStorage
+
+
+def ordered(records):
+    nodes, edges = records
+    return sorted(nodes, key=lambda n: n["id"]), sorted(edges, key=lambda e: e["id"])
+
+
+@pytest.mark.parametrize("make", [
+    lambda tmp: TeamsConnector(os.path.join(DATA, "teams.yaml")),
+    lambda tmp: DockerComposeConnector(os.path.join(DATA, "docker-compose.yml")),
+    lambda tmp: estate(tmp) or DockerComposeConnector(str(tmp)),
+])
+def test_iter_records_matches_parse(tmp_path, monkeypatch, make):
+    monkeypatch.setattr(yaml_loader, "CACHE_DIR", "")
+    connector = make(tmp_path)
+    # Connector.parse materializes iter_records()
+    assert ordered(Connector.parse(connector)) == ordered(connector.parse())
+
+
+def test_connector_needs_parse_or_iter_records():
+    with pytest.raises(TypeError):
+        class Empty(Connector):
+            pass
+
+
+class BatchStorage(RecordingStorage):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def upsert_nodes(self, nodes, batch_size=1000, replace=False):
+        self.batches.append(len(nodes))
+        return super().upsert_nodes(nodes, batch_size, replace)
+
+    def upsert_edges(self, edges, batch_size=1000):
+        self.batches.append(len(edges))
+        return super().upsert_edges(edges, batch_size)
+
+
+def test_stream_load_writes_bounded_batches_nodes_first(tmp_path):
+    teams = {"teams": [{"name": f"team-{i}", "owns": [f"svc-{i}"]} for i in range(50)]}
+    services = {"services": {f"svc-{i}": {"image": "app"} for i in range(50)}}
+    (tmp_path / "teams.yaml").write_text(yaml.safe_dump(teams))
+    (tmp_path / "docker-compose.yml").write_text(yaml.safe_dump(services))
+
+    storage = BatchStorage()
+    stats = stream_load(
+        [TeamsConnector(str(tmp_path / "teams.yaml")), DockerComposeConnector(str(tmp_path / "docker-compose.yml"))],
+        storage,
+        batch_size=8,
+    )
+
+    assert max(storage.batches) == 8
+    assert stats["nodes_upserted"] == len(storage.nodes) == 100
+    # the ownership edges precede their services in the input, but are
+    # written after every node
+    assert stats["edges_upserted"] == 50 and all(known for _, known in storage.edges)
+
+
+def test_iter_records_resolves_anchors_in_skipped_keys(tmp_path, monkeypatch):
+    monkeypatch.setattr(yaml_loader, "CACHE_DIR", "")
+    (tmp_path / "docker-compose.yml").write_text(
+        "x-common: &common\n"
+        "  image: app\n"
+        "  environment:\n"
+        "    DATABASE_URL: postgresql://app@db:5432/app\n"
+        "services:\n"
+        "  api:\n"
+        "    <<: *common\n"
+        "    ports: ['8080:8080']\n"
+        "  db:\n"
+        "    image: postgres:16\n"
+    )
+    connector = DockerComposeConnector(str(tmp_path / "docker-compose.yml"))
+
+    nodes, edges = ordered(Connector.parse(connector))
+    assert (nodes, edges) == ordered(connector.parse())
+    # the edge only exists if the merge key was resolved
+    assert [(e["source"], e["target"]) for e in edges] == [("service:api", "service:db")]
@@ -0,0 +1,115 @@
+import pytest
+from graph.sync import GraphSync, SyncState
+
+compose_nodes = [
+    {"id": "service:api", "type": "service", "name": "api", "properties": {"port": 8080}},
+    {"id": "service:orders", "type": "service", "name": "orders", "properties": {}},
+    {"id": "database:orders-db", "type": "database", "name": "orders-db", "properties": {}},
+]
+compose_edges = [
+    {"id": "e1", "type": "calls", "source": "service:api", "target": "service:orders", "properties": {}},
+    {"id": "e2", "type": "reads_writes", "source": "service:orders", "target": "database:orders-db", "properties": {}},
+]
+teams_nodes = [{"id": "team:orders", "type": "team", "name": "orders", "properties": {}}]
+teams_edges = [
+    {"id": "e3", "type": "owns", "source": "team:orders", "target": "service:billing", "properties": {}},
+]
+
+
+def synced(tmp_path):
+    sync = GraphSync(state=SyncState(str(tmp_path / "state.json")))
+    delta = sync.plan({"compose": (compose_nodes, compose_edges), "teams": (teams_nodes, teams_edges)})
+    # record the state the way apply() does, without a database to write to
+    sync.state.sources = delta.sources
+    sync.state.save()
+    return sync, delta
+
+
+def test_first_sync_writes_everything(tmp_path):
+    _, delta = synced(tmp_path)
+
+    assert len(delta.upsert_nodes) == 4
+    assert len(delta.upsert_edges) == 3
+    assert not delta.delete_nodes and not delta.delete_edges
+
+
+def test_unchanged_sources_are_a_no_op(tmp_path):
+    synced(tmp_path)
+
+    # a fresh process picks the state back up from disk
+    sync = GraphSync(state=SyncState(str(tmp_path / "state.json")))
+    delta = sync.plan({"compose": (compose_nodes, compose_edges), "teams": (teams_nodes, teams_edges)})
+
+    assert not delta
+    assert delta.changed_sources == []
+
+
+def test_diff_only_touches_what_changed(tmp_path):
+    sync, _ = synced(tmp_path)
+
+    nodes = [
+        {**compose_nodes[0], "properties": {"port": 9090}},
+        compose_nodes[2],
+        {"id": "service:billing", "type": "service", "name": "billing", "properties": {}},
+    ]
+    edges = [
+        {"id": "e1", "type": "calls", "source": "service:api", "target": "service:billing", "properties": {}},
+    ]
+    delta = sync.plan({"compose": (nodes, edges)})
+
+    assert delta.changed_sources == ["compose"]
+    assert sorted(n["id"] for n in delta.upsert_nodes) == ["service:api", "service:billing"]
+    assert delta.delete_nodes == ["service:orders"]
+    assert sorted(e["id"] for e in delta.delete_edges) == ["e1", "e2"]
+    # e3 (teams, unchanged) now has a target to attach to
+    assert sorted(e["id"] for e in delta.upsert_edges) == ["e1", "e3"]
+
+
+class IngestStorage:
+    """Stands in for GraphStorage.ingest(): one call per transaction, dangling edges reported."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def ingest(self, nodes=(), edges=(), delete_node_ids=(), delete_edges=(), batch_size=1000, replace=True):
+        if self.fail:
+            raise RuntimeError("transaction rolled back")
+        self.calls.append((list(nodes), list(edges), list(delete_node_ids), list(delete_edges)))
+        ids = {n["id"] for n in nodes}
+        dangling = [
+            {**e, "missing": [i for i in (e["source"], e["target"]) if i not in ids]}
+            for e in edges if e["source"] not in ids or e["target"] not in ids
+        ]
+        return {
+            "nodes_upserted": len(ids),
+            "nodes_deleted": len(delete_node_ids),
+            "edges_upserted": len(edges) - len(dangling),
+            "edges_deleted": len(delete_edges),
+            "dangling_edges": dangling,
+            "node_seconds": 0.0,
+            "edge_seconds": 0.0,
+        }
+
+
+def test_sync_is_one_transaction_and_reports_dangling_edges(tmp_path):
+    storage = IngestStorage()
+    sync = GraphSync(state=SyncState(str(tmp_path / "state.json")), storage=storage)
+    stats = sync.sync({"compose": (compose_nodes, compose_edges), "teams": (teams_nodes, teams_edges)})
+
+    assert len(storage.calls) == 1
+    assert stats["edges_upserted"] == 2
+    assert [(e["id"], e["missing"]) for e in stats["dangling_edges"]] == [("e3", ["service:billing"])]
+
+
+def test_failed_transaction_keeps_previous_state(tmp_path):
+    path = str(tmp_path / "state.json")
+    GraphSync(state=SyncState(path), storage=IngestStorage()).sync({"compose": (compose_nodes, compose_edges)})
+
+    failing = GraphSync(state=SyncState(path), storage=IngestStorage(fail=True))
+    with pytest.raises(RuntimeError):
+        failing.sync({"compose": (compose_nodes[:1], [])})
+
+    # the failed load is planned (and written) again in full next time
+    delta = GraphSync(state=SyncState(path)).plan({"compose": (compose_nodes[:1], [])})
+    assert delta.delete_nodes == ["service:orders", "database:orders-db"]
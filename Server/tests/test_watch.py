@@ -0,0 +1,153 @@
+import shutil
+import sys
+import time
+import pytest
+from connectors.base import Connector
+from connectors.docker_compose import DockerComposeConnector
+from graph.watch import IngestDaemon, InotifyWatcher, PollingWatcher
+
+
+class FileConnector(Connector):
+    def __init__(self, path):
+        self.path = path
+
+    def parse(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            name = f.read().strip()
+        return [{"id": f"service:{name}", "type": "service", "name": name, "properties": {}}], []
+
+
+class RecordingSync:
+    def __init__(self):
+        self.calls = []
+
+    def sync(self, parsed, full=False):
+        self.calls.append(sorted(parsed))
+        return {"nodes_upserted": 0, "nodes_deleted": 0, "edges_upserted": 0, "edges_deleted": 0, "dangling_edges": [], "seconds": 0.0}
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.mark.parametrize("make", [
+    lambda paths: PollingWatcher(paths, interval=0.02),
+    pytest.param(InotifyWatcher, marks=pytest.mark.skipif(sys.platform != "linux", reason="inotify is Linux-only")),
+])
+def test_watcher_reports_changed_file(tmp_path, make):
+    a, b = tmp_path / "a.yml", tmp_path / "b.yml"
+    write(a, "a")
+    write(b, "b")
+    watcher = make([str(a), str(b)])
+
+    time.sleep(0.01)  # a distinct mtime for the polling watcher
+    write(b, "b2")
+    write(tmp_path / "unrelated.txt", "x")
+
+    assert watcher.changes(timeout=1.0) == {str(b)}
+    watcher.close()
+
+
+def test_daemon_resyncs_only_the_changed_source(tmp_path):
+    a, b = tmp_path / "a.yml", tmp_path / "b.yml"
+    write(a, "a")
+    write(b, "b")
+
+    sync = RecordingSync()
+    connectors = [FileConnector(str(a)), FileConnector(str(b))]
+    daemon = IngestDaemon(connectors, sync=sync, watcher=PollingWatcher([str(a), str(b)], interval=0.02), debounce=0.05)
+    daemon.start()
+
+    assert wait_for(lambda: len(sync.calls) == 1)  # initial catch-up, both sources
+    assert len(sync.calls[0]) == 2
+
+    # a burst of saves is synced once
+    for text in ("a1", "a2", "a3"):
+        write(a, text)
+        time.sleep(0.01)
+
+    assert wait_for(lambda: len(sync.calls) == 2)
+    daemon.stop()
+
+    assert sync.calls[1] == [f"FileConnector:{a}"]
+    assert len(sync.calls) == 2
+
+
+class FlakySync(RecordingSync):
+    """Fails its first write, like a Neo4j restart or a rolled-back ingest."""
+
+    def sync(self, parsed, full=False):
+        if not self.calls:
+            self.calls.append(None)
+            raise RuntimeError("connection refused")
+        return super().sync(parsed, full)
+
+
+def test_daemon_retries_a_failed_write_and_keeps_watching(tmp_path):
+    a, b = tmp_path / "a.yml", tmp_path / "b.yml"
+    write(a, "a")
+    write(b, "b")
+
+    sync = FlakySync()
+    connectors = [FileConnector(str(a)), FileConnector(str(b))]
+    daemon = IngestDaemon(connectors, sync=sync, watcher=PollingWatcher([str(a), str(b)], interval=0.02),
+                          debounce=0.05, retry_delay=0.05)
+    daemon.start()
+
+    # the failed catch-up is retried with both sources
+    assert wait_for(lambda: len(sync.calls) == 2)
+    assert len(sync.calls[1]) == 2 and daemon._thread.is_alive()
+
+    write(b, "b2")
+    assert wait_for(lambda: len(sync.calls) == 3)
+    daemon.stop()
+
+    assert sync.calls[2] == [f"FileConnector:{b}"]
+
+
+class NodeSync(RecordingSync):
+    """Records the node ids of each sync."""
+
+    def __init__(self):
+        super().__init__()
+        self.nodes = []
+
+    def sync(self, parsed, full=False):
+        self.nodes.append(sorted(n["id"] for nodes, _ in parsed.values() for n in nodes))
+        return super().sync(parsed, full)
+
+
+@pytest.mark.parametrize("make", [
+    lambda paths, roots: PollingWatcher(paths, roots, interval=0.02),
+    pytest.param(InotifyWatcher, marks=pytest.mark.skipif(sys.platform != "linux", reason="inotify is Linux-only")),
+])
+def test_daemon_picks_up_projects_added_and_removed_after_start(tmp_path, make):
+    (tmp_path / "shop").mkdir()
+    write(tmp_path / "shop" / "docker-compose.yml", "services:\n  api: {}\n")
+
+    sync = NodeSync()
+    connector = DockerComposeConnector(str(tmp_path))
+    daemon = IngestDaemon([connector], sync=sync, watcher=make(connector.paths(), connector.roots()), debounce=0.05)
+    daemon.start()
+    assert wait_for(lambda: sync.nodes == [["service:shop/api"]])
+
+    # a new project directory, created after the watcher started
+    (tmp_path / "billing").mkdir()
+    write(tmp_path / "billing" / "compose.yaml", "services:\n  worker: {}\n")
+    assert wait_for(lambda: sync.nodes[-1] == ["service:billing/worker", "service:shop/api"])
+    assert str(tmp_path / "billing" / "compose.yaml") in daemon.by_path
+
+    # and a whole project deleted
+    shutil.rmtree(tmp_path / "shop")
+    assert wait_for(lambda: sync.nodes[-1] == ["service:billing/worker"])
+    daemon.stop()
+
+    assert str(tmp_path / "shop" / "docker-compose.yml") not in daemon.by_path
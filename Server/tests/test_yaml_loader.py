@@ -0,0 +1,116 @@
+import math
+import os
+import yaml
+from connectors import yaml_loader
+from connectors.yaml_loader import load_yaml, load_yaml_file
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def test_fast_loader_builds_the_same_documents():
+    for name in ("docker-compose.yml", "teams.yaml"):
+        with open(os.path.join(DATA, name), "rb") as f:
+            raw = f.read()
+        assert load_yaml(raw, cache_dir="") == yaml.safe_load(raw)
+
+
+def test_unchanged_content_is_read_from_the_cache(tmp_path, monkeypatch):
+    path = tmp_path / "compose.yml"
+    path.write_text("services:\n  api:\n    image: api\n    created: 2024-01-02\n", encoding="utf-8")
+    cache = str(tmp_path / "cache")
+
+    first = load_yaml_file(str(path), cache_dir=cache)
+
+    calls = []
+    real = yaml_loader.parse
+    monkeypatch.setattr(yaml_loader, "parse", lambda raw: calls.append(raw) or real(raw))
+
+    # same content under another name: still a hit, dates and all
+    copy = tmp_path / "copy.yml"
+    copy.write_bytes(path.read_bytes())
+    assert load_yaml_file(str(copy), cache_dir=cache) == first
+    assert calls == []
+
+    path.write_text("services: {}\n", encoding="utf-8")
+    assert load_yaml_file(str(path), cache_dir=cache) == {"services": {}}
+    assert len(calls) == 1
+
+
+def test_corrupt_cache_entry_is_reparsed(tmp_path):
+    raw = b"teams: []\n"
+    cache = str(tmp_path / "cache")
+    load_yaml(raw, cache_dir=cache)
+
+    entry = yaml_loader._cache_path(cache, yaml_loader.content_hash(raw))
+    with open(entry, "wb") as f:
+        f.write(b"not json")
+
+    assert load_yaml(raw, cache_dir=cache) == {"teams": []}
+
+
+def test_cache_round_trips_every_safe_type(tmp_path):
+    raw = (
+        b"when: 2024-01-02\n"
+        b"at: 2024-01-02T03:04:05+02:00\n"
+        b"blob: !!binary aGVsbG8=\n"
+        b"tags: !!set {a, b}\n"
+        b"ordered: !!omap [{x: 1}, {y: 2}]\n"
+        b"ports: {8080: http, null: none, true: yes}\n"
+        b"__yaml__: {value: 1}\n"
+        b"ratio: .nan\n"
+    )
+    cache = str(tmp_path / "cache")
+    load_yaml(raw, cache_dir=cache)
+
+    # the entry is plain JSON, and reads back equal to the document
+    entry = yaml_loader._cache_path(cache, yaml_loader.content_hash(raw))
+    with open(entry, encoding="utf-8") as f:
+        assert f.read().startswith("{")
+    cached, parsed = load_yaml(raw, cache_dir=cache), yaml.safe_load(raw)
+    assert math.isnan(cached.pop("ratio")) and math.isnan(parsed.pop("ratio"))
+    assert cached == parsed
+
+
+def test_cache_keeps_the_most_recently_used_entries(tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+
+    def entry(i):
+        return yaml_loader._cache_path(cache, yaml_loader.content_hash(f"n: {i}\n".encode()))
+
+    for i in range(3):
+        load_yaml(f"n: {i}\n".encode(), cache_dir=cache)
+        os.utime(entry(i), (1000 + i, 1000 + i))
+    load_yaml(b"n: 0\n", cache_dir=cache)  # a hit makes it recent again
+
+    monkeypatch.setattr(yaml_loader, "CACHE_ENTRIES", 2)
+    yaml_loader.prune_cache(cache, force=True)
+
+    assert [os.path.exists(entry(i)) for i in range(3)] == [True, False, True]
+
+
+def test_more_files_than_entries_still_hit_on_the_next_pass(tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    monkeypatch.setattr(yaml_loader, "CACHE_ENTRIES", 4)
+    monkeypatch.setattr(yaml_loader, "_pruned", {})
+    docs = [f"services:\n  svc-{i}:\n    image: app\n".encode() for i in range(10)]
+
+    calls = []
+    real = yaml_loader.parse
+    monkeypatch.setattr(yaml_loader, "parse", lambda raw: calls.append(raw) or real(raw))
+
+    def run():
+        calls.clear()
+        for raw in docs:
+            load_yaml(raw, cache_dir=cache)
+        return len(calls)
+
+    assert run() == 10
+    # the same process: nothing is pruned mid-run, every document is a hit
+    assert run() == 0
+
+    # a new run prunes once, to the 4 most recently used; those still hit
+    monkeypatch.setattr(yaml_loader, "_pruned", {})
+    for i, raw in enumerate(docs):
+        path = yaml_loader._cache_path(cache, yaml_loader.content_hash(raw))
+        os.utime(path, (1000 + i, 1000 + i))
+    assert run() == 6